@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+numba = pytest.importorskip("numba")  # the kernels under test only exist with Numba
+
+from numba import njit, uint32 as u32
+
+from vireon_miner.fastscan_numba import (
+    _H0,
+    _block1_precompute,
+    _bswap32,
+    _compress,
+    _load_u32_be,
+    _midstate_of_header,
+    _sha256d_block1,
+)
+
+HEADER76 = np.frombuffer(bytes(range(76)), dtype=np.uint8)
+HASHES = 1_000_000
+
+
+@njit(cache=True)
+def _loop_generic(header76_u8, n):
+    # Pre-precompute path: both compressions run in full for every nonce.
+    mid = _midstate_of_header(header76_u8)
+    m0 = _load_u32_be(header76_u8, 64)
+    m1 = _load_u32_be(header76_u8, 68)
+    m2 = _load_u32_be(header76_u8, 72)
+    z = u32(0)
+    pad = u32(0x80000000)
+    acc = u32(0)
+    nonce = u32(0)
+    for _ in range(n):
+        h1 = _compress(mid, m0, m1, m2, _bswap32(nonce), pad, z, z, z, z, z, z, z, z, z, z, u32(640))
+        h2 = _compress(_H0, h1[0], h1[1], h1[2], h1[3], h1[4], h1[5], h1[6], h1[7], pad, z, z, z, z, z, z, u32(256))
+        acc ^= h2[7]
+        nonce = u32(nonce + 1)
+    return acc
+
+
+@njit(cache=True)
+def _loop_precomputed(header76_u8, n):
+    # Scanner path: rounds 0..2, W16..W19 and the padding terms come from once-per-header work.
+    mid = _midstate_of_header(header76_u8)
+    pre = _block1_precompute(
+        mid, _load_u32_be(header76_u8, 64), _load_u32_be(header76_u8, 68), _load_u32_be(header76_u8, 72)
+    )
+    acc = u32(0)
+    nonce = u32(0)
+    for _ in range(n):
+        acc ^= _sha256d_block1(mid, pre, nonce)[7]
+        nonce = u32(nonce + 1)
+    return acc
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _warm_jit():
+    # both loops must hash identically, or the comparison is meaningless
+    assert _loop_generic(HEADER76, 1000) == _loop_precomputed(HEADER76, 1000)
+
+
+def test_bench_block1_generic(benchmark):
+    benchmark.extra_info["hashes"] = HASHES
+    benchmark(_loop_generic, HEADER76, HASHES)
+
+
+def test_bench_block1_precomputed(benchmark):
+    benchmark.extra_info["hashes"] = HASHES
+    benchmark(_loop_precomputed, HEADER76, HASHES)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from vireon_miner.hashing import sha256d
+from vireon_miner.scan import find_share_bounded, find_share_bounded_midstate
 
 
 def test_bench_sha256d_80bytes(benchmark):
@@ -20,3 +21,19 @@ def test_bench_sha256d_nonce_scan_like(benchmark):
         sha256d(bytes(data))
 
     benchmark(work)
+
+
+# Pure-python nonce scan (the whole hashrate without Numba): the reference scan
+# rebuilds and hashes all 80 bytes twice per nonce, the midstate scan clones
+# the hashlib state after the first 64 bytes. target 0 never matches, so each
+# call hashes the full window.
+SCAN_HEADER76 = bytes(range(76))
+SCAN_WINDOW = 2_000
+
+
+def test_bench_python_scan_reference(benchmark):
+    assert benchmark(find_share_bounded, SCAN_HEADER76, 0, 0, SCAN_WINDOW) is None
+
+
+def test_bench_python_scan_midstate(benchmark):
+    assert benchmark(find_share_bounded_midstate, SCAN_HEADER76, 0, 0, SCAN_WINDOW) is None
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from vireon_miner.job import merkle_root_le, build_header_80, header_hash_int_le
+from vireon_miner import fastscan_numba
+from vireon_miner.hashing import sha256d
+from vireon_miner.job import JobTemplate, merkle_root_le, build_header_80, header_hash_int_le
+from vireon_miner.live_client import build_header76, extranonce2_from_counter, merkle_root_from_coinbase
 
 
 def test_bench_build_and_hash_header(benchmark):
@@ -30,3 +33,104 @@ def test_bench_build_and_hash_header(benchmark):
         header_hash_int_le(hdr)
 
     benchmark(work)
+
+
+# Per-extranonce2 header76 cost with a pool-sized job: ~280-byte coinbase and
+# a 12-deep merkle branch (a few thousand transactions). The inline path is
+# what the live loops did before JobTemplate: hex-decode everything per en2.
+NOTIFY = dict(
+    prevhash_hex="aa" * 32,
+    # version, 1 input, null prevout, scriptSig: height + pool tag (extranonce follows)
+    coinb1_hex="02000000010000000000000000000000000000000000000000000000000000000000000000ffffffff" + "4b03" + "2f" * 80,
+    # sequence, payout + witness-commitment outputs, locktime
+    coinb2_hex="ffffffff02" + "00" * 140,
+    merkle_branch_hex=[f"{i:02x}" * 32 for i in range(12)],
+    version_hex="20000000",
+    nbits_hex="1d00ffff",
+    ntime_hex="5f5e1000",
+)
+EXTRANONCE1_HEX = "f000000f"
+EN2_SIZE = 4
+
+
+def test_bench_header76_inline_hex(benchmark):
+    n = [0]
+
+    def work():
+        n[0] += 1
+        merkle = merkle_root_from_coinbase(
+            NOTIFY["coinb1_hex"], NOTIFY["coinb2_hex"], EXTRANONCE1_HEX,
+            extranonce2_from_counter(n[0], EN2_SIZE), NOTIFY["merkle_branch_hex"],
+        )
+        build_header76(NOTIFY["version_hex"], NOTIFY["prevhash_hex"], merkle, NOTIFY["ntime_hex"], NOTIFY["nbits_hex"])
+
+    benchmark(work)
+
+
+def test_bench_header76_job_template(benchmark):
+    tpl = JobTemplate.from_hex(job_id="j", extranonce1_hex=EXTRANONCE1_HEX, **NOTIFY)
+    n = [0]
+
+    def work():
+        n[0] += 1
+        tpl.header76(n[0].to_bytes(EN2_SIZE, "big"))
+
+    benchmark(work)
+
+
+# Coinbase hash alone (no branch), where the prefix midstate applies: hashing
+# the whole ~250-byte coinbase per extranonce2 vs cloning the sha256 state
+# after coinb1+extranonce1 and feeding only extranonce2+coinb2.
+COINBASE_ONLY = dict(NOTIFY, merkle_branch_hex=[])
+
+
+def test_bench_coinbase_hash_full(benchmark):
+    tpl = JobTemplate.from_hex(job_id="j", extranonce1_hex=EXTRANONCE1_HEX, **COINBASE_ONLY)
+    n = [0]
+
+    def work():
+        n[0] += 1
+        sha256d(tpl.coinbase_prefix + n[0].to_bytes(EN2_SIZE, "big") + tpl.coinbase_suffix)
+
+    benchmark(work)
+
+
+def test_bench_coinbase_hash_prefix_midstate(benchmark):
+    tpl = JobTemplate.from_hex(job_id="j", extranonce1_hex=EXTRANONCE1_HEX, **COINBASE_ONLY)
+    n = [0]
+
+    def work():
+        n[0] += 1
+        tpl.merkle_root(n[0].to_bytes(EN2_SIZE, "big"))
+
+    benchmark(work)
+
+
+# Extranonce2 rolling in bulk: 4096 header76s per call into one buffer. Divide
+# the reported time by BATCH for the per-header cost; the loop variant is
+# header76() per counter (the fallback without Numba).
+BATCH = 4096
+
+
+def test_bench_header76_batch(benchmark):
+    tpl = JobTemplate.from_hex(job_id="j", extranonce1_hex=EXTRANONCE1_HEX, **NOTIFY)
+    if fastscan_numba.available():
+        fastscan_numba.warm_header76_rows()  # JIT / cache load outside the timing
+    n = [0]
+
+    def work():
+        n[0] += BATCH
+        tpl.header76_batch(n[0], BATCH, EN2_SIZE)
+
+    benchmark(work)
+
+
+def test_bench_header76_loop(benchmark):
+    tpl = JobTemplate.from_hex(job_id="j", extranonce1_hex=EXTRANONCE1_HEX, **NOTIFY)
+    n = [0]
+
+    def work():
+        n[0] += BATCH
+        b"".join(tpl.header76((n[0] + i).to_bytes(EN2_SIZE, "big")) for i in range(BATCH))
+
+    benchmark(work)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+# Import cost of the CLI entry point in a fresh interpreter. Health checks run
+# `vireon-miner --selftest` every few seconds, so this path must not pull in
+# NumPy/Numba (scan backends are resolved on first scan instead).
+CLI_IMPORT_BUDGET_US = 250_000
+HEAVY_MODULES = ("numpy", "numba", "llvmlite")
+
+_SRC = str(Path(__file__).resolve().parents[1] / "src")
+
+
+def _import_cli() -> dict[str, int]:
+    """Run `python -X importtime -c 'import vireon_miner.cli'`; returns {module: cumulative_us}."""
+    # cwd=src: `-c` puts the cwd first on sys.path, so this measures the source tree
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import vireon_miner.cli"],
+        capture_output=True,
+        text=True,
+        cwd=_SRC,
+        check=True,
+    )
+    out: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <indented module>"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, mod = line[len("import time:"):].split("|")
+        out[mod.strip()] = int(cum)
+    return out
+
+
+def test_bench_cli_import_time(benchmark):
+    mods = benchmark.pedantic(_import_cli, rounds=5, iterations=1)
+    cli_us = mods["vireon_miner.cli"]
+    benchmark.extra_info["cli_import_us"] = cli_us
+
+    assert not [m for m in mods if m.split(".")[0] in HEAVY_MODULES]
+    assert cli_us <= CLI_IMPORT_BUDGET_US, f"vireon_miner.cli import took {cli_us} us"
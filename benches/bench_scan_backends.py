@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import pytest
+
+from vireon_miner.scan_auto import scan_bounded
+
+numba = pytest.importorskip("numba")  # miss-path cost only matters with Numba installed
+
+HEADER76 = b"\x01" * 76
+MISS_TARGET = 0  # no hash is <= 0, so every call scans its whole window
+WINDOW = 20_000
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _warm_jit():
+    scan_bounded(HEADER76, MISS_TARGET, start_nonce=0, count=1, prefer="numba-midstate")
+    scan_bounded(HEADER76, MISS_TARGET, start_nonce=0, count=1, prefer="numba-parallel")
+
+
+def test_bench_miss_numba_midstate(benchmark):
+    out = benchmark(scan_bounded, HEADER76, MISS_TARGET, 0, WINDOW, "numba-midstate")
+    # the Numba miss is authoritative: no pure-Python rescan of the same window
+    assert out.nonce is None and out.backend == "numba-midstate"
+
+
+def test_bench_miss_numba_parallel(benchmark):
+    out = benchmark(scan_bounded, HEADER76, MISS_TARGET, 0, WINDOW, "numba-parallel")
+    assert out.nonce is None and out.backend == "numba-parallel"
+
+
+def test_bench_miss_python_reference(benchmark):
+    out = benchmark(scan_bounded, HEADER76, MISS_TARGET, 0, WINDOW, "python")
+    assert out.nonce is None and out.backend == "python"
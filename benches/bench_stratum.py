@@ -1,5 +1,12 @@
 from __future__ import annotations
 
+import json
+
+import pytest
+
+from vireon_miner.codec import CODECS, SubmitTemplate
+from vireon_miner.framing import JsonLineReader
+from vireon_miner.miner import parse_notify_full
 from vireon_miner.stratum import StratumMsg, parse_json_line
 
 
@@ -11,3 +18,135 @@ def test_bench_stratum_encode(benchmark):
 def test_bench_stratum_parse(benchmark):
     line = StratumMsg("mining.notify", ["job", "x", "y"], msg_id=None).to_json_line()
     benchmark(parse_json_line, line)
+
+
+# ---------- line framing ----------
+
+# Pool-sized notify: ~280-byte coinbase halves, 12-deep merkle branch (~1.4 KB per line).
+NOTIFY_LINE = (json.dumps({
+    "id": None,
+    "method": "mining.notify",
+    "params": ["1f3a", "11" * 32, "02000000" + "ab" * 60, "cd" * 150, ["22" * 32] * 12,
+               "20000000", "1d00ffff", "5e9a2b5a", True],
+}) + "\n").encode()
+BURST = NOTIFY_LINE * 200
+
+
+class _ChunkSocket:
+    # Delivers `chunks` as successive receives, each capped at the caller's size.
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.i = 0
+        self.off = 0
+
+    def _take(self, n):
+        if self.i >= len(self.chunks):
+            return b""
+        c = self.chunks[self.i]
+        out = c[self.off:self.off + n]
+        self.off += len(out)
+        if self.off >= len(c):
+            self.i, self.off = self.i + 1, 0
+        return out
+
+    def recv(self, n):
+        return self._take(n)
+
+    def recv_into(self, buf):
+        c = self._take(len(buf))
+        buf[:len(c)] = c
+        return len(c)
+
+
+class _SplitReader:
+    # The pre-framing reader: buf += chunk, then split(b"\n", 1) per message.
+    def __init__(self, sock):
+        self.sock = sock
+        self.buf = b""
+
+    def read_one(self):
+        while b"\n" not in self.buf:
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("socket closed")
+            self.buf += chunk
+        line, self.buf = self.buf.split(b"\n", 1)
+        line = line.strip()
+        if not line:
+            return self.read_one()
+        return json.loads(line.decode())
+
+
+# A notify too big for one segment (huge coinbase / long merkle branch), as a
+# TCP link delivers it: 1460-byte MSS segments.
+BIG_LINE = (json.dumps({"id": None, "method": "mining.notify", "params": ["ab" * 256_000]}) + "\n").encode()
+SEGMENTS = [BIG_LINE[i:i + 1460] for i in range(0, len(BIG_LINE), 1460)]
+
+
+def _drain_one(reader_cls, chunks):
+    r = reader_cls(_ChunkSocket(chunks))
+    return [r.read_one() for _ in range(200)]
+
+
+def test_bench_framing_burst_split(benchmark):
+    benchmark(_drain_one, _SplitReader, [BURST])
+
+
+def test_bench_framing_burst_read_one(benchmark):
+    benchmark(_drain_one, JsonLineReader, [BURST])
+
+
+def test_bench_framing_burst_read_many(benchmark):
+    def run():
+        r = JsonLineReader(_ChunkSocket([BURST]), bufsize=len(BURST))
+        return r.read_many()
+
+    assert len(run()) == 200
+    benchmark(run)
+
+
+def test_bench_framing_fragmented_split(benchmark):
+    benchmark(lambda: _SplitReader(_ChunkSocket(SEGMENTS)).read_one())
+
+
+def test_bench_framing_fragmented_read_one(benchmark):
+    benchmark(lambda: JsonLineReader(_ChunkSocket(SEGMENTS)).read_one())
+
+
+# ---------- JSON codec: stdlib vs orjson (when installed) ----------
+
+CODEC_NAMES = sorted(CODECS)
+SUBMIT = {"id": 1234, "method": "mining.submit",
+          "params": ["tb1qexampleaddress.worker1", "1f3a", "0000002a", "5e9a2b5a", "deadbeef"]}
+
+
+@pytest.mark.parametrize("name", CODEC_NAMES)
+def test_bench_codec_encode_submit(benchmark, name):
+    # per share, as the miner did it: build the message, then encode it
+    dumps = CODECS[name].dumps
+    user, job_id, en2, ntime, nonce = SUBMIT["params"]
+
+    def encode():
+        return dumps({"id": 1234, "method": "mining.submit", "params": [user, job_id, en2, ntime, nonce]}) + b"\n"
+
+    assert json.loads(encode()) == SUBMIT
+    benchmark(encode)
+
+
+def test_bench_codec_encode_submit_template(benchmark):
+    tpl = SubmitTemplate("tb1qexampleaddress.worker1")
+    assert json.loads(tpl.line(1234, "1f3a", "0000002a", "5e9a2b5a", "deadbeef")) == SUBMIT
+    benchmark(tpl.line, 1234, "1f3a", "0000002a", "5e9a2b5a", "deadbeef")
+
+
+@pytest.mark.parametrize("name", CODEC_NAMES)
+def test_bench_codec_decode_notify(benchmark, name):
+    benchmark(CODECS[name].loads, NOTIFY_LINE)
+
+
+@pytest.mark.parametrize("name", CODEC_NAMES)
+def test_bench_codec_notify_end_to_end(benchmark, name):
+    # wire line -> validated notify tuple
+    loads = CODECS[name].loads
+    assert parse_notify_full(loads(NOTIFY_LINE)) is not None
+    benchmark(lambda: parse_notify_full(loads(NOTIFY_LINE)))
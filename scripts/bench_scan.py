@@ -1,11 +1,44 @@
 import json
+import os
 import time
 import platform
 import sys
 
+from vireon_miner.fastscan_numba import candidate_stats, reset_candidate_stats
+from vireon_miner.parallel_scan import ParallelScanner
 from vireon_miner.scan_auto import find_share_bounded_auto
 
 
+def _worker_counts() -> list[int]:
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def scaling_curve(header76: bytes, nonces_per_worker: int = 200000) -> list[dict]:
+    """
+    MH/s of the process-pool scanner per worker count.
+    target=0 never matches, so every worker hashes its whole slice (pure throughput).
+    """
+    curve = []
+    base = None
+    for w in _worker_counts():
+        with ParallelScanner(workers=w) as scanner:  # pool spawn + JIT happen in start()
+            count = nonces_per_worker * w
+            t0 = time.time()
+            res = scanner.scan(header76, 0, start_nonce=0, count=count)
+            dt = max(1e-9, time.time() - t0)
+        mhps = (res.hashes / dt) / 1e6
+        if base is None:
+            base = mhps
+        curve.append({"workers": w, "hashes": res.hashes, "seconds": dt, "mhps": mhps, "speedup": mhps / base})
+    return curve
+
+
 def main():
     # Deterministic dummy header (76 bytes)
     header76 = b"\x01" * 76
@@ -22,19 +55,26 @@ def main():
 
     # Warm up (Numba compile happens here if available, not inside timing)
     _ = find_share_bounded_auto(header76, target_int, start_nonce=0, count=1)
+    reset_candidate_stats()
 
     t0 = time.time()
 
     for i in range(batches):
         start_nonce = i * batch_size
         scan = find_share_bounded_auto(header76, target_int, start_nonce=start_nonce, count=batch_size)
-        trials += batch_size
         if scan is not None:
+            # the scan stops at the first share; only count nonces actually hashed
+            trials += scan.nonce - start_nonce + 1
             found += 1
             backend = scan.backend
+        else:
+            trials += batch_size
 
     dt = max(1e-9, time.time() - t0)
     mhps = (trials / dt) / 1e6
+    # Numba kernels only (zero on the pure-python fallback): how many nonces
+    # got past the H7 early reject into the full 256-bit compare.
+    cand = candidate_stats()
 
     out = {
         "backend": backend,
@@ -42,6 +82,10 @@ def main():
         "seconds": dt,
         "mhps": mhps,
         "found_batches": found,
+        "candidates": cand.candidates,
+        "candidate_rate": cand.candidate_rate,
+        "cpu_count": os.cpu_count(),
+        "scaling": scaling_curve(header76),
         "python": sys.version.split()[0],
         "platform": platform.platform(),
     }
@@ -1,23 +1,18 @@
 from __future__ import annotations
 
 import json
-import os
-import platform
-import sys
 from pathlib import Path
 
+from vireon_miner.machine import machine_fingerprint, machine_info
+
 
 def main() -> int:
     out_dir = Path("results")
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    info = {
-        "python_version": sys.version.replace("\n", " "),
-        "platform": platform.platform(),
-        "machine": platform.machine(),
-        "processor": platform.processor(),
-        "cpu_count": os.cpu_count(),
-    }
+    info = machine_info()
+    # autotune profiles are keyed by this (see vireon_miner.autotune)
+    info["fingerprint"] = machine_fingerprint(info)
 
     (out_dir / "machine.json").write_text(json.dumps(info, indent=2, sort_keys=True) + "\n")
     return 0
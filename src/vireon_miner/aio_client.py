@@ -0,0 +1,505 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from .codec import SubmitTemplate, dumps_line, loads
+from .job import JobTemplate
+from .miner import _target_from_difficulty, parse_notify_full, parse_set_difficulty
+from .parallel_scan import ParallelScanner
+from .protocol import (
+    CONFIGURE_ID,
+    configure_request,
+    parse_configure_reply,
+    parse_set_version_mask,
+    parse_subscribe_reply,
+)
+from .session import HandshakeResult
+from .submit import FIRST_SUBMIT_ID, SubmitTable
+
+
+# Stream buffer limit: a notify with a long merkle branch / coinbase can exceed
+# asyncio's 64 KiB default line length.
+READ_LIMIT = 1 << 20
+
+
+@dataclass(frozen=True)
+class AsyncJob:
+    template: JobTemplate
+    # ntime as sent by the pool, echoed back in mining.submit
+    ntime_hex: str
+    clean: bool
+    received_at: float
+
+
+class AsyncStratumClient:
+    """
+    asyncio Stratum v1 client.
+
+    One reader task owns the stream and dispatches every inbound line:
+      - replies resolve the future registered for their id (request())
+      - mining.set_difficulty / set_version_mask update client state
+      - mining.notify becomes an AsyncJob on `jobs` (only the newest one is
+        kept) and cancels the scan in flight via `scanner.cancel()`
+
+    Nothing but the reader task reads the socket, so submits, handshake
+    replies and notifications never race for the same buffer.
+
+    run_mining_loop() takes jobs from the queue and offloads each scan to an
+    executor, so hashing and network I/O never block each other;
+    run_live_async() drives it for `--live --async`.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str = "x",
+        timeout_s: float = 5.0,
+        agent: str = "vireon/0.1",
+        version_rolling_mask: Optional[int] = None,
+        scanner: Optional[ParallelScanner] = None,
+    ):
+        self.host = host
+        self.port = int(port)
+        self.username = username
+        self.password = password
+        self.timeout_s = float(timeout_s)
+        self.agent = agent
+        self.version_rolling_mask = version_rolling_mask
+        self.scanner = scanner
+
+        self.extranonce1: Optional[str] = None
+        self.extranonce2_size: Optional[int] = None
+        self.version_mask = 0
+        self.difficulty: Optional[float] = None
+        self.authorized = False
+        # notifications seen before the authorize reply (warm start / debugging)
+        self.early_messages: List[Dict[str, Any]] = []
+        # called with every notification once the client state reflects it
+        # (difficulty, job, version mask), e.g. to fan it out (proxy.py)
+        self.on_notification: Optional[Callable[[Dict[str, Any]], None]] = None
+
+        self.jobs: "asyncio.Queue[Optional[AsyncJob]]" = asyncio.Queue()
+        self.job: Optional[AsyncJob] = None
+
+        self.hashes = 0
+        # backend that ran the latest scan ("" until one did)
+        self.backend = ""
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        # above the handshake / configure ids; shared with the submit table
+        self._ids = itertools.count(FIRST_SUBMIT_ID)
+        self._en2_counter = 0
+        # share counters / submit RTT, updated by the reader task as replies land
+        self.submits = SubmitTable(ids=self._ids)
+        self.submit_template = SubmitTemplate(username)
+
+    @property
+    def submitted(self) -> int:
+        return self.submits.submitted
+
+    @property
+    def accepted(self) -> int:
+        return self.submits.accepted
+
+    @property
+    def rejected(self) -> int:
+        return self.submits.rejected
+
+    # ---------- connection ----------
+
+    async def connect(self) -> None:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, limit=READ_LIMIT), self.timeout_s
+        )
+        self._read_task = asyncio.get_running_loop().create_task(self._read_loop(), name="stratum-reader")
+
+    async def close(self) -> None:
+        if self._read_task is not None:
+            self._read_task.cancel()
+            try:
+                await self._read_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._read_task = None
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+            self._writer = None
+        self._fail_pending(ConnectionError("client closed"))
+
+    async def __aenter__(self) -> "AsyncStratumClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def send(self, obj: Dict[str, Any]) -> None:
+        await self.send_line(dumps_line(obj))
+
+    async def send_line(self, line: bytes) -> None:
+        if self._writer is None:
+            raise ConnectionError("not connected")
+        self._writer.write(line)
+        await self._writer.drain()
+
+    async def request(self, method: str, params: List[Any], msg_id: Optional[int] = None) -> Dict[str, Any]:
+        """Send one request and wait (up to timeout_s) for the reply with its id."""
+        if msg_id is None:
+            msg_id = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = fut
+        try:
+            await self.send({"id": msg_id, "method": method, "params": params})
+            return await asyncio.wait_for(fut, self.timeout_s)
+        finally:
+            self._pending.pop(msg_id, None)
+
+    # ---------- handshake ----------
+
+    async def handshake(self) -> HandshakeResult:
+        """
+        Same wire sequence as miner.connect_and_handshake:
+          - with version_rolling_mask: mining.configure (id 4) first, not awaited
+          - mining.subscribe (id 1), then mining.authorize (id 2)
+          - notifications interleaved anywhere are dispatched and kept as
+            early_messages
+        """
+        if self.version_rolling_mask is not None:
+            await self.send(configure_request(CONFIGURE_ID, self.version_rolling_mask))
+
+        sub = parse_subscribe_reply(await self.request("mining.subscribe", [self.agent], msg_id=1))
+        self.extranonce1 = sub.extranonce1
+        self.extranonce2_size = int(sub.extranonce2_size)
+
+        auth = await self.request("mining.authorize", [self.username, self.password], msg_id=2)
+        if auth.get("error"):
+            raise ValueError(f"authorize error: {auth['error']}")
+        self.authorized = auth.get("result") is True
+        return HandshakeResult(
+            subscribe=sub,
+            authorized=self.authorized,
+            early_messages=tuple(self.early_messages),
+            version_mask=self.version_mask,
+        )
+
+    # ---------- reader task ----------
+
+    async def _read_loop(self) -> None:
+        assert self._reader is not None
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    raise ConnectionError("socket closed")
+                line = line.strip()
+                if line:
+                    self._dispatch(loads(line))
+        except Exception as e:
+            self._fail_pending(e if isinstance(e, ConnectionError) else ConnectionError(str(e)))
+            # wake the mining loop: no more jobs on this connection
+            self.jobs.put_nowait(None)
+            if not isinstance(e, (ConnectionError, OSError, ValueError)):
+                raise
+
+    def _fail_pending(self, exc: BaseException) -> None:
+        for fut in self._pending.values():
+            if not fut.done():
+                fut.set_exception(exc)
+        self._pending.clear()
+
+    def _dispatch(self, msg: Dict[str, Any]) -> None:
+        if self.submits.resolve(msg):
+            return
+        msg_id = msg.get("id")
+        if msg_id is not None and msg.get("method") is None:
+            fut = self._pending.get(msg_id)
+            if fut is not None and not fut.done():
+                fut.set_result(msg)
+            elif msg_id == CONFIGURE_ID:
+                self.version_mask = parse_configure_reply(msg)
+            return
+
+        if not self.authorized:
+            self.early_messages.append(msg)
+        self._apply(msg)
+        if self.on_notification is not None:
+            self.on_notification(msg)
+
+    def _apply(self, msg: Dict[str, Any]) -> None:
+        d = parse_set_difficulty(msg)
+        if d is not None:
+            self.difficulty = d
+            return
+        vm = parse_set_version_mask(msg)
+        if vm is not None:
+            if self.version_mask:
+                self.version_mask = vm
+            return
+        n = parse_notify_full(msg)
+        if n is None or self.extranonce1 is None:
+            return
+        job_id, prevhash, coinb1, coinb2, merkle_branch, version_hex, nbits_hex, ntime_hex, clean = n
+        try:
+            tpl = JobTemplate.from_hex(
+                job_id=job_id,
+                prevhash_hex=prevhash,
+                coinb1_hex=coinb1,
+                coinb2_hex=coinb2,
+                merkle_branch_hex=merkle_branch,
+                version_hex=version_hex,
+                nbits_hex=nbits_hex,
+                ntime_hex=ntime_hex,
+                extranonce1_hex=self.extranonce1,
+            )
+        except ValueError:
+            return
+        job = AsyncJob(template=tpl, ntime_hex=ntime_hex, clean=clean, received_at=time.time())
+        self.job = job
+        # only the newest job matters: drop queued ones the miner has not taken yet
+        while not self.jobs.empty():
+            self.jobs.get_nowait()
+        self.jobs.put_nowait(job)
+        if self.scanner is not None:
+            # thread-safe; the executor's scan returns at its next chunk boundary
+            self.scanner.cancel()
+
+    # ---------- shares ----------
+
+    async def submit(self, job: AsyncJob, extranonce2_hex: str, nonce: int) -> int:
+        """
+        mining.submit without waiting for the reply; returns the submit id. The
+        reader task counts it accepted / rejected when the reply lands.
+        """
+        nonce_hex = (nonce & 0xFFFFFFFF).to_bytes(4, "little").hex()
+        msg_id, line = self.submits.add_line(
+            self.submit_template, job.template.job_id, extranonce2_hex, job.ntime_hex, nonce_hex
+        )
+        await self.send_line(line)
+        return msg_id
+
+    def _next_extranonce2(self) -> str:
+        assert self.extranonce2_size is not None
+        self._en2_counter += 1
+        return self._en2_counter.to_bytes(self.extranonce2_size, "big").hex()
+
+    # ---------- mining ----------
+
+    async def run_mining_loop(
+        self,
+        batch_nonces: int = 200_000,
+        max_shares: Optional[int] = None,
+        stop: Optional[asyncio.Event] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        """
+        Scan the newest job one extranonce2 at a time until `stop` is set,
+        `max_shares` are accepted, or the connection drops:
+          - each scan runs on `executor` (default: one dedicated thread; pass a
+            process pool, or a ParallelScanner with workers > 1, to hash on
+            several cores); the event loop keeps reading meanwhile
+          - a found share is submitted without waiting for the pool's reply;
+            the next scan starts right away
+        """
+        if self.extranonce1 is None or self.extranonce2_size is None:
+            raise RuntimeError("must subscribe before mining")
+        own_scanner = self.scanner is None
+        if self.scanner is None:
+            self.scanner = ParallelScanner(workers=1)
+        scanner = self.scanner
+        own_executor = executor is None
+        pool = executor if executor is not None else ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan")
+        loop = asyncio.get_running_loop()
+        stop = stop if stop is not None else asyncio.Event()
+        # imports / JIT compile while waiting for the first job, not inside the
+        # first timed scan (no-op for an already started scanner)
+        warm = loop.run_in_executor(pool, scanner.start)
+
+        try:
+            job = self.job
+            while not stop.is_set():
+                if max_shares is not None and self.accepted >= max_shares:
+                    break
+                if max_shares is not None and self.accepted + len(self.submits) >= max_shares:
+                    # every share still needed is in flight: wait for the verdicts
+                    await asyncio.sleep(0.01)
+                    self.submits.expire(self.timeout_s)
+                    continue
+                # before picking the job: a notify from here on cancels this scan,
+                # even while it still waits in the executor
+                token = scanner.scan_token()
+                # pick up the newest job (wait for one when there is none yet)
+                if job is None or not self.jobs.empty():
+                    job = await self._next_job(stop)
+                    if job is None:
+                        return
+                if self.difficulty is None:
+                    # a set_difficulty may still be on its way after the first notify
+                    await asyncio.sleep(0.01)
+                    continue
+                if not warm.done():
+                    await warm
+                en2_hex = self._next_extranonce2()
+                header76 = job.template.header76(bytes.fromhex(en2_hex))
+                target = _target_from_difficulty(float(self.difficulty))
+                res = await loop.run_in_executor(
+                    pool, scanner.scan_headers, [header76], target, 0, int(batch_nonces), False, token
+                )
+                self.hashes += res.hashes
+                if res.backend:
+                    self.backend = res.backend
+                share = res.first
+                if share is not None and job is self.job:
+                    await self.submit(job, en2_hex, share.nonce)
+                # let the reader task run between scans
+                await asyncio.sleep(0)
+        finally:
+            # replies still in flight count toward the stats (bounded wait)
+            deadline = loop.time() + self.timeout_s
+            while len(self.submits) and self._read_task is not None and not self._read_task.done():
+                if loop.time() >= deadline:
+                    break
+                await asyncio.sleep(0.01)
+            if not warm.done():
+                await asyncio.gather(warm, return_exceptions=True)
+            if own_executor:
+                pool.shutdown(wait=True)
+            if own_scanner:
+                scanner.close()
+                self.scanner = None
+
+    async def _next_job(self, stop: asyncio.Event) -> Optional[AsyncJob]:
+        """Next queued job, or None once the connection is gone or `stop` is set."""
+        while not stop.is_set():
+            try:
+                job = await asyncio.wait_for(self.jobs.get(), 0.1)
+            except asyncio.TimeoutError:
+                continue
+            return job
+        return None
+
+
+async def connect_and_handshake_async(
+    host: str,
+    port: int,
+    username: str,
+    password: str,
+    timeout_s: float = 5.0,
+    agent: str = "vireon/0.1",
+    version_rolling_mask: Optional[int] = None,
+) -> HandshakeResult:
+    """asyncio counterpart of miner.connect_and_handshake (connection closed on return)."""
+    async with AsyncStratumClient(
+        host, port, username, password, timeout_s=timeout_s, agent=agent, version_rolling_mask=version_rolling_mask
+    ) as c:
+        return await c.handshake()
+
+
+async def run_live_async(
+    host: str,
+    port: int,
+    username: str,
+    password: str = "x",
+    timeout_s: float = 10.0,
+    agent: str = "vireon/0.1",
+    nonce_count: Optional[int] = None,
+    max_shares: int = 1,
+    duration_sec: float = 600.0,
+    out_path: str = "results/live_metrics.json",
+    workers: Optional[int] = None,
+    backend: Optional[str] = None,
+    autotune_path: Optional[str] = None,
+    version_rolling_mask: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    miner.run_live() on the asyncio client (`--live --async`):
+      - handshake, then run_mining_loop() until max_shares are accepted,
+        duration_sec is up (the scan in flight is cancelled) or the pool
+        hangs up
+      - nonce_count / workers / backend left as None come from the autotune
+        profile, else miner's DEFAULT_* values
+      - no slicing and no ntime / version rolling: every scan is one
+        extranonce2 at the job's ntime and version
+      - metrics JSON (the run_live keys this loop tracks) is written on exit
+        no matter what; returned as well
+    """
+    from .autotune import load_profile
+    from .miner import DEFAULT_BACKEND, DEFAULT_NONCE_COUNT, DEFAULT_WORKERS, _write_metrics
+
+    profile = load_profile(autotune_path)
+    if profile is not None:
+        nonce_count = profile.batch_nonces if nonce_count is None else nonce_count
+        workers = profile.workers if workers is None else workers
+        backend = profile.backend if backend is None else backend
+    nonce_count = DEFAULT_NONCE_COUNT if nonce_count is None else int(nonce_count)
+    scanner = ParallelScanner(
+        workers=DEFAULT_WORKERS if workers is None else workers,
+        prefer=DEFAULT_BACKEND if backend is None else backend,  # type: ignore[arg-type]
+    )
+    c = AsyncStratumClient(host, port, username, password, timeout_s=timeout_s, agent=agent,
+                           version_rolling_mask=version_rolling_mask, scanner=scanner)
+    stop = asyncio.Event()
+
+    def _time_up() -> None:
+        stop.set()
+        scanner.cancel()  # the loop sees `stop` once the scan in flight returns
+
+    t0 = time.time()
+    stop_reason = "unknown"
+    timer = asyncio.get_running_loop().call_later(duration_sec, _time_up)
+    try:
+        async with c:
+            res = await c.handshake()
+            if not res.authorized:
+                raise ValueError("authorize rejected")
+            await c.run_mining_loop(batch_nonces=nonce_count, max_shares=int(max_shares), stop=stop)
+        if c.accepted >= int(max_shares):
+            stop_reason = "max_shares"
+        else:
+            stop_reason = "duration" if stop.is_set() else "disconnected"
+    except Exception as e:
+        stop_reason = f"exception:{type(e).__name__}"
+        raise
+    finally:
+        timer.cancel()
+        scanner.close()
+        dt = max(1e-9, time.time() - t0)
+        submitted, accepted, rejected = c.submitted, c.accepted, c.rejected
+        metrics = {
+            "client": "asyncio",
+            "runtime_sec": dt,
+            "hashes": int(c.hashes),
+            "submitted": int(submitted),
+            "accepted": int(accepted),
+            "rejected": int(rejected),
+            "accept_rate": (accepted / submitted) if submitted else 0.0,
+            "reject_rate": (rejected / submitted) if submitted else 0.0,
+            "mhps": (c.hashes / dt) / 1e6,
+            "backend": c.backend,
+            "workers": int(scanner.workers),
+            "nonce_count": int(nonce_count),
+            "autotune_profile": profile.fingerprint if profile is not None else None,
+            "submit_rtt": c.submits.rtt.to_dict(),
+            "submits_unanswered": len(c.submits) + c.submits.expired,
+            "version_mask": f"{c.version_mask:08x}",
+            "difficulty": c.difficulty,
+            "stop_reason": stop_reason,
+            "pool": {"host": host, "port": int(port)},
+            "username": username,
+        }
+        _write_metrics(out_path, metrics)
+        print(f"[METRICS] wrote {out_path}")
+    return metrics
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .machine import machine_fingerprint
+from .parallel_scan import ParallelScanner
+from .scan_auto import available_backends
+from .scheduler import DEFAULT_TARGET_LATENCY_S, JobGeneration, SliceScheduler
+
+
+DEFAULT_PROFILE_PATH = Path.home() / ".cache" / "vireon-miner" / "autotune.json"
+DEFAULT_BATCH_SIZES = (1 << 16, 1 << 18, 1 << 20)
+
+# The live loop scans each batch through SliceScheduler, which polls and lets
+# a new job preempt between slices: a slice's wall time (about --slice-ms),
+# not the batch's, is how long a new job can wait. Scoring assumes a job
+# change every JOB_INTERVAL_S and charges half a slice of stale work per
+# change; a backend / worker count whose slices overrun MAX_SWITCH_LATENCY_S
+# (slower than min_slice allows) scores 0.
+JOB_INTERVAL_S = 30.0
+MAX_SWITCH_LATENCY_S = 2.0
+
+_HEADER76 = bytes(range(76))
+_MISS_TARGET = 0  # no hash is <= 0: every trial hashes its whole batch
+
+
+@dataclass(frozen=True)
+class TuneTrial:
+    backend: str
+    batch_nonces: int
+    workers: int
+    mhps: float
+    # mean wall time of one scheduler slice = worst-case delay before a new
+    # job is picked up
+    switch_latency_s: float
+    score: float
+
+
+@dataclass(frozen=True)
+class TuneProfile:
+    fingerprint: str
+    backend: str
+    batch_nonces: int
+    workers: int
+    mhps: float
+    switch_latency_s: float
+    tuned_at: float
+
+
+def default_worker_counts() -> List[int]:
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def score(mhps: float, switch_latency_s: float, job_interval_s: float = JOB_INTERVAL_S) -> float:
+    """
+    Useful MH/s: raw MH/s minus the share spent on stale jobs.
+
+    - on average half a slice is hashed against an outdated job per job change
+    - slices slower than MAX_SWITCH_LATENCY_S score 0 regardless of MH/s
+    """
+    if switch_latency_s > MAX_SWITCH_LATENCY_S:
+        return 0.0
+    return mhps * max(0.0, 1.0 - (switch_latency_s / 2.0) / job_interval_s)
+
+
+def _measure(sched: SliceScheduler, batch_nonces: int, min_seconds: float) -> Tuple[float, float]:
+    # Repeat the batch, sliced like the live loop, until min_seconds have
+    # elapsed; returns (MH/s, mean slice seconds).
+    gen = JobGeneration()
+    hashes = 0
+    slices = 0
+    batches = 0
+    t0 = time.perf_counter()
+    while True:
+        res = sched.scan(_HEADER76, _MISS_TARGET, (batches * batch_nonces) & 0xFFFFFFFF, batch_nonces, gen)
+        hashes += res.hashes
+        slices += res.slices
+        batches += 1
+        dt = time.perf_counter() - t0
+        if dt >= min_seconds:
+            return (hashes / dt) / 1e6, dt / max(1, slices)
+
+
+def autotune(
+    backends: Optional[Sequence[str]] = None,
+    batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+    worker_counts: Optional[Sequence[int]] = None,
+    min_seconds: float = 0.5,
+    job_interval_s: float = JOB_INTERVAL_S,
+    slice_latency_s: float = DEFAULT_TARGET_LATENCY_S,
+) -> Tuple[TuneProfile, Tuple[TuneTrial, ...]]:
+    """
+    Benchmark every (backend, batch size, worker count) and return the best
+    profile for this machine along with all trials.
+
+    Pool spawn and JIT warm-up happen before timing. Batches are scanned
+    through a SliceScheduler at `slice_latency_s` (the miner's --slice-ms),
+    so switch latency is measured per slice and does not rule out large
+    batches.
+    """
+    names = list(backends) if backends is not None else available_backends()
+    workers_grid = list(worker_counts) if worker_counts is not None else default_worker_counts()
+
+    trials: List[TuneTrial] = []
+    for name in names:
+        for w in workers_grid:
+            with ParallelScanner(workers=w, prefer=name) as scanner:  # type: ignore[arg-type]
+                # one scheduler per scanner: its slice size has settled by the larger batches
+                sched = SliceScheduler(scanner, target_latency_s=slice_latency_s)
+                for batch in sorted(batch_sizes):
+                    mhps, latency = _measure(sched, int(batch), min_seconds)
+                    trials.append(TuneTrial(
+                        backend=name,
+                        batch_nonces=int(batch),
+                        workers=int(w),
+                        mhps=mhps,
+                        switch_latency_s=latency,
+                        score=score(mhps, latency, job_interval_s),
+                    ))
+
+    if not trials:
+        raise RuntimeError("autotune: no backend to benchmark")
+    best = max(trials, key=lambda t: t.score)
+    profile = TuneProfile(
+        fingerprint=machine_fingerprint(),
+        backend=best.backend,
+        batch_nonces=best.batch_nonces,
+        workers=best.workers,
+        mhps=best.mhps,
+        switch_latency_s=best.switch_latency_s,
+        tuned_at=time.time(),
+    )
+    return profile, tuple(trials)
+
+
+def _read_store(path: Path) -> Dict[str, dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_profile(profile: TuneProfile, path: Optional[str] = None) -> Path:
+    """Store the profile under its fingerprint; one file can hold a whole fleet's profiles."""
+    p = Path(path) if path else DEFAULT_PROFILE_PATH
+    store = _read_store(p)
+    store[profile.fingerprint] = asdict(profile)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(store, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return p
+
+
+def load_profile(path: Optional[str] = None, fingerprint: Optional[str] = None) -> Optional[TuneProfile]:
+    """Profile for this machine (or `fingerprint`), or None if it was never tuned."""
+    store = _read_store(Path(path) if path else DEFAULT_PROFILE_PATH)
+    raw = store.get(fingerprint or machine_fingerprint())
+    if not isinstance(raw, dict):
+        return None
+    try:
+        return TuneProfile(**raw)
+    except TypeError:
+        return None
@@ -5,7 +5,10 @@ import sys
 
 from .config import PRESET_TESTNET4_BRAIINS
 from .hashing import sha256d
-from .miner import connect_and_handshake, run_live
+from .miner import run_live
+from .protocol import DEFAULT_VERSION_ROLLING_MASK
+from .scan_auto import backend_names, warmup_backends
+from .session import StratumSession
 from .stratum import StratumMsg
 
 
@@ -14,12 +17,40 @@ def main(argv: list[str] | None = None) -> int:
 
     p.add_argument("--echo", action="store_true", help="Print sample Stratum message and exit.")
     p.add_argument("--selftest", action="store_true", help="Run a tiny local hash self-test and exit.")
-    p.add_argument("--handshake", action="store_true", help="Connect + do subscribe/authorize, then exit.")
+    p.add_argument("--handshake", action="store_true",
+                   help="Connect + do subscribe/authorize and print the result, then exit (with --live: keep mining on that connection).")
+    p.add_argument("--proxy", action="store_true",
+                   help="Serve local miners over one upstream session (--host/--port/--user), "
+                        "validating their shares before forwarding; runs until Ctrl-C.")
+    p.add_argument("--listen", default="127.0.0.1:3334", metavar="HOST:PORT",
+                   help="Proxy listener address (default 127.0.0.1:3334).")
+    p.add_argument("--proxy-prefix-bytes", type=int, default=1,
+                   help="Upstream extranonce2 bytes reserved per local miner (default 1: up to 256 miners).")
+    p.add_argument("--warmup", action="store_true",
+                   help="Compile the scan kernels into the Numba on-disk cache and exit (run once after install).")
 
     p.add_argument("--live", action="store_true", help="Run live loop: wait for diff+notify, scan, submit.")
+    p.add_argument("--async", dest="use_async", action="store_true",
+                   help="With --live: mine on the asyncio client (one reader task owns the socket, scans run "
+                        "in an executor thread; no slicing or ntime/version rolling).")
     p.add_argument("--max-shares", type=int, default=1, help="Stop after this many accepted shares (default 1).")
     p.add_argument("--nonce-start", type=int, default=0, help="Start nonce for each bounded scan.")
-    p.add_argument("--nonce-count", type=int, default=100_000, help="How many nonces to scan per job.")
+    p.add_argument("--nonce-count", type=int, default=None,
+                   help="How many nonces to scan per job (default: autotune profile, else 100000).")
+    p.add_argument("--workers", type=int, default=None,
+                   help="Scan processes; each job's nonce range is split across them (default: autotune profile, else 1).")
+    p.add_argument("--backend", default=None, choices=backend_names(),
+                   help="Scan backend, e.g. numba-midstate or python-midstate (default: autotune profile, else numba-midstate).")
+    p.add_argument("--slice-ms", type=float, default=50.0,
+                   help="Target scan slice length; the socket is polled and new jobs preempt between slices (default 50).")
+    p.add_argument("--version-rolling", action="store_true",
+                   help="Negotiate BIP310 version rolling (mining.configure) and roll version bits once a job's nonce space is used up.")
+    p.add_argument("--ntime-roll", type=int, default=0, metavar="SEC",
+                   help="Roll ntime up to SEC seconds past the job's once its nonce space is used up (default 0: off).")
+    p.add_argument("--autotune", action="store_true",
+                   help="Benchmark backends x batch sizes x worker counts, save this machine's best profile, and exit.")
+    p.add_argument("--autotune-profile", default=None,
+                   help="Autotune profile store (default ~/.cache/vireon-miner/autotune.json).")
 
     # NEW: experiment controls + artifact output
     p.add_argument("--mode", choices=["baseline", "vireon"], default="baseline",
@@ -47,23 +78,100 @@ def main(argv: list[str] | None = None) -> int:
         print(sha256d(b"\x00" * 80).hex())
         return 0
 
+    if args.autotune:
+        from .autotune import autotune, save_profile
+
+        profile, trials = autotune(slice_latency_s=args.slice_ms / 1000.0)
+        for t in trials:
+            print(f"[TUNE] {t.backend:<16} batch={t.batch_nonces:<8} workers={t.workers:<3} "
+                  f"mh/s={t.mhps:8.3f} switch={t.switch_latency_s * 1000:8.1f}ms score={t.score:8.3f}")
+        path = save_profile(profile, args.autotune_profile)
+        print(f"[TUNE] best: backend={profile.backend} batch={profile.batch_nonces} workers={profile.workers} "
+              f"-> {path} (machine {profile.fingerprint})")
+        return 0
+
+    if args.warmup:
+        for name, sec in warmup_backends().items():
+            print(f"[WARMUP] {name}: {sec:.2f}s")
+        return 0
+
     host, port = (args.host, args.port)
     if args.testnet4_braiins:
         host, port = PRESET_TESTNET4_BRAIINS
 
+    session = StratumSession(
+        host,
+        port,
+        args.user,
+        args.password,
+        timeout_s=args.timeout,
+        agent="vireon/0.1",
+        version_rolling_mask=DEFAULT_VERSION_ROLLING_MASK if args.version_rolling else None,
+    )
+
+    if args.proxy:
+        # asyncio only when proxying: keeps it off the CLI's import path
+        import asyncio
+
+        from .proxy import run_proxy
+
+        listen_host, _, listen_port = args.listen.rpartition(":")
+        try:
+            asyncio.run(run_proxy(
+                host,
+                port,
+                args.user,
+                args.password,
+                listen_host=listen_host or "127.0.0.1",
+                listen_port=int(listen_port),
+                prefix_bytes=args.proxy_prefix_bytes,
+                timeout_s=args.timeout,
+                version_rolling_mask=DEFAULT_VERSION_ROLLING_MASK if args.version_rolling else None,
+                out_path=args.out,
+            ))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
     if args.handshake:
-        res = connect_and_handshake(
-            host=host,
-            port=port,
-            username=args.user,
-            password=args.password,
+        res = session.connect()
+        print({
+            "authorized": res.authorized,
+            "extranonce1": res.subscribe.extranonce1,
+            "extranonce2_size": res.subscribe.extranonce2_size,
+            "version_mask": f"{res.version_mask:08x}",
+            "early_messages": len(res.early_messages),
+        })
+        if not args.live:
+            session.close()
+            return 0
+
+    if args.live and args.use_async:
+        # asyncio only when asked for: keeps it off the CLI's import path
+        import asyncio
+
+        from .aio_client import run_live_async
+
+        session.close()  # the asyncio client opens (and handshakes) its own connection
+        asyncio.run(run_live_async(
+            host,
+            port,
+            args.user,
+            args.password,
             timeout_s=args.timeout,
-            agent="vireon/0.1",
-        )
-        print({"subscribe_id": res.subscribe_reply.get("id"), "authorize_result": res.authorize_reply.get("result")})
+            nonce_count=args.nonce_count,
+            max_shares=args.max_shares,
+            duration_sec=args.duration_sec,
+            out_path=args.out,
+            workers=args.workers,
+            backend=args.backend,
+            autotune_path=args.autotune_profile,
+            version_rolling_mask=DEFAULT_VERSION_ROLLING_MASK if args.version_rolling else None,
+        ))
         return 0
 
     if args.live:
+        # --handshake --live: run_live mines on the handshaken session, no reconnect
         return run_live(
             host=host,
             port=port,
@@ -77,9 +185,16 @@ def main(argv: list[str] | None = None) -> int:
             mode=args.mode,                 # NEW
             duration_sec=args.duration_sec, # NEW
             out_path=args.out,              # NEW
+            workers=args.workers,
+            backend=args.backend,
+            autotune_path=args.autotune_profile,
+            slice_latency_s=args.slice_ms / 1000.0,
+            version_rolling=args.version_rolling,
+            ntime_roll_sec=args.ntime_roll,
+            session=session,
         )
 
-    print("Nothing to do. Try --handshake or --live.")
+    print("Nothing to do. Try --handshake, --live or --proxy.")
     return 2
 
 
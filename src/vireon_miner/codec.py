@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Union
+
+try:  # optional: pip install orjson (part of the `fast` extra)
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    _orjson = None
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    # compact JSON, no trailing newline
+    dumps: Callable[[Any], bytes]
+    # bytes / str -> object; malformed input raises ValueError
+    loads: Callable[[Union[bytes, bytearray, str]], Any]
+
+
+def _std_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+STDLIB = Codec("json", _std_dumps, json.loads)
+
+if _orjson is not None:
+    def _orjson_dumps(obj: Any) -> bytes:
+        try:
+            return _orjson.dumps(obj)
+        except TypeError:
+            # orjson refuses ints beyond 64 bits and a few exotic types
+            return _std_dumps(obj)
+
+    ORJSON: Optional[Codec] = Codec("orjson", _orjson_dumps, _orjson.loads)
+else:
+    ORJSON = None
+
+CODECS: Dict[str, Codec] = {c.name: c for c in (STDLIB, ORJSON) if c is not None}
+
+# Active codec: the fastest installed one, unless VIREON_JSON names another.
+_active: Codec = CODECS.get(os.environ.get("VIREON_JSON", ""), ORJSON or STDLIB)
+
+
+def active() -> Codec:
+    return _active
+
+
+def set_codec(name: str) -> Codec:
+    """Switch the process-wide codec ("json" or "orjson"); returns the previous one."""
+    global _active
+    if name not in CODECS:
+        raise ValueError(f"unknown or unavailable JSON codec: {name!r} (have {sorted(CODECS)})")
+    prev, _active = _active, CODECS[name]
+    return prev
+
+
+def dumps_line(obj: Any) -> bytes:
+    """One newline-terminated JSON-RPC line."""
+    return _active.dumps(obj) + b"\n"
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    return _active.loads(data)
+
+
+def _quoted(s: str) -> str:
+    # JSON string literal (escaped)
+    return json.dumps(s)
+
+
+# Quoted job ids kept per template; a pool has only a handful live at a time.
+_JOB_CACHE_MAX = 256
+
+
+class SubmitTemplate:
+    """
+    mining.submit line for one worker, pre-serialized: only the id, job id,
+    extranonce2, ntime, nonce (and BIP310 version bits) are spliced in, with
+    no dict / list building or JSON encoding per share.
+
+    The hex fields are spliced verbatim and must be plain hex strings (as the
+    miner produces them); job_id is escaped like any JSON string.
+    """
+
+    def __init__(self, username: str):
+        self.username = username
+        self._mid = ',"method":"mining.submit","params":[' + _quoted(username) + ","
+        self._jobs: Dict[str, str] = {}
+
+    def line(
+        self,
+        msg_id: int,
+        job_id: str,
+        extranonce2_hex: str,
+        ntime_hex: str,
+        nonce_hex: str,
+        version_bits_hex: Optional[str] = None,
+    ) -> bytes:
+        jq = self._jobs.get(job_id)
+        if jq is None:
+            if len(self._jobs) >= _JOB_CACHE_MAX:
+                self._jobs.clear()
+            jq = self._jobs[job_id] = _quoted(job_id)
+        if version_bits_hex is None:
+            return f'{{"id":{int(msg_id)}{self._mid}{jq},"{extranonce2_hex}","{ntime_hex}","{nonce_hex}"]}}\n'.encode()
+        return (
+            f'{{"id":{int(msg_id)}{self._mid}{jq},"{extranonce2_hex}","{ntime_hex}","{nonce_hex}",'
+            f'"{version_bits_hex}"]}}\n'
+        ).encode()
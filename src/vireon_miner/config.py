@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Union
 
 
 @dataclass(frozen=True)
@@ -12,5 +14,54 @@ class MinerConfig:
     timeout_s: float = 10.0
 
 
+@dataclass(frozen=True)
+class PoolSpec:
+    host: str
+    port: int
+    username: str
+    password: str = "x"
+    # shown in logs / metrics (default host:port)
+    name: str = ""
+
+    @property
+    def label(self) -> str:
+        return self.name or f"{self.host}:{self.port}"
+
+
 # Presets (no TLS here yet; this is raw TCP Stratum)
 PRESET_TESTNET4_BRAIINS = ("stratum.braiins.com", 3334)
+
+
+def load_toml(path: Union[str, Path]) -> Dict[str, Any]:
+    import tomllib  # only when a config file is read: keeps it off the CLI import path
+
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def pools_from_toml(data: Dict[str, Any]) -> List[PoolSpec]:
+    """
+    Pool set from a vireon.toml document, in failover order:
+      - [pool] is the primary
+      - each [[standby]] table is a hot standby (host / port, optional name,
+        username / password defaulting to [account])
+    """
+    account = data.get("account", {})
+    default_user = str(account.get("username", ""))
+    default_pass = str(account.get("password", "x"))
+
+    tables = ([data["pool"]] if "pool" in data else []) + list(data.get("standby", []))
+    pools: List[PoolSpec] = []
+    for t in tables:
+        if t.get("tls"):
+            raise ValueError(f"pool {t.get('host')}: TLS is not supported (raw TCP Stratum only)")
+        pools.append(PoolSpec(
+            host=str(t["host"]),
+            port=int(t["port"]),
+            username=str(t.get("username", default_user)),
+            password=str(t.get("password", default_pass)),
+            name=str(t.get("name", "")),
+        ))
+    if not pools:
+        raise ValueError("no [pool] configured")
+    return pools
@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from .config import PoolSpec
+from .live_client import LiveConfig, LiveStratumClient
+from .metrics import LatencyHistogram
+from .protocol import DEFAULT_VERSION_ROLLING_MASK
+from .session import StratumSession
+
+
+# Probe ids sit far above the submit ids (FIRST_SUBMIT_ID upward) sharing the connection.
+PROBE_FIRST_ID = 1 << 30
+
+# What a standby keeps (latest of each) to replay on activation, in replay order.
+_WARM_METHODS = ("mining.set_version_mask", "mining.set_difficulty", "mining.notify")
+
+# EWMA weight of the newest probe in PoolLink.rtt_ms
+_RTT_ALPHA = 0.25
+
+# Latency-based switches wait this long after the previous switch (no flapping).
+MIN_DWELL_SEC = 10.0
+
+RECONNECT_MAX_SEC = 30.0
+
+Sink = Callable[[Dict[str, Any]], None]
+
+
+@dataclass(frozen=True)
+class FailoverEvent:
+    at: float
+    from_pool: str
+    to_pool: str
+    # "start" | "down" (active connection lost) | "slow" (submit RTT over the limit)
+    reason: str
+    # losing (or deciding to leave) the old pool -> new pool's job installed
+    switch_ms: float
+
+
+class PoolLink:
+    """
+    One authorized connection to a pool, kept open as the active pool or as a
+    hot standby.
+
+    - connect() handshakes like the miner would (configure, suggest_difficulty)
+      and starts a reader thread
+    - the reader always keeps the latest set_difficulty / notify /
+      set_version_mask, active or not; activate() replays them into the
+      miner's handler, so a switch (also back to a pool used before) needs no
+      round trip
+    - probe() sends cfg.probe_method (mining.authorize: with the link's own
+      credentials) and times its reply (result or error) into rtt
+    - a read error marks the link dead and calls on_down(link)
+    """
+
+    def __init__(self, spec: PoolSpec, cfg: LiveConfig, on_down: Callable[["PoolLink"], None]):
+        self.spec = spec
+        self.cfg = cfg
+        self._on_down = on_down
+
+        self.session: Optional[StratumSession] = None
+        self.alive = False
+        self.last_error = ""
+        self.rtt = LatencyHistogram()
+        # smoothed probe RTT (ms); None until a probe was answered
+        self.rtt_ms: Optional[float] = None
+        self.connects = 0
+        self.drops = 0
+        self.probe_timeouts = 0
+        self.retry_at = 0.0
+        self.backoff = 1.0
+
+        self._lock = threading.Lock()
+        self._sink: Optional[Sink] = None
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._probe_ids = itertools.count(PROBE_FIRST_ID)
+        self._probes: Dict[int, float] = {}
+        self._closed = False
+
+    def connect(self) -> None:
+        cfg = self.cfg
+        session = StratumSession(
+            self.spec.host, self.spec.port, self.spec.username, self.spec.password,
+            timeout_s=cfg.timeout, agent="vireon-live/0.1",
+            version_rolling_mask=DEFAULT_VERSION_ROLLING_MASK if cfg.version_rolling else None,
+        )
+        res = session.connect()
+        try:
+            if not res.authorized:
+                raise RuntimeError("authorize failed (result != true)")
+            if cfg.suggest_difficulty is not None:
+                session.send({"id": 3, "method": "mining.suggest_difficulty", "params": [float(cfg.suggest_difficulty)]})
+        except BaseException:
+            session.close()
+            raise
+
+        with self._lock:
+            self.session = session
+            self._latest = {}
+            self._probes.clear()
+            for msg in session.take_early_messages():
+                self._keep(msg)
+            self.alive = True
+            self.connects += 1
+            self.backoff = 1.0
+        th = threading.Thread(target=self._read_loop, args=(session,), name=f"pool-{self.spec.label}", daemon=True)
+        th.start()
+
+    def close(self) -> None:
+        self._closed = True
+        self.alive = False
+        if self.session is not None:
+            self.session.close()
+
+    def activate(self, sink: Sink) -> None:
+        """Feed every message to `sink` from now on, starting with the kept difficulty / job."""
+        with self._lock:
+            self._sink = sink
+            for method in _WARM_METHODS:
+                msg = self._latest.get(method)
+                if msg is not None:
+                    sink(msg)
+
+    def deactivate(self) -> None:
+        with self._lock:
+            self._sink = None
+
+    def probe(self) -> None:
+        session = self.session
+        if not self.alive or session is None:
+            return
+        now = time.monotonic()
+        pid = next(self._probe_ids)
+        with self._lock:
+            cutoff = now - self.cfg.timeout
+            lost = [i for i, t in self._probes.items() if t < cutoff]
+            for i in lost:
+                del self._probes[i]
+            self.probe_timeouts += len(lost)
+            self._probes[pid] = now
+        try:
+            method = self.cfg.probe_method
+            params = [self.spec.username, self.spec.password] if method == "mining.authorize" else []
+            session.send({"id": pid, "method": method, "params": params})
+        except OSError:
+            pass  # the reader reports the drop
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pool": self.spec.label,
+            "alive": self.alive,
+            "connects": self.connects,
+            "drops": self.drops,
+            "rtt_ms": self.rtt_ms,
+            "probe_rtt": self.rtt.to_dict(),
+            "probe_timeouts": self.probe_timeouts,
+            "last_error": self.last_error,
+        }
+
+    def _keep(self, msg: Dict[str, Any]) -> None:
+        method = msg.get("method")
+        if method in _WARM_METHODS:
+            self._latest[method] = msg
+
+    def _read_loop(self, session: StratumSession) -> None:
+        reader = session.reader
+        assert reader is not None
+        try:
+            while True:
+                try:
+                    msgs = reader.read_many()
+                except (socket.timeout, TimeoutError):
+                    continue
+                now = time.monotonic()
+                with self._lock:
+                    for msg in msgs:
+                        msg_id = msg.get("id")
+                        if type(msg_id) is int and msg_id >= PROBE_FIRST_ID:
+                            sent = self._probes.pop(msg_id, None)
+                            if sent is not None:
+                                self._observe(now - sent)
+                        else:
+                            self._keep(msg)
+                            if self._sink is not None:
+                                self._sink(msg)
+        except Exception as e:
+            if self._closed or session is not self.session:
+                return
+            self.alive = False
+            self.drops += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            session.close()
+            self._on_down(self)
+
+    def _observe(self, seconds: float) -> None:
+        self.rtt.observe(seconds)
+        ms = seconds * 1000.0
+        self.rtt_ms = ms if self.rtt_ms is None else self.rtt_ms + _RTT_ALPHA * (ms - self.rtt_ms)
+
+
+class FailoverManager:
+    """
+    Hot-standby failover for one LiveStratumClient over a pool set.
+
+    - start() connects and authorizes every pool in parallel and activates the
+      first one up, in config order; a monitor thread then keeps the set alive
+    - the active pool's reader failing suspends hashing at once and wakes the
+      monitor, which attaches the live standby with the lowest probe RTT (then
+      config order) and replays its latest difficulty / job: no connect or
+      handshake on the switch path
+    - cfg.max_submit_rtt_ms: an active pool whose recent submit RTT (or oldest
+      unanswered submit) exceeds it is left for a standby probing faster
+    - every standby is probed each cfg.probe_interval (the active pool is
+      timed by its submit replies instead); dead ones reconnect in the
+      background (backoff 1 s doubling to 30 s) and rejoin as standbys
+    """
+
+    def __init__(self, client: LiveStratumClient, pools: Sequence[PoolSpec], min_dwell_sec: float = MIN_DWELL_SEC):
+        self.client = client
+        self.cfg = client.cfg
+        self.min_dwell_sec = float(min_dwell_sec)
+        self.links = [PoolLink(p, self.cfg, self._link_down) for p in pools]
+        self.active: Optional[PoolLink] = None
+        self.events: List[FailoverEvent] = []
+        self.switch_time = LatencyHistogram()
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._down_at: Optional[float] = None
+        self._switched_at = 0.0
+        self._connecting: Set[int] = set()
+        self._monitor: Optional[threading.Thread] = None
+        client.failover = self
+
+    def start(self) -> None:
+        ths = [threading.Thread(target=self._try_connect, args=(i,), daemon=True) for i in range(len(self.links))]
+        for i, th in enumerate(ths):
+            self._connecting.add(i)
+            th.start()
+        for th in ths:
+            th.join()
+        with self._lock:
+            first = next((l for l in self.links if l.alive), None)
+            if first is not None:
+                self._switch(first, "start")
+        self._monitor = threading.Thread(target=self._run, name="failover", daemon=True)
+        self._monitor.start()
+
+    def wait_active(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.active is None and not self._stop.is_set():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return self.active is not None
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._monitor is not None:
+            self._monitor.join()
+        for link in self.links:
+            link.close()
+
+    def to_dict(self) -> Dict[str, Any]:
+        active = self.active
+        return {
+            "active": active.spec.label if active is not None else None,
+            "failovers": sum(1 for e in self.events if e.reason != "start"),
+            "switch": self.switch_time.to_dict(),
+            "events": [asdict(e) for e in self.events],
+            "pools": [l.to_dict() for l in self.links],
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.client.metrics(), "failover": self.to_dict()}
+
+    def write_metrics(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.metrics(), f, indent=2, sort_keys=True)
+
+    def log_stats(self) -> None:
+        """One [POOLS] line (called from the client's stats tick); refreshes cfg.metrics_out."""
+        active = self.active
+        pools = " ".join(
+            f"{l.spec.label}:{'up' if l.alive else 'down'}/{l.rtt_ms:.0f}ms" if l.rtt_ms is not None
+            else f"{l.spec.label}:{'up' if l.alive else 'down'}"
+            for l in self.links
+        )
+        print(
+            f"[POOLS] active={active.spec.label if active is not None else '-'} "
+            f"failovers={sum(1 for e in self.events if e.reason != 'start')} "
+            f"downtime={self.client.hash_downtime_sec:.3f}s {pools}"
+        )
+        if self.cfg.metrics_out:
+            self.write_metrics(self.cfg.metrics_out)
+
+    def _try_connect(self, i: int) -> None:
+        link = self.links[i]
+        try:
+            link.connect()
+            print(f"[NET] pool {link.spec.label} authorized")
+        except Exception as e:
+            link.last_error = f"{type(e).__name__}: {e}"
+            link.retry_at = time.monotonic() + link.backoff
+            link.backoff = min(RECONNECT_MAX_SEC, link.backoff * 2.0)
+            print(f"[ERR] pool {link.spec.label}: {link.last_error}")
+        finally:
+            self._connecting.discard(i)
+            self._wake.set()
+
+    def _link_down(self, link: PoolLink) -> None:
+        print(f"[NET] pool {link.spec.label} lost: {link.last_error}")
+        with self._lock:
+            if link is self.active:
+                self._down_at = time.monotonic()
+                self.client.suspend()
+        self._wake.set()
+        link.retry_at = time.monotonic() + link.backoff
+
+    def _best(self, exclude: Optional[PoolLink], faster_than_ms: Optional[float] = None) -> Optional[PoolLink]:
+        ranked = sorted(
+            (l.rtt_ms if l.rtt_ms is not None else float("inf"), i)
+            for i, l in enumerate(self.links)
+            if l.alive and l is not exclude
+            and (faster_than_ms is None or (l.rtt_ms is not None and l.rtt_ms < faster_than_ms))
+        )
+        return self.links[ranked[0][1]] if ranked else None
+
+    def _slow(self, now: float) -> bool:
+        limit = self.cfg.max_submit_rtt_ms
+        if limit <= 0 or now - self._switched_at < self.min_dwell_sec:
+            return False
+        submits = self.client.submits
+        return max(submits.recent_rtt_ms, submits.oldest_age() * 1000.0) > limit
+
+    def _switch(self, to: PoolLink, reason: str) -> None:
+        # caller holds self._lock
+        assert to.session is not None
+        prev = self.active
+        if prev is not None:
+            prev.deactivate()
+        self.client.attach(to.session)
+        self.active = to
+        to.activate(self.client._handle_message)
+
+        now = time.monotonic()
+        switch_ms = 0.0
+        if reason != "start":
+            t0 = self._down_at if self._down_at is not None else now
+            self.switch_time.observe(now - t0)
+            switch_ms = (now - t0) * 1000.0
+        self._down_at = None
+        self._switched_at = now
+        ev = FailoverEvent(time.time(), prev.spec.label if prev is not None else "", to.spec.label, reason, switch_ms)
+        self.events.append(ev)
+        print(f"[FAILOVER] {ev.from_pool or '-'} -> {ev.to_pool} ({reason}) in {switch_ms:.1f} ms")
+
+    def _run(self) -> None:
+        next_probe = 0.0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                active = self.active
+                if active is None or not active.alive:
+                    best = self._best(exclude=active)
+                    if best is not None:
+                        self._switch(best, "down")
+                    elif active is not None:
+                        active.deactivate()
+                        self.active = None
+                elif self._slow(now):
+                    best = self._best(exclude=active, faster_than_ms=self.cfg.max_submit_rtt_ms)
+                    if best is not None:
+                        self._down_at = now
+                        self._switch(best, "slow")
+
+            for i, link in enumerate(self.links):
+                if not link.alive and i not in self._connecting and now >= link.retry_at:
+                    self._connecting.add(i)
+                    threading.Thread(target=self._try_connect, args=(i,), daemon=True).start()
+
+            if now >= next_probe:
+                for link in self.links:
+                    if link is not self.active:
+                        link.probe()
+                next_probe = now + max(0.01, self.cfg.probe_interval)
+
+            self._wake.wait(max(0.0, next_probe - time.monotonic()))
+            self._wake.clear()
+
+
+def run_failover(cfg: LiveConfig) -> None:
+    """run_live() with cfg.standby pools: one client, hashing moves between pools."""
+    pools = [PoolSpec(cfg.host, cfg.port, cfg.username, cfg.password), *cfg.standby]
+    c = LiveStratumClient(cfg)
+    # compile / pool spawn while connecting, not after the first job arrives
+    warm_th = threading.Thread(target=c.scanner.start, name="scan-warmup", daemon=True)
+    warm_th.start()
+    mgr = FailoverManager(c, pools)
+    try:
+        mgr.start()
+        while not mgr.wait_active(timeout=1.0):
+            pass
+        warm_th.join()
+        c.run_mining_loop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        c.stop_evt.set()
+        mgr.close()
+        c.close()
+        if cfg.metrics_out:
+            mgr.write_metrics(cfg.metrics_out)
@@ -1,14 +1,20 @@
 from __future__ import annotations
 
-from typing import Optional
+import threading
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from .hashing import SHA256_H0
 
 _HAS_NUMBA = False
 np = None
 njit = None
+prange = range
+get_num_threads = None
 
 try:
     import numpy as np  # type: ignore
-    from numba import njit  # type: ignore
+    from numba import get_num_threads, njit, prange  # type: ignore
 
     _HAS_NUMBA = True
 except Exception:
@@ -19,235 +25,700 @@ def available() -> bool:
     return _HAS_NUMBA
 
 
-# ---------- Pure-python helpers (safe even without numba) ----------
+@dataclass(frozen=True)
+class CandidateStats:
+    """
+    Work done by the Numba kernels in this process since the last reset.
 
-_SHA256_K = (
-    0x428A2F98, 0x71374491, 0xB5C0FBCF, 0xE9B5DBA5, 0x3956C25B, 0x59F111F1, 0x923F82A4, 0xAB1C5ED5,
-    0xD807AA98, 0x12835B01, 0x243185BE, 0x550C7DC3, 0x72BE5D74, 0x80DEB1FE, 0x9BDC06A7, 0xC19BF174,
-    0xE49B69C1, 0xEFBE4786, 0x0FC19DC6, 0x240CA1CC, 0x2DE92C6F, 0x4A7484AA, 0x5CB0A9DC, 0x76F988DA,
-    0x983E5152, 0xA831C66D, 0xB00327C8, 0xBF597FC7, 0xC6E00BF3, 0xD5A79147, 0x06CA6351, 0x14292967,
-    0x27B70A85, 0x2E1B2138, 0x4D2C6DFC, 0x53380D13, 0x650A7354, 0x766A0ABB, 0x81C2C92E, 0x92722C85,
-    0xA2BFE8A1, 0xA81A664B, 0xC24B8B70, 0xC76C51A3, 0xD192E819, 0xD6990624, 0xF40E3585, 0x106AA070,
-    0x19A4C116, 0x1E376C08, 0x2748774C, 0x34B0BCB5, 0x391C0CB3, 0x4ED8AA4A, 0x5B9CCA4F, 0x682E6FF3,
-    0x748F82EE, 0x78A5636F, 0x84C87814, 0x8CC70208, 0x90BEFFFA, 0xA4506CEB, 0xBEF9A3F7, 0xC67178F2,
-)
-
-_SHA256_H0 = (
-    0x6A09E667,
-    0xBB67AE85,
-    0x3C6EF372,
-    0xA54FF53A,
-    0x510E527F,
-    0x9B05688C,
-    0x1F83D9AB,
-    0x5BE0CD19,
-)
-
-
-def _target_int_to_be_u8(target_int: int) -> "np.ndarray":
-    # target is a 256-bit integer; represent as big-endian bytes
-    b = int(target_int).to_bytes(32, "big", signed=False)
-    return np.frombuffer(b, dtype=np.uint8).copy()
+    - hashes: nonces hashed
+    - candidates: nonces whose most significant hash word passed the H7 check
+      and therefore went through the full 256-bit compare
+    - shares: candidates that met the full target
+    """
+    hashes: int
+    candidates: int
+    shares: int
 
+    @property
+    def candidate_rate(self) -> float:
+        return (self.candidates / self.hashes) if self.hashes else 0.0
 
-# ---------- Numba-compiled SHA256d(midstate) scanner ----------
 
-def _define_numba_impl():
-    # Define compiled functions only if numba is available
-    global find_share_bounded_numba
+_stats_lock = threading.Lock()
+_stats = [0, 0, 0]  # hashes, candidates, shares
 
-    if not _HAS_NUMBA:
-        def find_share_bounded_numba(*args, **kwargs):  # type: ignore
-            return None
-        return
 
-    import numpy as _np  # type: ignore
+def candidate_stats() -> CandidateStats:
+    with _stats_lock:
+        return CandidateStats(hashes=_stats[0], candidates=_stats[1], shares=_stats[2])
 
-    @njit(cache=True)
-    def _rotr(x: int, n: int) -> int:
-        return ((x >> n) | (x << (32 - n))) & 0xFFFFFFFF
 
-    @njit(cache=True)
-    def _ch(x: int, y: int, z: int) -> int:
-        return (x & y) ^ ((~x) & z)
+def reset_candidate_stats() -> None:
+    with _stats_lock:
+        _stats[:] = [0, 0, 0]
 
-    @njit(cache=True)
-    def _maj(x: int, y: int, z: int) -> int:
-        return (x & y) ^ (x & z) ^ (y & z)
 
-    @njit(cache=True)
-    def _bsig0(x: int) -> int:
-        return _rotr(x, 2) ^ _rotr(x, 13) ^ _rotr(x, 22)
+def _record(counts: "np.ndarray", found: bool) -> None:
+    tot = counts.sum(axis=0)
+    with _stats_lock:
+        _stats[0] += int(tot[0])
+        _stats[1] += int(tot[1])
+        _stats[2] += int(found)
+
+
+# ---------- Pure-python helpers (safe even without numba) ----------
+
+def _target_int_to_be_u32(target_int: int) -> "np.ndarray":
+    # target is a 256-bit integer; represent as 8 big-endian 32-bit words (most significant first)
+    b = int(target_int).to_bytes(32, "big", signed=False)
+    return np.frombuffer(b, dtype=">u4").astype(np.uint32)
+
+
+# ---------- Numba-compiled SHA256d(midstate) scanner ----------
+
+# Parallel kernel: blocks per Numba thread (load balance vs. per-block setup),
+# and how many nonces a block scans between checks for a lower block's hit.
+_PARALLEL_BLOCKS_PER_THREAD = 4
+_PARALLEL_POLL = 1 << 14
+
+
+# Kernels are defined at module level, not inside a factory function: Numba's
+# on-disk cache misses for closures that call other closures, so every process
+# start used to recompile the whole scanner.
+if _HAS_NUMBA:
+    from numba import uint32 as _u32  # type: ignore
+
+    # The hot path keeps every SHA-256 word in a uint32 scalar: no arrays are
+    # allocated per nonce, the message schedule rolls through w0..w15, and the
+    # 64 rounds are written out so LLVM sees straight-line code.
 
     @njit(cache=True)
-    def _bsig1(x: int) -> int:
-        return _rotr(x, 6) ^ _rotr(x, 11) ^ _rotr(x, 25)
+    def _rotr(x, n):
+        return _u32((x >> n) | (x << (32 - n)))
 
     @njit(cache=True)
-    def _ssig0(x: int) -> int:
+    def _ssig0(x):
         return _rotr(x, 7) ^ _rotr(x, 18) ^ (x >> 3)
 
     @njit(cache=True)
-    def _ssig1(x: int) -> int:
+    def _ssig1(x):
         return _rotr(x, 17) ^ _rotr(x, 19) ^ (x >> 10)
 
     @njit(cache=True)
-    def _load_u32_be(b0: int, b1: int, b2: int, b3: int) -> int:
-        return ((b0 << 24) | (b1 << 16) | (b2 << 8) | b3) & 0xFFFFFFFF
+    def _bswap32(x):
+        return _u32(((x & 0xFF) << 24) | ((x & 0xFF00) << 8) | ((x >> 8) & 0xFF00) | (x >> 24))
 
     @njit(cache=True)
-    def _compress(state: _np.ndarray, block64: _np.ndarray) -> None:
-        W = _np.zeros(64, dtype=_np.uint32)
-
-        for i in range(16):
-            j = 4 * i
-            W[i] = _load_u32_be(int(block64[j]), int(block64[j + 1]), int(block64[j + 2]), int(block64[j + 3]))
-
-        for i in range(16, 64):
-            W[i] = (W[i - 16] + _ssig0(int(W[i - 15])) + W[i - 7] + _ssig1(int(W[i - 2]))) & 0xFFFFFFFF
-
-        a = int(state[0]); b = int(state[1]); c = int(state[2]); d = int(state[3])
-        e = int(state[4]); f = int(state[5]); g = int(state[6]); h = int(state[7])
-
-        for i in range(64):
-            t1 = (h + _bsig1(e) + _ch(e, f, g) + _SHA256_K[i] + int(W[i])) & 0xFFFFFFFF
-            t2 = (_bsig0(a) + _maj(a, b, c)) & 0xFFFFFFFF
-            h = g
-            g = f
-            f = e
-            e = (d + t1) & 0xFFFFFFFF
-            d = c
-            c = b
-            b = a
-            a = (t1 + t2) & 0xFFFFFFFF
-
-        state[0] = (int(state[0]) + a) & 0xFFFFFFFF
-        state[1] = (int(state[1]) + b) & 0xFFFFFFFF
-        state[2] = (int(state[2]) + c) & 0xFFFFFFFF
-        state[3] = (int(state[3]) + d) & 0xFFFFFFFF
-        state[4] = (int(state[4]) + e) & 0xFFFFFFFF
-        state[5] = (int(state[5]) + f) & 0xFFFFFFFF
-        state[6] = (int(state[6]) + g) & 0xFFFFFFFF
-        state[7] = (int(state[7]) + h) & 0xFFFFFFFF
+    def _round(a, b, c, d, e, f, g, h, kw):
+        # one SHA-256 round; returns (new d, new h) - the caller rotates names instead of values
+        t1 = _u32(h + (_rotr(e, 6) ^ _rotr(e, 11) ^ _rotr(e, 25)) + ((e & f) ^ (~e & g)) + kw)
+        t2 = _u32((_rotr(a, 2) ^ _rotr(a, 13) ^ _rotr(a, 22)) + ((a & b) ^ (a & c) ^ (b & c)))
+        return _u32(d + t1), _u32(t1 + t2)
+
+    @njit(cache=True, inline="always")
+    def _compress(s, w0, w1, w2, w3, w4, w5, w6, w7, w8, w9, w10, w11, w12, w13, w14, w15):
+        a = s[0]; b = s[1]; c = s[2]; d = s[3]
+        e = s[4]; f = s[5]; g = s[6]; h = s[7]
+
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x428A2F98 + w0))
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x71374491 + w1))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0xB5C0FBCF + w2))
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0xE9B5DBA5 + w3))
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x3956C25B + w4))
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x59F111F1 + w5))
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x923F82A4 + w6))
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0xAB1C5ED5 + w7))
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0xD807AA98 + w8))
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x12835B01 + w9))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x243185BE + w10))
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x550C7DC3 + w11))
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x72BE5D74 + w12))
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x80DEB1FE + w13))
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x9BDC06A7 + w14))
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0xC19BF174 + w15))
+        w0 = _u32(w0 + _ssig0(w1) + w9 + _ssig1(w14))
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0xE49B69C1 + w0))
+        w1 = _u32(w1 + _ssig0(w2) + w10 + _ssig1(w15))
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0xEFBE4786 + w1))
+        w2 = _u32(w2 + _ssig0(w3) + w11 + _ssig1(w0))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x0FC19DC6 + w2))
+        w3 = _u32(w3 + _ssig0(w4) + w12 + _ssig1(w1))
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x240CA1CC + w3))
+        w4 = _u32(w4 + _ssig0(w5) + w13 + _ssig1(w2))
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x2DE92C6F + w4))
+        w5 = _u32(w5 + _ssig0(w6) + w14 + _ssig1(w3))
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x4A7484AA + w5))
+        w6 = _u32(w6 + _ssig0(w7) + w15 + _ssig1(w4))
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x5CB0A9DC + w6))
+        w7 = _u32(w7 + _ssig0(w8) + w0 + _ssig1(w5))
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x76F988DA + w7))
+        w8 = _u32(w8 + _ssig0(w9) + w1 + _ssig1(w6))
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x983E5152 + w8))
+        w9 = _u32(w9 + _ssig0(w10) + w2 + _ssig1(w7))
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0xA831C66D + w9))
+        w10 = _u32(w10 + _ssig0(w11) + w3 + _ssig1(w8))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0xB00327C8 + w10))
+        w11 = _u32(w11 + _ssig0(w12) + w4 + _ssig1(w9))
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0xBF597FC7 + w11))
+        w12 = _u32(w12 + _ssig0(w13) + w5 + _ssig1(w10))
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0xC6E00BF3 + w12))
+        w13 = _u32(w13 + _ssig0(w14) + w6 + _ssig1(w11))
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0xD5A79147 + w13))
+        w14 = _u32(w14 + _ssig0(w15) + w7 + _ssig1(w12))
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x06CA6351 + w14))
+        w15 = _u32(w15 + _ssig0(w0) + w8 + _ssig1(w13))
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x14292967 + w15))
+        w0 = _u32(w0 + _ssig0(w1) + w9 + _ssig1(w14))
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x27B70A85 + w0))
+        w1 = _u32(w1 + _ssig0(w2) + w10 + _ssig1(w15))
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x2E1B2138 + w1))
+        w2 = _u32(w2 + _ssig0(w3) + w11 + _ssig1(w0))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x4D2C6DFC + w2))
+        w3 = _u32(w3 + _ssig0(w4) + w12 + _ssig1(w1))
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x53380D13 + w3))
+        w4 = _u32(w4 + _ssig0(w5) + w13 + _ssig1(w2))
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x650A7354 + w4))
+        w5 = _u32(w5 + _ssig0(w6) + w14 + _ssig1(w3))
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x766A0ABB + w5))
+        w6 = _u32(w6 + _ssig0(w7) + w15 + _ssig1(w4))
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x81C2C92E + w6))
+        w7 = _u32(w7 + _ssig0(w8) + w0 + _ssig1(w5))
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x92722C85 + w7))
+        w8 = _u32(w8 + _ssig0(w9) + w1 + _ssig1(w6))
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0xA2BFE8A1 + w8))
+        w9 = _u32(w9 + _ssig0(w10) + w2 + _ssig1(w7))
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0xA81A664B + w9))
+        w10 = _u32(w10 + _ssig0(w11) + w3 + _ssig1(w8))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0xC24B8B70 + w10))
+        w11 = _u32(w11 + _ssig0(w12) + w4 + _ssig1(w9))
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0xC76C51A3 + w11))
+        w12 = _u32(w12 + _ssig0(w13) + w5 + _ssig1(w10))
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0xD192E819 + w12))
+        w13 = _u32(w13 + _ssig0(w14) + w6 + _ssig1(w11))
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0xD6990624 + w13))
+        w14 = _u32(w14 + _ssig0(w15) + w7 + _ssig1(w12))
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0xF40E3585 + w14))
+        w15 = _u32(w15 + _ssig0(w0) + w8 + _ssig1(w13))
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x106AA070 + w15))
+        w0 = _u32(w0 + _ssig0(w1) + w9 + _ssig1(w14))
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x19A4C116 + w0))
+        w1 = _u32(w1 + _ssig0(w2) + w10 + _ssig1(w15))
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x1E376C08 + w1))
+        w2 = _u32(w2 + _ssig0(w3) + w11 + _ssig1(w0))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x2748774C + w2))
+        w3 = _u32(w3 + _ssig0(w4) + w12 + _ssig1(w1))
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x34B0BCB5 + w3))
+        w4 = _u32(w4 + _ssig0(w5) + w13 + _ssig1(w2))
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x391C0CB3 + w4))
+        w5 = _u32(w5 + _ssig0(w6) + w14 + _ssig1(w3))
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x4ED8AA4A + w5))
+        w6 = _u32(w6 + _ssig0(w7) + w15 + _ssig1(w4))
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x5B9CCA4F + w6))
+        w7 = _u32(w7 + _ssig0(w8) + w0 + _ssig1(w5))
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x682E6FF3 + w7))
+        w8 = _u32(w8 + _ssig0(w9) + w1 + _ssig1(w6))
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x748F82EE + w8))
+        w9 = _u32(w9 + _ssig0(w10) + w2 + _ssig1(w7))
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x78A5636F + w9))
+        w10 = _u32(w10 + _ssig0(w11) + w3 + _ssig1(w8))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x84C87814 + w10))
+        w11 = _u32(w11 + _ssig0(w12) + w4 + _ssig1(w9))
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x8CC70208 + w11))
+        w12 = _u32(w12 + _ssig0(w13) + w5 + _ssig1(w10))
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x90BEFFFA + w12))
+        w13 = _u32(w13 + _ssig0(w14) + w6 + _ssig1(w11))
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0xA4506CEB + w13))
+        w14 = _u32(w14 + _ssig0(w15) + w7 + _ssig1(w12))
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0xBEF9A3F7 + w14))
+        w15 = _u32(w15 + _ssig0(w0) + w8 + _ssig1(w13))
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0xC67178F2 + w15))
+
+        return (
+            _u32(s[0] + a), _u32(s[1] + b), _u32(s[2] + c), _u32(s[3] + d),
+            _u32(s[4] + e), _u32(s[5] + f), _u32(s[6] + g), _u32(s[7] + h),
+        )
+
+    _H0 = tuple(np.uint32(x) for x in SHA256_H0)
 
     @njit(cache=True)
-    def _sha256_midstate(block0: _np.ndarray) -> _np.ndarray:
-        st = _np.array(_SHA256_H0, dtype=_np.uint32)
-        _compress(st, block0)
-        return st
+    def _load_u32_be(b: np.ndarray, i: int):
+        return _u32((_u32(b[i]) << 24) | (_u32(b[i + 1]) << 16) | (_u32(b[i + 2]) << 8) | _u32(b[i + 3]))
 
     @njit(cache=True)
-    def _sha256_finish_from_state(state_after_block0: _np.ndarray, block1: _np.ndarray, out32: _np.ndarray) -> None:
-        st = state_after_block0.copy()
-        _compress(st, block1)
-        # digest big-endian bytes
-        for i in range(8):
-            w = int(st[i])
-            out32[4 * i + 0] = (w >> 24) & 0xFF
-            out32[4 * i + 1] = (w >> 16) & 0xFF
-            out32[4 * i + 2] = (w >> 8) & 0xFF
-            out32[4 * i + 3] = w & 0xFF
+    def _midstate_of_header(header76_u8: np.ndarray):
+        # SHA-256 state after block0 = first 64 bytes of header
+        w = np.empty(16, dtype=np.uint32)
+        for i in range(16):
+            w[i] = _load_u32_be(header76_u8, 4 * i)
+        return _compress(
+            _H0, w[0], w[1], w[2], w[3], w[4], w[5], w[6], w[7],
+            w[8], w[9], w[10], w[11], w[12], w[13], w[14], w[15],
+        )
 
     @njit(cache=True)
-    def _sha256_one_block(msg: _np.ndarray, msg_len: int, out32: _np.ndarray) -> None:
-        # build padded 64-byte block
-        block = _np.zeros(64, dtype=_np.uint8)
-        for i in range(msg_len):
-            block[i] = msg[i]
-        block[msg_len] = 0x80
-
-        bitlen = msg_len * 8
-        # 64-bit big-endian length at end
-        block[63] = bitlen & 0xFF
-        block[62] = (bitlen >> 8) & 0xFF
-        block[61] = (bitlen >> 16) & 0xFF
-        block[60] = (bitlen >> 24) & 0xFF
-        # upper 4 bytes are zero for msg_len <= 55
-
-        st = _np.array(_SHA256_H0, dtype=_np.uint32)
-        _compress(st, block)
-
+    def _hash_leq_target_bitcoin(d0, d1, d2, d3, d4, d5, d6, d7, target_words: np.ndarray) -> bool:
+        # Bitcoin compares the digest as a little-endian uint256, so its most
+        # significant word is the byte-swapped last state word.
+        d = (d7, d6, d5, d4, d3, d2, d1, d0)
         for i in range(8):
-            w = int(st[i])
-            out32[4 * i + 0] = (w >> 24) & 0xFF
-            out32[4 * i + 1] = (w >> 16) & 0xFF
-            out32[4 * i + 2] = (w >> 8) & 0xFF
-            out32[4 * i + 3] = w & 0xFF
-
-    @njit(cache=True)
-    def _hash_leq_target_bitcoin(hash32_be: _np.ndarray, target32_be: _np.ndarray) -> bool:
-        # Bitcoin compares uint256 little-endian values.
-        # Equivalent: compare reversed digest bytes (big-endian) to target big-endian.
-        for i in range(32):
-            hb = int(hash32_be[31 - i])  # reverse
-            tb = int(target32_be[i])
-            if hb < tb:
+            hw = _bswap32(d[i])
+            tw = target_words[i]
+            if hw < tw:
                 return True
-            if hb > tb:
+            if hw > tw:
                 return False
         return True
 
     @njit(cache=True)
-    def _find_nonce_midstate(header76_u8: _np.ndarray, start_nonce: int, count: int, target32_be: _np.ndarray) -> int:
-        # block0 = first 64 bytes of header
-        block0 = _np.empty(64, dtype=_np.uint8)
-        for i in range(64):
-            block0[i] = header76_u8[i]
-        mid = _sha256_midstate(block0)
-
-        # Build constant part of block1 (second block for an 80-byte message)
-        # block1[0:12] = header76[64:76]
-        # block1[12:16] = nonce (little-endian)
-        # block1[16] = 0x80
-        # block1[56:64] = bitlen=640 big-endian => ... 0x02 0x80
-        block1 = _np.zeros(64, dtype=_np.uint8)
-        for i in range(12):
-            block1[i] = header76_u8[64 + i]
-        block1[16] = 0x80
-        block1[62] = 0x02
-        block1[63] = 0x80
-
-        h1 = _np.empty(32, dtype=_np.uint8)
-        h2 = _np.empty(32, dtype=_np.uint8)
-
-        nonce = start_nonce & 0xFFFFFFFF
-        for _ in range(count):
-            block1[12] = nonce & 0xFF
-            block1[13] = (nonce >> 8) & 0xFF
-            block1[14] = (nonce >> 16) & 0xFF
-            block1[15] = (nonce >> 24) & 0xFF
-
-            _sha256_finish_from_state(mid, block1, h1)
-            _sha256_one_block(h1, 32, h2)
-
-            if _hash_leq_target_bitcoin(h2, target32_be):
-                return nonce
-
-            nonce = (nonce + 1) & 0xFFFFFFFF
-
+    def _block1_precompute(mid, m0, m1, m2):
+        # Everything in block1 that does not depend on the nonce, once per header76:
+        # rounds 0..2 (W0..W2 are the merkle tail, ntime and nbits), round 3 minus
+        # its W3 (= the nonce) term, and the schedule words W16..W19 minus their
+        # nonce terms. Returns (a..h after round 3 without W3, W16, W17, p18, p19).
+        a = mid[0]; b = mid[1]; c = mid[2]; d = mid[3]
+        e = mid[4]; f = mid[5]; g = mid[6]; h = mid[7]
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x428A2F98 + m0))
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x71374491 + m1))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0xB5C0FBCF + m2))
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0xE9B5DBA5))
+        # W[i] = s1(W[i-2]) + W[i-7] + s0(W[i-15]) + W[i-16]; W9..W14 are zero padding
+        w16 = _u32(_ssig0(m1) + m0)
+        w17 = _u32(0x01100000 + _ssig0(m2) + m1)  # s1(W15 = 640)
+        p18 = _u32(_ssig1(w16) + m2)  # + s0(W3)
+        p19 = _u32(_ssig1(w17) + 0x11002000)  # s0(W4 = 0x80000000); + W3
+        return (a, b, c, d, e, f, g, h, w16, w17, p18, p19)
+
+    @njit(cache=True, inline="always")
+    def _block1_tail(mid, pre, w3):
+        # Rounds 3..63 of block1 for one nonce (w3 = the nonce as a big-endian
+        # word). W4..W15 are the fixed padding, so rounds 4..15 add constants.
+        a = _u32(pre[0] + w3); b = pre[1]; c = pre[2]; d = pre[3]
+        e = _u32(pre[4] + w3); f = pre[5]; g = pre[6]; h = pre[7]
+
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0xB956C25B))
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x59F111F1))
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x923F82A4))
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0xAB1C5ED5))
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0xD807AA98))
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x12835B01))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x243185BE))
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x550C7DC3))
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x72BE5D74))
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x80DEB1FE))
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x9BDC06A7))
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0xC19BF3F4))
+        w0 = pre[8]
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0xE49B69C1 + w0))
+        w1 = pre[9]
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0xEFBE4786 + w1))
+        w2 = _u32(pre[10] + _ssig0(w3))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x0FC19DC6 + w2))
+        w3 = _u32(pre[11] + w3)
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x240CA1CC + w3))
+        w4 = _u32(_ssig1(w2) + 0x80000000)
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x2DE92C6F + w4))
+        w5 = _ssig1(w3)
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x4A7484AA + w5))
+        w6 = _u32(_ssig1(w4) + 0x00000280)
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x5CB0A9DC + w6))
+        w7 = _u32(_ssig1(w5) + w0)
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x76F988DA + w7))
+        w8 = _u32(_ssig1(w6) + w1)
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x983E5152 + w8))
+        w9 = _u32(_ssig1(w7) + w2)
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0xA831C66D + w9))
+        w10 = _u32(_ssig1(w8) + w3)
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0xB00327C8 + w10))
+        w11 = _u32(_ssig1(w9) + w4)
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0xBF597FC7 + w11))
+        w12 = _u32(_ssig1(w10) + w5)
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0xC6E00BF3 + w12))
+        w13 = _u32(_ssig1(w11) + w6)
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0xD5A79147 + w13))
+        w14 = _u32(_ssig1(w12) + w7 + 0x00A00055)
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x06CA6351 + w14))
+        w15 = _u32(_ssig1(w13) + w8 + _ssig0(w0) + 0x00000280)
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x14292967 + w15))
+        w0 = _u32(_ssig1(w14) + w9 + _ssig0(w1) + w0)
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x27B70A85 + w0))
+        w1 = _u32(_ssig1(w15) + w10 + _ssig0(w2) + w1)
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x2E1B2138 + w1))
+        w2 = _u32(_ssig1(w0) + w11 + _ssig0(w3) + w2)
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x4D2C6DFC + w2))
+        w3 = _u32(_ssig1(w1) + w12 + _ssig0(w4) + w3)
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x53380D13 + w3))
+        w4 = _u32(_ssig1(w2) + w13 + _ssig0(w5) + w4)
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x650A7354 + w4))
+        w5 = _u32(_ssig1(w3) + w14 + _ssig0(w6) + w5)
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x766A0ABB + w5))
+        w6 = _u32(_ssig1(w4) + w15 + _ssig0(w7) + w6)
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x81C2C92E + w6))
+        w7 = _u32(_ssig1(w5) + w0 + _ssig0(w8) + w7)
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x92722C85 + w7))
+        w8 = _u32(_ssig1(w6) + w1 + _ssig0(w9) + w8)
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0xA2BFE8A1 + w8))
+        w9 = _u32(_ssig1(w7) + w2 + _ssig0(w10) + w9)
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0xA81A664B + w9))
+        w10 = _u32(_ssig1(w8) + w3 + _ssig0(w11) + w10)
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0xC24B8B70 + w10))
+        w11 = _u32(_ssig1(w9) + w4 + _ssig0(w12) + w11)
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0xC76C51A3 + w11))
+        w12 = _u32(_ssig1(w10) + w5 + _ssig0(w13) + w12)
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0xD192E819 + w12))
+        w13 = _u32(_ssig1(w11) + w6 + _ssig0(w14) + w13)
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0xD6990624 + w13))
+        w14 = _u32(_ssig1(w12) + w7 + _ssig0(w15) + w14)
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0xF40E3585 + w14))
+        w15 = _u32(_ssig1(w13) + w8 + _ssig0(w0) + w15)
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x106AA070 + w15))
+        w0 = _u32(_ssig1(w14) + w9 + _ssig0(w1) + w0)
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x19A4C116 + w0))
+        w1 = _u32(_ssig1(w15) + w10 + _ssig0(w2) + w1)
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x1E376C08 + w1))
+        w2 = _u32(_ssig1(w0) + w11 + _ssig0(w3) + w2)
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x2748774C + w2))
+        w3 = _u32(_ssig1(w1) + w12 + _ssig0(w4) + w3)
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x34B0BCB5 + w3))
+        w4 = _u32(_ssig1(w2) + w13 + _ssig0(w5) + w4)
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x391C0CB3 + w4))
+        w5 = _u32(_ssig1(w3) + w14 + _ssig0(w6) + w5)
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x4ED8AA4A + w5))
+        w6 = _u32(_ssig1(w4) + w15 + _ssig0(w7) + w6)
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x5B9CCA4F + w6))
+        w7 = _u32(_ssig1(w5) + w0 + _ssig0(w8) + w7)
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x682E6FF3 + w7))
+        w8 = _u32(_ssig1(w6) + w1 + _ssig0(w9) + w8)
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x748F82EE + w8))
+        w9 = _u32(_ssig1(w7) + w2 + _ssig0(w10) + w9)
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x78A5636F + w9))
+        w10 = _u32(_ssig1(w8) + w3 + _ssig0(w11) + w10)
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x84C87814 + w10))
+        w11 = _u32(_ssig1(w9) + w4 + _ssig0(w12) + w11)
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x8CC70208 + w11))
+        w12 = _u32(_ssig1(w10) + w5 + _ssig0(w13) + w12)
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x90BEFFFA + w12))
+        w13 = _u32(_ssig1(w11) + w6 + _ssig0(w14) + w13)
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0xA4506CEB + w13))
+        w14 = _u32(_ssig1(w12) + w7 + _ssig0(w15) + w14)
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0xBEF9A3F7 + w14))
+        w15 = _u32(_ssig1(w13) + w8 + _ssig0(w0) + w15)
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0xC67178F2 + w15))
+
+        return (
+            _u32(mid[0] + a), _u32(mid[1] + b), _u32(mid[2] + c), _u32(mid[3] + d),
+            _u32(mid[4] + e), _u32(mid[5] + f), _u32(mid[6] + g), _u32(mid[7] + h),
+        )
+
+    @njit(cache=True, inline="always")
+    def _digest_rounds_0_60(h1):
+        # SHA-256 of a 32-byte message up to and including round 60: W8..W15 are
+        # fixed padding (bitlen 256), folded into the round constants and
+        # schedule terms below. Returns (a..h, w0..w15).
+        w0 = h1[0]; w1 = h1[1]; w2 = h1[2]; w3 = h1[3]
+        w4 = h1[4]; w5 = h1[5]; w6 = h1[6]; w7 = h1[7]
+        a = _H0[0]; b = _H0[1]; c = _H0[2]; d = _H0[3]
+        e = _H0[4]; f = _H0[5]; g = _H0[6]; h = _H0[7]
+
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x428A2F98 + w0))
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x71374491 + w1))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0xB5C0FBCF + w2))
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0xE9B5DBA5 + w3))
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x3956C25B + w4))
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x59F111F1 + w5))
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x923F82A4 + w6))
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0xAB1C5ED5 + w7))
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x5807AA98))
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x12835B01))
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x243185BE))
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x550C7DC3))
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x72BE5D74))
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x80DEB1FE))
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x9BDC06A7))
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0xC19BF274))
+        w0 = _u32(_ssig0(w1) + w0)
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0xE49B69C1 + w0))
+        w1 = _u32(_ssig0(w2) + w1 + 0x00A00000)
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0xEFBE4786 + w1))
+        w2 = _u32(_ssig1(w0) + _ssig0(w3) + w2)
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x0FC19DC6 + w2))
+        w3 = _u32(_ssig1(w1) + _ssig0(w4) + w3)
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x240CA1CC + w3))
+        w4 = _u32(_ssig1(w2) + _ssig0(w5) + w4)
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x2DE92C6F + w4))
+        w5 = _u32(_ssig1(w3) + _ssig0(w6) + w5)
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x4A7484AA + w5))
+        w6 = _u32(_ssig1(w4) + _ssig0(w7) + w6 + 0x00000100)
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x5CB0A9DC + w6))
+        w7 = _u32(_ssig1(w5) + w0 + w7 + 0x11002000)
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x76F988DA + w7))
+        w8 = _u32(_ssig1(w6) + w1 + 0x80000000)
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x983E5152 + w8))
+        w9 = _u32(_ssig1(w7) + w2)
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0xA831C66D + w9))
+        w10 = _u32(_ssig1(w8) + w3)
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0xB00327C8 + w10))
+        w11 = _u32(_ssig1(w9) + w4)
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0xBF597FC7 + w11))
+        w12 = _u32(_ssig1(w10) + w5)
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0xC6E00BF3 + w12))
+        w13 = _u32(_ssig1(w11) + w6)
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0xD5A79147 + w13))
+        w14 = _u32(_ssig1(w12) + w7 + 0x00400022)
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x06CA6351 + w14))
+        w15 = _u32(_ssig1(w13) + w8 + _ssig0(w0) + 0x00000100)
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x14292967 + w15))
+        w0 = _u32(_ssig1(w14) + w9 + _ssig0(w1) + w0)
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x27B70A85 + w0))
+        w1 = _u32(_ssig1(w15) + w10 + _ssig0(w2) + w1)
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x2E1B2138 + w1))
+        w2 = _u32(_ssig1(w0) + w11 + _ssig0(w3) + w2)
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x4D2C6DFC + w2))
+        w3 = _u32(_ssig1(w1) + w12 + _ssig0(w4) + w3)
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x53380D13 + w3))
+        w4 = _u32(_ssig1(w2) + w13 + _ssig0(w5) + w4)
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x650A7354 + w4))
+        w5 = _u32(_ssig1(w3) + w14 + _ssig0(w6) + w5)
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x766A0ABB + w5))
+        w6 = _u32(_ssig1(w4) + w15 + _ssig0(w7) + w6)
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x81C2C92E + w6))
+        w7 = _u32(_ssig1(w5) + w0 + _ssig0(w8) + w7)
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x92722C85 + w7))
+        w8 = _u32(_ssig1(w6) + w1 + _ssig0(w9) + w8)
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0xA2BFE8A1 + w8))
+        w9 = _u32(_ssig1(w7) + w2 + _ssig0(w10) + w9)
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0xA81A664B + w9))
+        w10 = _u32(_ssig1(w8) + w3 + _ssig0(w11) + w10)
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0xC24B8B70 + w10))
+        w11 = _u32(_ssig1(w9) + w4 + _ssig0(w12) + w11)
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0xC76C51A3 + w11))
+        w12 = _u32(_ssig1(w10) + w5 + _ssig0(w13) + w12)
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0xD192E819 + w12))
+        w13 = _u32(_ssig1(w11) + w6 + _ssig0(w14) + w13)
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0xD6990624 + w13))
+        w14 = _u32(_ssig1(w12) + w7 + _ssig0(w15) + w14)
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0xF40E3585 + w14))
+        w15 = _u32(_ssig1(w13) + w8 + _ssig0(w0) + w15)
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x106AA070 + w15))
+        w0 = _u32(_ssig1(w14) + w9 + _ssig0(w1) + w0)
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x19A4C116 + w0))
+        w1 = _u32(_ssig1(w15) + w10 + _ssig0(w2) + w1)
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x1E376C08 + w1))
+        w2 = _u32(_ssig1(w0) + w11 + _ssig0(w3) + w2)
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x2748774C + w2))
+        w3 = _u32(_ssig1(w1) + w12 + _ssig0(w4) + w3)
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x34B0BCB5 + w3))
+        w4 = _u32(_ssig1(w2) + w13 + _ssig0(w5) + w4)
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x391C0CB3 + w4))
+        w5 = _u32(_ssig1(w3) + w14 + _ssig0(w6) + w5)
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0x4ED8AA4A + w5))
+        w6 = _u32(_ssig1(w4) + w15 + _ssig0(w7) + w6)
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0x5B9CCA4F + w6))
+        w7 = _u32(_ssig1(w5) + w0 + _ssig0(w8) + w7)
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0x682E6FF3 + w7))
+        w8 = _u32(_ssig1(w6) + w1 + _ssig0(w9) + w8)
+        d, h = _round(a, b, c, d, e, f, g, h, _u32(0x748F82EE + w8))
+        w9 = _u32(_ssig1(w7) + w2 + _ssig0(w10) + w9)
+        c, g = _round(h, a, b, c, d, e, f, g, _u32(0x78A5636F + w9))
+        w10 = _u32(_ssig1(w8) + w3 + _ssig0(w11) + w10)
+        b, f = _round(g, h, a, b, c, d, e, f, _u32(0x84C87814 + w10))
+        w11 = _u32(_ssig1(w9) + w4 + _ssig0(w12) + w11)
+        a, e = _round(f, g, h, a, b, c, d, e, _u32(0x8CC70208 + w11))
+        w12 = _u32(_ssig1(w10) + w5 + _ssig0(w13) + w12)
+        h, d = _round(e, f, g, h, a, b, c, d, _u32(0x90BEFFFA + w12))
+
+        return (
+            a, b, c, d, e, f, g, h,
+            w0, w1, w2, w3, w4, w5, w6, w7, w8, w9, w10, w11, w12, w13, w14, w15,
+        )
+
+    @njit(cache=True, inline="always")
+    def _sha256_of_digest(h1):
+        r = _digest_rounds_0_60(h1)
+        a = r[0]; b = r[1]; c = r[2]; d = r[3]
+        e = r[4]; f = r[5]; g = r[6]; h = r[7]
+        w0 = r[8]; w6 = r[14]; w7 = r[15]; w8 = r[16]
+        w11 = r[19]; w12 = r[20]; w13 = r[21]; w14 = r[22]; w15 = r[23]
+
+        w13 = _u32(_ssig1(w11) + w6 + _ssig0(w14) + w13)
+        g, c = _round(d, e, f, g, h, a, b, c, _u32(0xA4506CEB + w13))
+        w14 = _u32(_ssig1(w12) + w7 + _ssig0(w15) + w14)
+        f, b = _round(c, d, e, f, g, h, a, b, _u32(0xBEF9A3F7 + w14))
+        w15 = _u32(_ssig1(w13) + w8 + _ssig0(w0) + w15)
+        e, a = _round(b, c, d, e, f, g, h, a, _u32(0xC67178F2 + w15))
+
+        return (
+            _u32(_H0[0] + a), _u32(_H0[1] + b), _u32(_H0[2] + c), _u32(_H0[3] + d),
+            _u32(_H0[4] + e), _u32(_H0[5] + f), _u32(_H0[6] + g), _u32(_H0[7] + h),
+        )
+
+    @njit(cache=True, inline="always")
+    def _sha256d_block1(mid, pre, nonce):
+        # block1 = header76[64:76] | nonce (LE) | 0x80 pad | zeros | bitlen 640,
+        # then the second SHA-256 over the 32-byte digest (one padded block).
+        return _sha256_of_digest(_block1_tail(mid, pre, _bswap32(nonce)))
+
+    @njit(cache=True, inline="always")
+    def _sha256d_block1_h7(mid, pre, nonce):
+        # Last state word only. Rounds 61..63 merely shift the round-60 "e" into
+        # the "h" slot, so they and their schedule words W61..W63 are skipped.
+        r = _digest_rounds_0_60(_block1_tail(mid, pre, _bswap32(nonce)))
+        return _u32(_H0[7] + r[7])
+
+    @njit(cache=True, nogil=True)
+    def _next_candidate(mid, pre, nonce, lo: int, hi: int, top_word) -> int:
+        # First offset in [lo, hi) whose most significant hash word is <= the
+        # target's, else -1. Kept free of the full compare: any call taking the
+        # digest inside this loop stops LLVM from keeping the rounds in registers.
+        # The nonce is carried as a wrapping uint32 rather than re-derived from
+        # the int64 offset, which is also several-fold slower.
+        for off in range(lo, hi):
+            if _bswap32(_sha256d_block1_h7(mid, pre, nonce)) <= top_word:
+                return off
+            nonce = _u32(nonce + 1)
         return -1
 
-    def find_share_bounded_numba(
-        header76: bytes,
-        target_int: int,
-        start_nonce: int,
-        count: int,
-    ) -> Optional[int]:
-        if not isinstance(header76, (bytes, bytearray)) or len(header76) != 76:
-            raise ValueError("header76 must be 76 bytes")
-        if count <= 0:
-            return None
+    @njit(cache=True, nogil=True)
+    def _scan_offsets(
+        mid, header76_u8: np.ndarray, start_nonce: int, lo: int, hi: int, target_words: np.ndarray,
+        counts: np.ndarray, slot: int,
+    ) -> int:
+        # Returns the first offset in [lo, hi) whose nonce meets target, else -1.
+        # counts[slot, 1] tallies candidates that needed the full 256-bit compare.
+        m0 = _load_u32_be(header76_u8, 64)
+        m1 = _load_u32_be(header76_u8, 68)
+        m2 = _load_u32_be(header76_u8, 72)
+        pre = _block1_precompute(mid, m0, m1, m2)
+        top_word = target_words[0]
+
+        pos = lo
+        while pos < hi:
+            off = _next_candidate(mid, pre, _u32((start_nonce + pos) & 0xFFFFFFFF), pos, hi, top_word)
+            if off < 0:
+                return -1
+            counts[slot, 1] += 1
+            h2 = _sha256d_block1(mid, pre, _u32((start_nonce + off) & 0xFFFFFFFF))
+            if _hash_leq_target_bitcoin(h2[0], h2[1], h2[2], h2[3], h2[4], h2[5], h2[6], h2[7], target_words):
+                return off
+            pos = off + 1
 
-        h = _np.frombuffer(bytes(header76), dtype=_np.uint8)
-        tgt = _target_int_to_be_u8(int(target_int))
-        n = _find_nonce_midstate(h, int(start_nonce) & 0xFFFFFFFF, int(count), tgt)
-        return None if int(n) < 0 else int(n)
+        return -1
 
-    # export
-    globals()["find_share_bounded_numba"] = find_share_bounded_numba
+    @njit(cache=True, nogil=True)
+    def _find_nonce_midstate(
+        header76_u8: np.ndarray, start_nonce: int, count: int, target_words: np.ndarray, counts: np.ndarray
+    ) -> int:
+        # counts: (1, 2) int64 accumulator of [nonces hashed, full-compare candidates]
+        mid = _midstate_of_header(header76_u8)
+        off = _scan_offsets(mid, header76_u8, start_nonce, 0, count, target_words, counts, 0)
+        if off < 0:
+            counts[0, 0] += count
+            return -1
+        counts[0, 0] += off + 1
+        return (start_nonce + off) & 0xFFFFFFFF
+
+    @njit(cache=True, parallel=True, nogil=True)
+    def _find_nonce_midstate_parallel(
+        header76_u8: np.ndarray, start_nonce: int, count: int, target_words: np.ndarray, nblocks: int,
+        counts: np.ndarray,
+    ) -> int:
+        # counts: (nblocks, 2) int64, one row per block so threads never share a slot
+        mid = _midstate_of_header(header76_u8)
+
+        # Contiguous blocks of the window, one prange iteration each. Every block
+        # records its own lowest hit; the answer is the hit of the lowest block,
+        # which is exactly what the serial kernel would return.
+        per = (count + nblocks - 1) // nblocks
+        hits = np.full(nblocks, -1, dtype=np.int64)
+
+        for b in prange(nblocks):
+            lo = b * per
+            hi = min(count, lo + per)
+            pos = lo
+            while pos < hi:
+                # Give up once a lower block has a hit; racy reads only delay the stop.
+                beaten = False
+                for j in range(b):
+                    if hits[j] >= 0:
+                        beaten = True
+                        break
+                if beaten:
+                    break
+
+                step_hi = min(hi, pos + _PARALLEL_POLL)
+                off = _scan_offsets(mid, header76_u8, start_nonce, pos, step_hi, target_words, counts, b)
+                if off >= 0:
+                    counts[b, 0] += off + 1 - pos
+                    hits[b] = off
+                    break
+                counts[b, 0] += step_hi - pos
+                pos = step_hi
+
+        for b in range(nblocks):
+            if hits[b] >= 0:
+                return (start_nonce + hits[b]) & 0xFFFFFFFF
+        return -1
 
 
-_define_numba_impl()
+    # ---------- batched header76 construction (extranonce2 rolling) ----------
+
+    @njit(cache=True, inline="always")
+    def _compress_at(s, b: np.ndarray, off: int):
+        return _compress(
+            s,
+            _load_u32_be(b, off), _load_u32_be(b, off + 4), _load_u32_be(b, off + 8), _load_u32_be(b, off + 12),
+            _load_u32_be(b, off + 16), _load_u32_be(b, off + 20), _load_u32_be(b, off + 24), _load_u32_be(b, off + 28),
+            _load_u32_be(b, off + 32), _load_u32_be(b, off + 36), _load_u32_be(b, off + 40), _load_u32_be(b, off + 44),
+            _load_u32_be(b, off + 48), _load_u32_be(b, off + 52), _load_u32_be(b, off + 56), _load_u32_be(b, off + 60),
+        )
+
+    @njit(cache=True, inline="always")
+    def _sha256_of_state(s):
+        # second SHA-256 of sha256d: one padded block over the 32-byte digest
+        z = _u32(0)
+        return _compress(_H0, s[0], s[1], s[2], s[3], s[4], s[5], s[6], s[7], _u32(0x80000000), z, z, z, z, z, z, _u32(256))
+
+    @njit(cache=True, nogil=True)
+    def _header76_rows(
+        head_u8: np.ndarray, tail_u8: np.ndarray, en2_off: int, en2_size: int, en2_start: np.uint64,
+        branch_words: np.ndarray, fixed_u8: np.ndarray, out: np.ndarray,
+    ) -> None:
+        # head_u8: whole 64-byte blocks of coinb1+extranonce1, hashed once per call.
+        # tail_u8: the rest of the coinbase, already SHA-padded, with extranonce2
+        #   at [en2_off, en2_off+en2_size); rewritten in place per row.
+        # out[i] = fixed_u8 with the merkle root for extranonce2 = en2_start+i
+        #   written byte-reversed into [36, 68), like JobTemplate.header76.
+        z = _u32(0)
+        pad = _u32(0x80000000)
+        s0 = _H0
+        for off in range(0, head_u8.shape[0], 64):
+            s0 = _compress_at(s0, head_u8, off)
+
+        buf = tail_u8.copy()
+        for i in range(out.shape[0]):
+            v = en2_start + np.uint64(i)
+            for k in range(en2_size):
+                buf[en2_off + en2_size - 1 - k] = (v >> np.uint64(8 * k)) & np.uint64(0xFF)
+
+            s = s0
+            for off in range(0, buf.shape[0], 64):
+                s = _compress_at(s, buf, off)
+            h = _sha256_of_state(s)
+
+            for j in range(branch_words.shape[0]):
+                bw = branch_words[j]
+                t = _compress(_H0, h[0], h[1], h[2], h[3], h[4], h[5], h[6], h[7],
+                              bw[0], bw[1], bw[2], bw[3], bw[4], bw[5], bw[6], bw[7])
+                t = _compress(t, pad, z, z, z, z, z, z, z, z, z, z, z, z, z, z, _u32(512))
+                h = _sha256_of_state(t)
+
+            for c in range(76):
+                out[i, c] = fixed_u8[c]
+            for k in range(8):
+                w = h[k]
+                out[i, 67 - 4 * k] = (w >> 24) & 0xFF
+                out[i, 66 - 4 * k] = (w >> 16) & 0xFF
+                out[i, 65 - 4 * k] = (w >> 8) & 0xFF
+                out[i, 64 - 4 * k] = w & 0xFF
 
 
 def find_share_bounded_numba(
@@ -256,5 +727,107 @@ def find_share_bounded_numba(
     start_nonce: int,
     count: int,
 ) -> Optional[int]:
-    # replaced by _define_numba_impl() when numba is available
-    return None
+    if not _HAS_NUMBA:
+        return None
+    if not isinstance(header76, (bytes, bytearray)) or len(header76) != 76:
+        raise ValueError("header76 must be 76 bytes")
+    if count <= 0:
+        return None
+
+    h = np.frombuffer(bytes(header76), dtype=np.uint8)
+    tgt = _target_int_to_be_u32(int(target_int))
+    counts = np.zeros((1, 2), dtype=np.int64)
+    n = _find_nonce_midstate(h, int(start_nonce) & 0xFFFFFFFF, int(count), tgt, counts)
+    _record(counts, int(n) >= 0)
+    return None if int(n) < 0 else int(n)
+
+
+def find_share_bounded_numba_parallel(
+    header76: bytes,
+    target_int: int,
+    start_nonce: int,
+    count: int,
+) -> Optional[int]:
+    """Same contract and result as find_share_bounded_numba, spread over Numba threads."""
+    if not _HAS_NUMBA:
+        return None
+    if not isinstance(header76, (bytes, bytearray)) or len(header76) != 76:
+        raise ValueError("header76 must be 76 bytes")
+    if count <= 0:
+        return None
+
+    h = np.frombuffer(bytes(header76), dtype=np.uint8)
+    tgt = _target_int_to_be_u32(int(target_int))
+    nblocks = max(1, min(int(count), get_num_threads() * _PARALLEL_BLOCKS_PER_THREAD))
+    counts = np.zeros((nblocks, 2), dtype=np.int64)
+    n = _find_nonce_midstate_parallel(h, int(start_nonce) & 0xFFFFFFFF, int(count), tgt, nblocks, counts)
+    _record(counts, int(n) >= 0)
+    return None if int(n) < 0 else int(n)
+
+
+def header76_rows_numba(
+    coinbase_prefix: bytes,
+    coinbase_suffix: bytes,
+    merkle_branch: Sequence[bytes],
+    fixed76: bytes,
+    en2_start: int,
+    count: int,
+    en2_size: int,
+) -> "np.ndarray":
+    """
+    (count, 76) uint8 array of header76s for extranonce2 = en2_start .. en2_start+count-1
+    (big-endian, en2_size bytes). fixed76 is the header76 with any merkle root:
+    bytes [36, 68) are overwritten per row. See JobTemplate.header76_batch.
+    """
+    if not _HAS_NUMBA:
+        raise RuntimeError("numba is not available")
+    if not 1 <= en2_size <= 8:
+        raise ValueError("en2_size must be 1..8")
+
+    full = len(coinbase_prefix) & ~63
+    msg_len = len(coinbase_prefix) + en2_size + len(coinbase_suffix)
+    tail = coinbase_prefix[full:] + bytes(en2_size) + coinbase_suffix + b"\x80"
+    tail += bytes(-(len(tail) + 8) % 64) + (8 * msg_len).to_bytes(8, "big")
+
+    out = np.empty((max(0, int(count)), 76), dtype=np.uint8)
+    branch = np.frombuffer(b"".join(merkle_branch), dtype=">u4").astype(np.uint32).reshape(len(merkle_branch), 8)
+    _header76_rows(
+        np.frombuffer(coinbase_prefix[:full], dtype=np.uint8),
+        np.frombuffer(tail, dtype=np.uint8),
+        len(coinbase_prefix) - full,
+        int(en2_size),
+        np.uint64(int(en2_start) & 0xFFFFFFFFFFFFFFFF),
+        branch,
+        np.frombuffer(fixed76, dtype=np.uint8),
+        out,
+    )
+    return out
+
+
+_ROWS_READY = threading.Event()
+_ROWS_LOCK = threading.Lock()
+_rows_thread: Optional[threading.Thread] = None
+
+
+def warm_header76_rows() -> None:
+    """Compile (or load from the on-disk cache) the header76 row kernel now; blocks."""
+    header76_rows_numba(b"\x00" * 4, b"\x00" * 4, [], bytes(76), 0, 1, 4)
+    _ROWS_READY.set()
+
+
+def header76_rows_ready() -> bool:
+    """
+    True once the header76 row kernel can run without JIT. The first call
+    starts warm_header76_rows() on a background thread, so a header build
+    never waits out a cold compile (the caller builds per header meanwhile).
+    """
+    global _rows_thread
+    if not _HAS_NUMBA:
+        return False
+    if _ROWS_READY.is_set():
+        return True
+    with _ROWS_LOCK:
+        if _rows_thread is None:
+            _rows_thread = threading.Thread(target=warm_header76_rows, name="header76-rows-jit", daemon=True)
+            _rows_thread.start()
+    return False
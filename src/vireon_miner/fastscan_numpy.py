@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from typing import List, Optional, Sequence
+
+from .hashing import SHA256_H0, SHA256_K
+
+_HAS_NUMPY = False
+np = None
+
+try:
+    import numpy as np  # type: ignore
+
+    _HAS_NUMPY = True
+except Exception:
+    _HAS_NUMPY = False
+
+
+def available() -> bool:
+    return _HAS_NUMPY
+
+
+# ---------- NumPy lane-parallel SHA256d(midstate) scanner ----------
+#
+# For hosts that have NumPy but no Numba (no LLVM). Every SHA-256 word is a
+# uint32 array holding one lane per nonce, so each Python-level operation
+# hashes a whole chunk of nonces at once. uint32 array arithmetic wraps mod
+# 2^32, which is exactly SHA-256's addition.
+
+# Nonces hashed per vectorized step: large enough to amortize the per-op
+# Python overhead, small enough that the ~40 live lane arrays stay in cache.
+DEFAULT_LANES = 1 << 14
+
+
+def _rotr(x: "np.ndarray", n: int) -> "np.ndarray":
+    return (x >> n) | (x << (32 - n))
+
+
+def _compress(state: Sequence["np.ndarray"], w: List["np.ndarray"]) -> List["np.ndarray"]:
+    # w: 16 message words (arrays, or scalars broadcast across lanes); consumed in place.
+    a, b, c, d, e, f, g, h = state
+    for i in range(64):
+        if i >= 16:
+            w15 = w[(i - 15) & 15]
+            w2 = w[(i - 2) & 15]
+            s0 = _rotr(w15, 7) ^ _rotr(w15, 18) ^ (w15 >> 3)
+            s1 = _rotr(w2, 17) ^ _rotr(w2, 19) ^ (w2 >> 10)
+            w[i & 15] = w[i & 15] + s0 + w[(i - 7) & 15] + s1
+        # Ch and Maj in their fewer-operation forms: every op is a pass over all lanes
+        t1 = h + (_rotr(e, 6) ^ _rotr(e, 11) ^ _rotr(e, 25)) + (g ^ (e & (f ^ g))) + _K[i] + w[i & 15]
+        t2 = (_rotr(a, 2) ^ _rotr(a, 13) ^ _rotr(a, 22)) + ((a & b) | (c & (a | b)))
+        h, g, f, e, d, c, b, a = g, f, e, d + t1, c, b, a, t1 + t2
+    return [s + x for s, x in zip(state, (a, b, c, d, e, f, g, h))]
+
+
+def _be_words(b: bytes) -> List["np.ndarray"]:
+    # one-lane arrays, so midstate math uses the same wrapping array arithmetic
+    return [np.array([x], dtype=np.uint32) for x in np.frombuffer(b, dtype=">u4")]
+
+
+if _HAS_NUMPY:
+    _K = np.array(SHA256_K, dtype=np.uint32)
+    _H0 = _be_words(b"".join(x.to_bytes(4, "big") for x in SHA256_H0))
+    _PAD = np.uint32(0x80000000)
+    _ZERO = np.uint32(0)
+
+
+def _sha256d_lanes(mid: List["np.ndarray"], m: List["np.ndarray"], nonces_be: "np.ndarray") -> List["np.ndarray"]:
+    # block1 = header76[64:76] | nonce | 0x80 pad | zeros | bitlen 640,
+    # then the second SHA-256 over the 32-byte digest (one padded block).
+    w = [m[0], m[1], m[2], nonces_be, _PAD] + [_ZERO] * 10 + [np.uint32(640)]
+    h1 = _compress(mid, w)
+    w = h1 + [_PAD] + [_ZERO] * 6 + [np.uint32(256)]
+    return _compress(_H0, w)
+
+
+def _leq_target(digest: List["np.ndarray"], target_words: "np.ndarray") -> "np.ndarray":
+    # Bitcoin compares the digest as a little-endian uint256: the most
+    # significant word is the byte-swapped last state word.
+    le = np.zeros(digest[0].shape, dtype=bool)
+    eq = np.ones(digest[0].shape, dtype=bool)
+    for i in range(8):
+        hw = digest[7 - i].byteswap()
+        tw = target_words[i]
+        le |= eq & (hw < tw)
+        eq &= hw == tw
+    return le | eq
+
+
+def find_share_bounded_numpy(
+    header76: bytes,
+    target_int: int,
+    start_nonce: int,
+    count: int,
+    lanes: int = DEFAULT_LANES,
+) -> Optional[int]:
+    """
+    Lowest nonce in [start_nonce, start_nonce+count) (mod 2^32) whose SHA256d
+    meets target_int, else None; same contract as find_share_bounded_numba.
+    """
+    if not _HAS_NUMPY:
+        return None
+    if not isinstance(header76, (bytes, bytearray)) or len(header76) != 76:
+        raise ValueError("header76 must be 76 bytes")
+    if count <= 0 or target_int < 0:
+        return None
+
+    header76 = bytes(header76)
+    mid = _compress(_H0, _be_words(header76[:64]))
+    m = _be_words(header76[64:76])
+    tgt = np.frombuffer(min(int(target_int), (1 << 256) - 1).to_bytes(32, "big"), dtype=">u4").astype(np.uint32)
+
+    start = int(start_nonce) & 0xFFFFFFFF
+    lanes = max(1, int(lanes))
+    done = 0
+    while done < count:
+        step = min(lanes, count - done)
+        # uint64 so the window can run past 2^32 before wrapping
+        nonces = ((start + done + np.arange(step, dtype=np.uint64)) & 0xFFFFFFFF).astype(np.uint32)
+        # the nonce sits little-endian in the header, so its big-endian message word is the byte swap
+        digest = _sha256d_lanes(mid, m, nonces.byteswap())
+
+        # Cheap reject on the most significant word; full compare on the survivors only.
+        cand = np.flatnonzero(digest[7].byteswap() <= tgt[0])
+        if cand.size:
+            hits = cand[_leq_target([d[cand] for d in digest], tgt)]
+            if hits.size:
+                return int(nonces[hits[0]])
+        done += step
+
+    return None
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import select
+import socket
+from typing import Any, Dict, List, Optional
+
+from .codec import loads
+
+# Initial receive buffer; grows (doubling) only for a line longer than this.
+DEFAULT_BUFSIZE = 1 << 16
+
+
+class JsonLineReader:
+    """
+    Newline-delimited JSON reader over a socket.
+
+    - recv_into() one reusable bytearray; consumed bytes are skipped with a
+      start offset instead of re-slicing the buffer, and the newline search
+      resumes where the last one stopped, so a burst of N messages costs O(N)
+      and a message split over many recvs is scanned once
+    - leftovers are kept across reads: extra lines from one recv are never
+      dropped
+    - blank lines (keep-alives) and CRLF endings are skipped / tolerated
+    """
+
+    def __init__(self, sock: socket.socket, bufsize: int = DEFAULT_BUFSIZE):
+        self.sock = sock
+        self._buf = bytearray(max(1, int(bufsize)))
+        # unconsumed data is _buf[_start:_end]; no newline in _buf[_start:_scan]
+        self._start = 0
+        self._end = 0
+        self._scan = 0
+
+    @property
+    def buffered(self) -> int:
+        """Bytes received but not yet returned as messages."""
+        return self._end - self._start
+
+    def _fill(self) -> int:
+        """One recv_into() at the end of the buffer; raises ConnectionError on EOF."""
+        if self._start == self._end:
+            self._start = self._end = self._scan = 0
+        elif self._end == len(self._buf):
+            n = self._end - self._start
+            if self._start:
+                # slide the partial line to the front (same size: no reallocation)
+                self._buf[:n] = self._buf[self._start:self._end]
+                self._scan -= self._start
+                self._start, self._end = 0, n
+            else:
+                # one line fills the whole buffer
+                self._buf.extend(bytes(len(self._buf)))
+        with memoryview(self._buf) as mv:
+            got = self.sock.recv_into(mv[self._end:])
+        if not got:
+            raise ConnectionError("socket closed")
+        self._end += got
+        return got
+
+    def _next_line(self) -> Optional[bytes]:
+        """Next complete line (without the newline), or None if none is buffered."""
+        i = self._buf.find(b"\n", self._scan, self._end)
+        if i < 0:
+            self._scan = self._end
+            return None
+        with memoryview(self._buf) as mv:
+            line = bytes(mv[self._start:i])
+        self._start = self._scan = i + 1
+        return line
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        while True:
+            line = self._next_line()
+            if line is None:
+                return out
+            line = line.strip()
+            if line:
+                out.append(loads(line))
+
+    def read_one(self) -> Dict[str, Any]:
+        """Next message, blocking (subject to the socket timeout) until one is complete."""
+        while True:
+            line = self._next_line()
+            if line is None:
+                self._fill()
+                continue
+            line = line.strip()
+            if line:
+                return loads(line)
+
+    def read_many(self) -> List[Dict[str, Any]]:
+        """
+        Every complete message buffered, after at most one blocking recv when
+        none is: one call per notify burst instead of one per message.
+        """
+        out = self._drain()
+        while not out:
+            self._fill()
+            out = self._drain()
+        return out
+
+    def read_available(self) -> List[Dict[str, Any]]:
+        """Every complete message already received or readable now; never blocks."""
+        while select.select([self.sock], [], [], 0)[0]:
+            self._fill()
+        return self._drain()
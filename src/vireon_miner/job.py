@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Sequence
+import hashlib
+from dataclasses import dataclass, field
+from typing import Optional, Sequence, Tuple
 import struct
 
 from .hashing import sha256d
@@ -91,6 +92,133 @@ def build_header_80(
     )
 
 
+@dataclass(frozen=True)
+class JobTemplate:
+    """
+    Everything in a mining.notify that is fixed for the job, decoded once.
+
+    Per extranonce2, header76() only concatenates bytes and hashes: no hex
+    decoding, no int parsing. Byte layout matches the live mining loops
+    (miner.run_live / LiveStratumClient): branches are hashed as sent, the
+    merkle root and prevhash are byte-reversed into the header.
+    """
+
+    job_id: str
+    # coinb1 + extranonce1: constant for the job
+    coinbase_prefix: bytes
+    # coinb2
+    coinbase_suffix: bytes
+    merkle_branch: Tuple[bytes, ...]
+    version_le: bytes
+    prevhash_le: bytes
+    ntime_le: bytes
+    nbits_le: bytes
+    # sha256 state after absorbing coinbase_prefix; cloned per extranonce2
+    _prefix_state: "hashlib._Hash" = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_prefix_state", hashlib.sha256(self.coinbase_prefix))
+
+    @staticmethod
+    def from_hex(
+        job_id: str,
+        prevhash_hex: str,
+        coinb1_hex: str,
+        coinb2_hex: str,
+        merkle_branch_hex: Sequence[str],
+        version_hex: str,
+        nbits_hex: str,
+        ntime_hex: str,
+        extranonce1_hex: str,
+    ) -> "JobTemplate":
+        if len(version_hex) != 8 or len(ntime_hex) != 8 or len(nbits_hex) != 8:
+            raise ValueError("version/ntime/nbits must be 8 hex chars each")
+        branch = tuple(bytes.fromhex(b) for b in merkle_branch_hex)
+        if any(len(b) != 32 for b in branch):
+            raise ValueError("merkle branch items must be 32 bytes")
+        return JobTemplate(
+            job_id=job_id,
+            coinbase_prefix=bytes.fromhex(coinb1_hex) + bytes.fromhex(extranonce1_hex),
+            coinbase_suffix=bytes.fromhex(coinb2_hex),
+            merkle_branch=branch,
+            version_le=_u32le_from_hex(version_hex),
+            prevhash_le=_le_bytes_from_hex_hash(prevhash_hex),
+            ntime_le=_u32le_from_hex(ntime_hex),
+            nbits_le=_u32le_from_hex(nbits_hex),
+        )
+
+    def merkle_root(self, extranonce2: bytes) -> bytes:
+        """sha256d merkle root (natural byte order) for this extranonce2."""
+        # only extranonce2 + coinb2 are hashed here; the prefix blocks were absorbed once
+        st = self._prefix_state.copy()
+        st.update(extranonce2)
+        st.update(self.coinbase_suffix)
+        h = hashlib.sha256(st.digest()).digest()
+        for br in self.merkle_branch:
+            h = sha256d(h + br)
+        return h
+
+    @property
+    def version(self) -> int:
+        return struct.unpack("<I", self.version_le)[0]
+
+    @property
+    def ntime(self) -> int:
+        return struct.unpack("<I", self.ntime_le)[0]
+
+    def header76(self, extranonce2: bytes, version: Optional[int] = None, ntime: Optional[int] = None) -> bytes:
+        """
+        version || prevhash || merkle root || ntime || nbits, all little-endian;
+        nonce excluded. `version` / `ntime` override the job's (version / ntime rolling).
+        """
+        ver = self.version_le if version is None else struct.pack("<I", version & 0xFFFFFFFF)
+        nt = self.ntime_le if ntime is None else struct.pack("<I", ntime & 0xFFFFFFFF)
+        return ver + self.prevhash_le + self.merkle_root(extranonce2)[::-1] + nt + self.nbits_le
+
+    def header76_batch(self, en2_start: int, count: int, en2_size: int) -> bytes:
+        """
+        header76 for extranonce2 = en2_start .. en2_start+count-1 (big-endian,
+        en2_size bytes, wrapping like extranonce2_from_counter) as one
+        contiguous count*76-byte buffer, ready for ParallelScanner.scan_headers.
+
+        - with Numba (en2_size <= 8): one kernel call builds every row, no
+          object per header
+        - otherwise, or while that kernel still compiles in the background
+          (fastscan_numba.header76_rows_ready): header76() per counter
+        """
+        from . import fastscan_numba  # lazy: keeps NumPy/Numba off the import path
+
+        if en2_size <= 8 and fastscan_numba.header76_rows_ready():
+            fixed = self.version_le + self.prevhash_le + bytes(32) + self.ntime_le + self.nbits_le
+            rows = fastscan_numba.header76_rows_numba(
+                self.coinbase_prefix, self.coinbase_suffix, self.merkle_branch, fixed, en2_start, count, en2_size
+            )
+            return rows.tobytes()
+
+        mask = (1 << (8 * en2_size)) - 1
+        out = bytearray()
+        for i in range(count):
+            out += self.header76(((en2_start + i) & mask).to_bytes(en2_size, "big"))
+        return bytes(out)
+
+
+def header76_variants(header76: bytes, versions: Sequence[int] = (), ntimes: Sequence[int] = ()) -> bytes:
+    """
+    `header76` once per (version, ntime) pair, versions outer, as one
+    contiguous buffer for ParallelScanner.scan_headers; an empty sequence
+    keeps the header's own field. share.header_index maps back with
+    divmod(index, max(1, len(ntimes))).
+
+    One merkle root for all of them: a version change costs one extra
+    midstate (block0), an ntime change none (ntime sits in block1).
+    """
+    vers = [struct.pack("<I", v & 0xFFFFFFFF) for v in versions] or [header76[:4]]
+    nts = [struct.pack("<I", t & 0xFFFFFFFF) for t in ntimes] or [header76[68:72]]
+    mid = header76[4:68]
+    tail = header76[72:76]
+    return b"".join(v + mid + t + tail for v in vers for t in nts)
+
+
 def header_hash_int_le(header80: bytes) -> int:
     """
     Double-SHA256(header) interpreted as Bitcoin's little-endian 256-bit integer.
@@ -126,3 +254,16 @@ class StratumJob:
             ntime_hex=params[7],
             clean_jobs=bool(params[8]),
         )
+
+    def template(self, extranonce1_hex: str) -> JobTemplate:
+        return JobTemplate.from_hex(
+            job_id=self.job_id,
+            prevhash_hex=self.prevhash_hex,
+            coinb1_hex=self.coinb1_hex,
+            coinb2_hex=self.coinb2_hex,
+            merkle_branch_hex=self.merkle_branch_hex,
+            version_hex=self.version_hex,
+            nbits_hex=self.nbits_hex,
+            ntime_hex=self.ntime_hex,
+            extranonce1_hex=extranonce1_hex,
+        )
@@ -1,14 +1,30 @@
 from __future__ import annotations
 
-import json
 import socket
 import threading
 import time
 import hashlib
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
-
-from .scan import find_share_bounded
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .codec import SubmitTemplate, dumps_line
+from .config import PoolSpec, load_toml, pools_from_toml
+from .framing import JsonLineReader
+from .job import JobTemplate, header76_variants
+from .parallel_scan import ParallelScanner
+from .protocol import (
+    CONFIGURE_ID,
+    DEFAULT_VERSION_ROLLING_MASK,
+    parse_configure_reply,
+    parse_set_version_mask,
+    rolled_version,
+    version_roll_space,
+)
+from .scan_auto import NONCE_SPACE
+from .session import StratumSession
+from .submit import SubmitTable
+from .workahead import DEFAULT_DEPTH, HeaderPipeline, WorkUnit
 
 
 # Difficulty-1 target (Bitcoin convention)
@@ -79,26 +95,8 @@ def build_header76(
     return header76
 
 
-class JsonLineReader:
-    def __init__(self, sock: socket.socket):
-        self.sock = sock
-        self.buf = b""
-
-    def read_one(self) -> Dict[str, Any]:
-        while b"\n" not in self.buf:
-            chunk = self.sock.recv(4096)
-            if not chunk:
-                raise ConnectionError("socket closed")
-            self.buf += chunk
-        line, self.buf = self.buf.split(b"\n", 1)
-        line = line.strip()
-        if not line:
-            return self.read_one()
-        return json.loads(line.decode())
-
-
 def send_json(sock: socket.socket, obj: Dict[str, Any]) -> None:
-    sock.sendall((json.dumps(obj) + "\n").encode())
+    sock.sendall(dumps_line(obj))
 
 
 @dataclass
@@ -113,6 +111,8 @@ class Job:
     ntime: str
     clean_jobs: bool
     received_at: float
+    # decoded once, on first use by the header pipeline
+    template: Optional[JobTemplate] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -125,21 +125,75 @@ class LiveConfig:
 
     # Mining loop
     batch_nonces: int = 200_000
+    workers: int = 1
     stale_seconds: float = 120.0
     suggest_difficulty: Optional[float] = 1.0
+    # header76 work units kept ready ahead of the scanner
+    workahead_depth: int = DEFAULT_DEPTH
+    # BIP310: ask the pool for version rolling; when granted, an extranonce2
+    # is scanned under up to this many versions before the next one is taken
+    # (one merkle root, N midstates)
+    version_rolling: bool = False
+    version_roll_headers: int = 16
+    # ntime rolling: once a header's nonce space is used up, scan it again at
+    # ntime+1 .. ntime+ntime_roll (same midstate; ntime is in block1) before
+    # rolling the version. 0 = off; keep it within what the pool accepts
+    ntime_roll: int = 0
+
+    # Failover: hot-standby pools (connected and authorized up front), in
+    # order of preference after host:port; empty = single pool, reconnect
+    # with backoff
+    standby: Tuple[PoolSpec, ...] = ()
+    # RTT probe period for every pool connection
+    probe_interval: float = 2.0
+    # standby probe request; any reply (result or error) times the round
+    # trip. The default re-authorizes the pool's own worker, which every pool
+    # answers; "mining.ping" only for pools that implement it
+    probe_method: str = "mining.authorize"
+    # switch away from the active pool once its submit RTT (or the age of an
+    # unanswered submit) exceeds this and a standby probes faster; 0 = off
+    max_submit_rtt_ms: float = 0.0
 
     # Logging
     log_every_seconds: float = 5.0
+    # failover runs: metrics JSON written here on every stats line and at exit
+    metrics_out: Optional[str] = None
+
+
+def load_live_config(path: Union[str, Path], **overrides: Any) -> LiveConfig:
+    """
+    LiveConfig from vireon.toml: [pool] / [account] is the primary, [[standby]]
+    the failover set; [runtime] and [failover] keys map onto the fields of the
+    same name (timeout, batch_nonces, probe_interval, ...).
+    """
+    data = load_toml(path)
+    primary, *standby = pools_from_toml(data)
+    known = set(LiveConfig.__dataclass_fields__)
+    kw: Dict[str, Any] = {}
+    for section in ("runtime", "failover"):
+        for k, v in data.get(section, {}).items():
+            if k not in known:
+                raise ValueError(f"[{section}] {k}: unknown setting")
+            kw[k] = v
+    kw.update(overrides)
+    return LiveConfig(
+        host=primary.host, port=primary.port, username=primary.username, password=primary.password,
+        standby=tuple(standby), **kw,
+    )
 
 
 class LiveStratumClient:
-    def __init__(self, cfg: LiveConfig):
+    def __init__(self, cfg: LiveConfig, session: Optional[StratumSession] = None):
+        """`session`: an already connected (or handshaken) session to mine on."""
         self.cfg = cfg
-        self.sock: Optional[socket.socket] = None
-        self.reader: Optional[JsonLineReader] = None
+        self.session = session
+        self.sock: Optional[socket.socket] = session.sock if session is not None else None
+        self.reader: Optional[JsonLineReader] = session.reader if session is not None else None
 
         self.extranonce1: Optional[str] = None
         self.extranonce2_size: Optional[int] = None
+        # negotiated BIP310 mask (0: no version rolling)
+        self.version_mask: int = 0
 
         self.current_diff: float = 1.0
         self.current_target_int: int = diff_to_target_int(1.0)
@@ -148,65 +202,113 @@ class LiveStratumClient:
         self.job: Optional[Job] = None
 
         self.stop_evt = threading.Event()
-
-        # Stats
-        self.accepted = 0
-        self.rejected = 0
-        self.submitted = 0
+        self.scanner = ParallelScanner(workers=cfg.workers)
+
+        # Failover: attach() bumps the epoch (a share found on the previous
+        # pool's job is dropped, not sent to the new one); time without a job
+        # after suspend() adds up in hash_downtime_sec
+        self.failover: Optional[Any] = None
+        self._epoch = 0
+        self._down_since: Optional[float] = None
+        self.hash_downtime_sec = 0.0
+
+        # Stats (share counters live in the submit table, updated as replies land)
+        self.submits = SubmitTable()
+        self.submit_template = SubmitTemplate(cfg.username)
         self.hashes = 0
         self.t0 = time.time()
 
         self._en2_counter = 0
+        self.pipeline: HeaderPipeline[Job] = HeaderPipeline(
+            self._build_header76, self._next_extranonce2, depth=cfg.workahead_depth,
+            build_batch=self._build_header76_batch,
+        )
+
+    @property
+    def submitted(self) -> int:
+        return self.submits.submitted
+
+    @property
+    def accepted(self) -> int:
+        return self.submits.accepted
+
+    @property
+    def rejected(self) -> int:
+        return self.submits.rejected
 
     def connect(self) -> None:
-        s = socket.create_connection((self.cfg.host, self.cfg.port), timeout=self.cfg.timeout)
-        s.settimeout(self.cfg.timeout)
-        self.sock = s
-        self.reader = JsonLineReader(s)
+        if self.session is None:
+            self.session = StratumSession(
+                self.cfg.host, self.cfg.port, self.cfg.username, self.cfg.password,
+                timeout_s=self.cfg.timeout, agent="vireon-live/0.1",
+                version_rolling_mask=DEFAULT_VERSION_ROLLING_MASK if self.cfg.version_rolling else None,
+            )
+        if self.session.sock is None:
+            self.session.open()
+        self.sock = self.session.sock
+        self.reader = self.session.reader
 
     def close(self) -> None:
         try:
-            if self.sock:
-                self.sock.close()
+            if self.session is not None:
+                self.session.close()
         finally:
             self.sock = None
             self.reader = None
+            self.pipeline.close()
+            self.scanner.close()
+
+    def suspend(self) -> None:
+        """Active pool lost: stop hashing its job (nothing found could be submitted)."""
+        with self.job_lock:
+            self.job = None
+            if self._down_since is None:
+                self._down_since = time.monotonic()
+        self.pipeline.set_job(None)  # type: ignore[arg-type]
+        self.scanner.cancel()
+
+    def attach(self, session: StratumSession) -> None:
+        """
+        Mine on another authorized session from now on (failover). The caller
+        then feeds it the session's latest set_difficulty / notify; pending
+        submits of the old connection are dropped.
+        """
+        res = session.result
+        assert res is not None and res.authorized, "attach an authorized session"
+        if self.session is not None:
+            self.suspend()  # leaving a pool: downtime until the new job is in
+        with self.job_lock:
+            self.session, self.sock, self.reader = session, session.sock, session.reader
+            self.extranonce1 = res.subscribe.extranonce1
+            self.extranonce2_size = int(res.subscribe.extranonce2_size)
+            self.version_mask = res.version_mask
+            self._epoch += 1
+        self.submits.forget()
 
     def subscribe_and_authorize(self) -> None:
-        assert self.sock and self.reader
-
-        send_json(self.sock, {"id": 1, "method": "mining.subscribe", "params": ["vireon-live/0.1"]})
-        sub = self._wait_for_id(1)
-        if sub.get("error"):
-            raise RuntimeError(f"subscribe error: {sub['error']}")
-        result = sub.get("result")
-        if not (isinstance(result, list) and len(result) >= 3):
-            raise RuntimeError(f"bad subscribe result: {result!r}")
-
-        self.extranonce1 = result[1]
-        self.extranonce2_size = int(result[2])
-
-        send_json(self.sock, {"id": 2, "method": "mining.authorize", "params": [self.cfg.username, self.cfg.password]})
-        auth = self._wait_for_id(2)
-        if auth.get("error"):
-            raise RuntimeError(f"authorize error: {auth['error']}")
-        if auth.get("result") is not True:
+        """
+        Session handshake (skipped if the session already did it), then the
+        notifications it saw meanwhile are applied: usually the first
+        difficulty and job, so mining can start without waiting for more.
+        """
+        assert self.session is not None and self.sock and self.reader
+        res = self.session.result or self.session.handshake()
+        if not res.authorized:
             raise RuntimeError("authorize failed (result != true)")
 
+        self.extranonce1 = res.subscribe.extranonce1
+        self.extranonce2_size = int(res.subscribe.extranonce2_size)
+        self.version_mask = res.version_mask
+        for msg in self.session.take_early_messages():
+            self._handle_message(msg)
+
         if self.cfg.suggest_difficulty is not None:
             send_json(self.sock, {"id": 3, "method": "mining.suggest_difficulty", "params": [float(self.cfg.suggest_difficulty)]})
             # pools may reply or ignore; we don't block on it
 
-    def _wait_for_id(self, want_id: int) -> Dict[str, Any]:
-        assert self.reader
-        while True:
-            msg = self.reader.read_one()
-            # Interleaved notifications can show up here; process them.
-            if msg.get("id") == want_id:
-                return msg
-            self._handle_message(msg)
-
     def _handle_message(self, msg: Dict[str, Any]) -> None:
+        if self.submits.resolve(msg):
+            return
         method = msg.get("method")
         if method == "mining.set_difficulty":
             params = msg.get("params")
@@ -234,19 +336,30 @@ class LiveStratumClient:
                 )
                 with self.job_lock:
                     self.job = job
+                    if self._down_since is not None:
+                        self.hash_downtime_sec += time.monotonic() - self._down_since
+                        self._down_since = None
+                # drop headers pre-built for the old job before the loop can pick one up
+                self.pipeline.set_job(job)
+                # abandon the scan in flight; the mining loop picks up the new job
+                self.scanner.cancel()
+
+        elif method == "mining.set_version_mask":
+            vm = parse_set_version_mask(msg)
+            if vm is not None and self.version_mask:
+                self.version_mask = vm
+
+        elif msg.get("id") == CONFIGURE_ID:
+            self.version_mask = parse_configure_reply(msg)
 
-        elif msg.get("id") is not None:
-            # submit replies come here (id == submit id)
-            # handled by submit() waiting on that id
-            pass
 
     def run_network_loop(self) -> None:
         """Continuously read messages and update job/difficulty."""
         assert self.reader
         while not self.stop_evt.is_set():
             try:
-                msg = self.reader.read_one()
-                self._handle_message(msg)
+                for msg in self.reader.read_many():
+                    self._handle_message(msg)
             except (socket.timeout, TimeoutError):
                 continue
             except Exception:
@@ -258,108 +371,198 @@ class LiveStratumClient:
         self._en2_counter += 1
         return extranonce2_from_counter(self._en2_counter, self.extranonce2_size)
 
-    def submit_share(self, job: Job, extranonce2_hex: str, nonce: int) -> bool:
+    def _template(self, job: Job) -> JobTemplate:
+        assert self.extranonce1 is not None
+        if job.template is None:
+            job.template = JobTemplate.from_hex(
+                job_id=job.job_id,
+                prevhash_hex=job.prevhash,
+                coinb1_hex=job.coinb1,
+                coinb2_hex=job.coinb2,
+                merkle_branch_hex=job.merkle_branch,
+                version_hex=job.version,
+                nbits_hex=job.nbits,
+                ntime_hex=job.ntime,
+                extranonce1_hex=self.extranonce1,
+            )
+        return job.template
+
+    def _build_header76(self, job: Job, extranonce2_hex: str) -> bytes:
+        return self._template(job).header76(bytes.fromhex(extranonce2_hex))
+
+    def _build_header76_batch(self, job: Job, count: int) -> Tuple[List[str], bytes]:
+        # the next `count` extranonce2s in one header76_batch call (one kernel with Numba)
+        size = self.extranonce2_size
+        assert size is not None
+        start = self._en2_counter + 1
+        self._en2_counter += count
+        mask = (1 << (8 * size)) - 1
+        en2s = [extranonce2_from_counter((start + i) & mask, size) for i in range(count)]
+        return en2s, self._template(job).header76_batch(start, count, size)
+
+    def submit_share(
+        self,
+        job: Job,
+        extranonce2_hex: str,
+        nonce: int,
+        version_bits: Optional[int] = None,
+        ntime_hex: Optional[str] = None,
+    ) -> int:
         """
-        mining.submit params: [worker_name, job_id, extranonce2, ntime, nonce]
-        nonce is 4 bytes, little-endian hex.
+        mining.submit params: [worker_name, job_id, extranonce2, ntime, nonce(, version_bits)]
+        nonce is 4 bytes, little-endian hex; version_bits (BIP310) is the rolled
+        part of the version, big-endian hex; ntime_hex is the rolled ntime
+        (default: the job's).
+
+        Does not wait for the reply: returns the submit id, and the network
+        loop counts the share accepted / rejected when the reply arrives.
         """
         assert self.sock and self.reader
-        submit_id = int(time.time() * 1000) & 0x7FFFFFFF
 
         nonce_hex = (nonce & 0xFFFFFFFF).to_bytes(4, "little").hex()
-        send_json(self.sock, {
-            "id": submit_id,
-            "method": "mining.submit",
-            "params": [self.cfg.username, job.job_id, extranonce2_hex, job.ntime, nonce_hex],
-        })
-        self.submitted += 1
-
-        # Wait for that response id; process other notifications while waiting
-        while True:
-            msg = self.reader.read_one()
-            if msg.get("id") == submit_id:
-                if msg.get("error"):
-                    self.rejected += 1
-                    return False
-                ok = (msg.get("result") is True)
-                if ok:
-                    self.accepted += 1
-                else:
-                    self.rejected += 1
-                return ok
-            else:
-                self._handle_message(msg)
+        bits_hex = f"{version_bits & 0xFFFFFFFF:08x}" if version_bits is not None else None
+        msg_id, line = self.submits.add_line(
+            self.submit_template, job.job_id, extranonce2_hex, ntime_hex or job.ntime, nonce_hex, bits_hex
+        )
+        self.sock.sendall(line)
+        return msg_id
 
     def run_mining_loop(self) -> None:
         """
         Main mining loop:
-          - waits for a job
-          - chooses an extranonce2
-          - builds header76
-          - scans nonces in batches
-          - submits first found share
+          - takes the next ready (extranonce2, header76) unit from the
+            work-ahead pipeline (built in the background for the current job)
+          - scans its nonce space in batches
+          - once the nonce space is used up, rolls ntime (ntime_roll), then
+            the version (version_roll_headers), on the same header: no new
+            extranonce2 / merkle root until the rolling space is used up too
+          - submits first found share, without waiting for the pool's reply
+            (run_network_loop matches it)
         """
         if self.extranonce1 is None or self.extranonce2_size is None:
             raise RuntimeError("must subscribe before mining")
 
+        self.pipeline.start()
         last_log = time.time()
 
-        while not self.stop_evt.is_set():
-            with self.job_lock:
-                job = self.job
+        unit: Optional[WorkUnit[Job]] = None
+        epoch = 0
+        header76 = b""
+        # version-rolling mask for the current unit: its headers and the
+        # submitted version bits both follow it, even if set_version_mask lands
+        mask = 0
+        # version roll index, ntime offset, next nonce of the current header
+        roll = ntime_off = 0
+        cursor = 0
 
-            if job is None:
-                time.sleep(0.1)
-                continue
+        while not self.stop_evt.is_set():
+            # before the job check: a notify landing after it still cancels this scan
+            token = self.scanner.scan_token()
+            if unit is not None and (unit.job is not self.job or epoch != self._epoch):
+                unit = None  # new job / pool: its headers are already in the pipeline
+            if unit is None:
+                unit = self.pipeline.get(timeout=0.1)
+                if unit is None:
+                    continue
+                epoch = self._epoch
+                header76 = unit.header76
+                roll = ntime_off = cursor = 0
+                tpl = unit.job.template
+                mask = self.version_mask if tpl is not None else 0
+                if mask and tpl is not None:
+                    # roll 0 as well: the pool rebuilds (version & ~mask) | bits
+                    header76 = header76_variants(unit.header76, [rolled_version(tpl.version, mask, 0)])
+            job = unit.job
 
             # stale guard
             if (time.time() - job.received_at) > self.cfg.stale_seconds:
+                unit = None
                 time.sleep(0.05)
                 continue
 
-            extranonce2 = self._next_extranonce2()
-            merkle = merkle_root_from_coinbase(
-                coinb1_hex=job.coinb1,
-                coinb2_hex=job.coinb2,
-                extranonce1_hex=self.extranonce1,
-                extranonce2_hex=extranonce2,
-                merkle_branch_hex=job.merkle_branch,
-            )
-            header76 = build_header76(
-                version_hex=job.version,
-                prevhash_hex=job.prevhash,
-                merkle_root=merkle,
-                ntime_hex=job.ntime,
-                nbits_hex=job.nbits,
-            )
-
-            # scan batches sequentially; later we thread this
-            start_nonce = 0
-            res = find_share_bounded(
-                header76=header76,
+            tpl = job.template
+            count = min(int(self.cfg.batch_nonces), NONCE_SPACE - cursor)
+            res = self.scanner.scan_headers(
+                [header76],
                 target_int=self.current_target_int,
-                start_nonce=start_nonce,
-                count=int(self.cfg.batch_nonces),
+                start_nonce=cursor,
+                count=count,
+                token=token,
             )
-            self.hashes += int(self.cfg.batch_nonces)
+            self.hashes += res.hashes
 
-            if res is not None:
-                ok = self.submit_share(job, extranonce2, res.nonce)
-                # If share accepted/rejected, continue on same job; pool may send clean_jobs.
-                _ = ok
+            share = res.first
+            if share is not None:
+                bits = rolled_version(tpl.version, mask, roll) & mask if mask else None
+                ntime_hex = f"{(tpl.ntime + ntime_off) & 0xFFFFFFFF:08x}" if ntime_off and tpl is not None else None
+                try:
+                    with self.job_lock:
+                        if epoch == self._epoch:
+                            self.submit_share(job, unit.extranonce2, share.nonce, bits, ntime_hex)
+                except OSError as e:
+                    if self.failover is None:
+                        raise
+                    # the pool's reader notices the dead connection and fails over
+                    print(f"[ERR] submit lost: {type(e).__name__}: {e}")
+
+            if not res.cancelled:
+                cursor += count
+            if cursor >= NONCE_SPACE:
+                # this header's nonce space is used up: ntime first, then version
+                cursor = 0
+                if tpl is not None and ntime_off < int(self.cfg.ntime_roll):
+                    ntime_off += 1
+                elif mask and roll + 1 < min(max(1, int(self.cfg.version_roll_headers)), version_roll_space(mask)):
+                    ntime_off = 0
+                    roll += 1
+                else:
+                    unit = None
+                if unit is not None and tpl is not None:
+                    version = rolled_version(tpl.version, mask, roll) if mask else tpl.version
+                    header76 = header76_variants(unit.header76, [version], [tpl.ntime + ntime_off])
 
             now = time.time()
             if (now - last_log) >= self.cfg.log_every_seconds:
                 dt = max(1e-9, now - self.t0)
                 mhps = (self.hashes / dt) / 1e6
-                print(f"[STATS] mh/s={mhps:.3f} submitted={self.submitted} acc={self.accepted} rej={self.rejected} diff={self.current_diff}")
+                ps = self.pipeline.stats()
+                self.submits.expire(self.cfg.timeout)
+                print(
+                    f"[STATS] mh/s={mhps:.3f} submitted={self.submitted} acc={self.accepted} rej={self.rejected} "
+                    f"rtt_p50={self.submits.rtt.quantile_ms(0.5):g}ms "
+                    f"diff={self.current_diff} workahead={ps.depth}/{self.pipeline.depth} starved={ps.starvations}"
+                )
+                if self.failover is not None:
+                    self.failover.log_stats()
                 last_log = now
 
+    def metrics(self) -> Dict[str, Any]:
+        dt = max(1e-9, time.time() - self.t0)
+        return {
+            "elapsed_sec": dt,
+            "hashes": self.hashes,
+            "mhps": (self.hashes / dt) / 1e6,
+            "submits": self.submits.to_dict(),
+            "pipeline": asdict(self.pipeline.stats()),
+            # time with no job to hash after losing the active pool
+            "hash_downtime_sec": self.hash_downtime_sec + (
+                time.monotonic() - self._down_since if self._down_since is not None else 0.0
+            ),
+        }
+
 
 def run_live(cfg: LiveConfig) -> None:
+    if cfg.standby:
+        from .failover import run_failover
+
+        run_failover(cfg)
+        return
     backoff = 1.0
     while True:
         c = LiveStratumClient(cfg)
+        # compile / pool spawn while connecting, not after the first job arrives
+        warm_th = threading.Thread(target=c.scanner.start, name="scan-warmup", daemon=True)
+        warm_th.start()
         try:
             c.connect()
             print(f"[NET] connected {cfg.host}:{cfg.port}")
@@ -369,6 +572,7 @@ def run_live(cfg: LiveConfig) -> None:
             net_th = threading.Thread(target=c.run_network_loop, daemon=True)
             net_th.start()
 
+            warm_th.join()
             c.run_mining_loop()
 
         except KeyboardInterrupt:
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import platform
+import sys
+from typing import Any, Dict, Optional
+
+
+def machine_info() -> Dict[str, Any]:
+    """Hardware/software provenance, as written to results/machine.json."""
+    return {
+        "python_version": sys.version.replace("\n", " "),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def machine_fingerprint(info: Optional[Dict[str, Any]] = None) -> str:
+    """Stable short id of machine_info(): hosts with the same hardware + software share tuning."""
+    blob = json.dumps(machine_info() if info is None else info, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()[:16]
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Any, Dict, List, Sequence
+
+
+# Upper bucket edges in milliseconds; anything slower lands in "+inf".
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram for the metrics JSON.
+
+    observe() takes seconds and is safe to call from several threads;
+    to_dict() reports counts per bucket ("<=N ms" keys) plus count/mean/max
+    and bucket-resolution p50/p90/p99.
+    """
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(sorted(float(b) for b in buckets_ms))
+        self._counts: List[int] = [0] * (len(self.buckets_ms) + 1)
+        self._n = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        ms = max(0.0, float(seconds) * 1000.0)
+        i = bisect.bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            self._counts[i] += 1
+            self._n += 1
+            self._sum_ms += ms
+            self._max_ms = max(self._max_ms, ms)
+
+    @property
+    def count(self) -> int:
+        return self._n
+
+    def quantile_ms(self, q: float) -> float:
+        """Upper edge of the bucket holding quantile q (inf if it is the overflow bucket, 0 if empty)."""
+        with self._lock:
+            if self._n == 0:
+                return 0.0
+            rank = q * self._n
+            seen = 0
+            for i, c in enumerate(self._counts):
+                seen += c
+                if seen >= rank and c:
+                    return self.buckets_ms[i] if i < len(self.buckets_ms) else float("inf")
+            return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [f"<={b:g}ms" for b in self.buckets_ms] + ["+inf"]
+            buckets = dict(zip(labels, self._counts))
+            n, sum_ms, max_ms = self._n, self._sum_ms, self._max_ms
+        return {
+            "count": n,
+            "mean_ms": (sum_ms / n) if n else 0.0,
+            "max_ms": max_ms,
+            # JSON has no infinity; an overflow-bucket quantile reports as null
+            "p50_ms": _finite(self.quantile_ms(0.50)),
+            "p90_ms": _finite(self.quantile_ms(0.90)),
+            "p99_ms": _finite(self.quantile_ms(0.99)),
+            "buckets": buckets,
+        }
+
+
+def _finite(x: float) -> Any:
+    return None if x == float("inf") else x
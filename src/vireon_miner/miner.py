@@ -4,14 +4,33 @@ import hashlib
 import json
 import socket
 import struct
+import threading
 import time
-from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from .protocol import SubscribeInfo, parse_subscribe_reply, is_method
-from .scan_auto import find_share_bounded_auto
+from .codec import SubmitTemplate, dumps_line
+from .job import JobTemplate
+from .protocol import (
+    CONFIGURE_ID,
+    DEFAULT_VERSION_ROLLING_MASK,
+    is_method,
+    parse_configure_reply,
+    parse_set_version_mask,
+    rolled_version,
+    version_roll_space,
+)
+from .metrics import LatencyHistogram
+from .scan_auto import NONCE_SPACE
+from .scheduler import DEFAULT_TARGET_LATENCY_S, JobGeneration, SliceScheduler
+from .session import HandshakeResult, StratumSession
+from .submit import SubmitTable
+
 
+# Scan settings used when neither the caller nor an autotune profile sets them.
+DEFAULT_NONCE_COUNT = 100_000
+DEFAULT_WORKERS = 1
+DEFAULT_BACKEND = "numba-midstate"
 
 # Difficulty-1 target (Bitcoin)
 _DIFF1_TARGET = int(
@@ -25,41 +44,8 @@ def _write_metrics(out_path: str, payload: dict) -> None:
         json.dump(payload, f, indent=2, sort_keys=True)
 
 
-class JsonLineReader:
-    """
-    Newline-delimited JSON reader that:
-      - preserves leftover bytes across reads
-      - does NOT drop extra lines from the same recv()
-    """
-
-    def __init__(self, sock: socket.socket):
-        self.sock = sock
-        self.buf = b""
-
-    def read_one(self) -> Dict[str, Any]:
-        while b"\n" not in self.buf:
-            chunk = self.sock.recv(4096)
-            if not chunk:
-                raise ConnectionError("socket closed")
-            self.buf += chunk
-
-        line, self.buf = self.buf.split(b"\n", 1)
-        line = line.strip()
-        if not line:
-            return self.read_one()
-        return json.loads(line.decode())
-
-
 def _send_json_line(sock: socket.socket, obj: Dict[str, Any]) -> None:
-    sock.sendall((json.dumps(obj) + "\n").encode())
-
-
-@dataclass(frozen=True)
-class HandshakeResult:
-    subscribe: SubscribeInfo
-    authorized: bool
-    # Any notifications received during handshake, useful for debugging / warm-start.
-    early_messages: Tuple[Dict[str, Any], ...] = ()
+    sock.sendall(dumps_line(obj))
 
 
 def connect_and_handshake(
@@ -70,51 +56,20 @@ def connect_and_handshake(
     timeout_s: float = 5.0,
     agent: str = "vireon/0.1",
     timeout: float | None = None,  # backward-compat alias
+    version_rolling_mask: Optional[int] = None,
 ) -> HandshakeResult:
     """
-    Robust Stratum v1 handshake:
-      - send mining.subscribe, read messages until reply with id==1
-      - send mining.authorize, read messages until reply with id==2
-      - tolerate notifications interleaved anywhere
+    One-shot handshake (see StratumSession.handshake); the connection is
+    closed on return. To keep mining on it, use a StratumSession instead.
     """
     if timeout is not None:
         timeout_s = float(timeout)
 
-    with socket.create_connection((host, port), timeout=timeout_s) as sock:
-        sock.settimeout(timeout_s)
-        r = JsonLineReader(sock)
-
-        early: List[Dict[str, Any]] = []
-
-        # 1) subscribe
-        _send_json_line(sock, {"id": 1, "method": "mining.subscribe", "params": [agent]})
-
-        sub_reply: Optional[Dict[str, Any]] = None
-        while sub_reply is None:
-            msg = r.read_one()
-            if msg.get("id") == 1:
-                sub_reply = msg
-            else:
-                early.append(msg)
-
-        sub_info = parse_subscribe_reply(sub_reply)
-
-        # 2) authorize
-        _send_json_line(sock, {"id": 2, "method": "mining.authorize", "params": [username, password]})
-
-        auth_reply: Optional[Dict[str, Any]] = None
-        while auth_reply is None:
-            msg = r.read_one()
-            if msg.get("id") == 2:
-                auth_reply = msg
-            else:
-                early.append(msg)
-
-        if auth_reply.get("error"):
-            raise ValueError(f"authorize error: {auth_reply['error']}")
-
-        authorized = bool(auth_reply.get("result") is True)
-        return HandshakeResult(subscribe=sub_info, authorized=authorized, early_messages=tuple(early))
+    with StratumSession(
+        host, port, username, password, timeout_s=timeout_s, agent=agent, version_rolling_mask=version_rolling_mask
+    ) as session:
+        assert session.result is not None
+        return session.result
 
 
 def parse_set_difficulty(msg: Dict[str, Any]) -> Optional[float]:
@@ -136,40 +91,29 @@ def parse_notify_full(
     mining.notify params:
       [job_id, prevhash, coinb1, coinb2, merkle_branch, version, nbits, ntime, clean]
     """
-    if not is_method(msg, "mining.notify"):
+    if msg.get("method") != "mining.notify":
         return None
     p = msg.get("params")
-    if not isinstance(p, list) or len(p) < 9:
+    if type(p) is not list or len(p) < 9:
         return None
 
-    job_id = p[0]
-    prevhash = p[1]
-    coinb1 = p[2]
-    coinb2 = p[3]
-    merkle_branch = p[4]
-    version = p[5]
-    nbits = p[6]
-    ntime = p[7]
-    clean = bool(p[8])
-
-    if not all(isinstance(x, str) for x in [job_id, prevhash, coinb1, coinb2, version, nbits, ntime]):
+    job_id, prevhash, coinb1, coinb2, merkle_branch, version, nbits, ntime, clean = p[:9]
+
+    # exact type checks: JSON decoders only produce plain str / list
+    if not (type(job_id) is str and type(prevhash) is str and type(coinb1) is str and type(coinb2) is str
+            and type(version) is str and type(nbits) is str and type(ntime) is str):
         return None
-    if not isinstance(merkle_branch, list) or not all(isinstance(x, str) for x in merkle_branch):
+    if type(merkle_branch) is not list:
         return None
+    for x in merkle_branch:
+        if type(x) is not str:
+            return None
 
-    return (job_id, prevhash, coinb1, coinb2, merkle_branch, version, nbits, ntime, clean)
+    return (job_id, prevhash, coinb1, coinb2, merkle_branch, version, nbits, ntime, bool(clean))
 
 
-def _sha256d(b: bytes) -> bytes:
-    import hashlib
-    return hashlib.sha256(hashlib.sha256(b).digest()).digest()
-
-
-def _merkle_root_from_coinbase(coinbase: bytes, branches_hex: List[str]) -> bytes:
-    h = _sha256d(coinbase)
-    for bh in branches_hex:
-        h = _sha256d(h + bytes.fromhex(bh))
-    return h  # 32 bytes
+# Short alias kept for callers/tests that predate the _full suffix.
+parse_notify = parse_notify_full
 
 
 def _target_from_difficulty(diff: float) -> int:
@@ -191,28 +135,56 @@ def run_live(
     timeout_s: float,
     agent: str,
     nonce_start: int,
-    nonce_count: int,
+    nonce_count: Optional[int],
     max_shares: int,
     mode: str = "baseline",
     duration_sec: float = 600.0,
     out_path: str = "results/live_metrics.json",
     stale_seconds: float = 120.0,
+    workers: Optional[int] = None,
+    backend: Optional[str] = None,
+    autotune_path: Optional[str] = None,
+    slice_latency_s: float = DEFAULT_TARGET_LATENCY_S,
+    version_rolling: bool = False,
+    ntime_roll_sec: int = 0,
+    session: Optional[StratumSession] = None,
 ) -> int:
     """
     Live Stratum loop:
-      - handshake
+      - handshake (scanner pool spawn / JIT warm-up runs in the background meanwhile);
+        with version_rolling, negotiate BIP310 version rolling first. A
+        `session` already handshaken (e.g. by --handshake) is mined on as is:
+        no reconnect, and the notifications it saw during its handshake are
+        the first jobs
       - track difficulty + latest job
-      - scan bounded nonces for share
-      - submit share
+      - scan bounded nonces for share (split across `workers` processes), in
+        slices of about `slice_latency_s` with the socket polled in between;
+        a new job abandons the current window at the next slice boundary
+      - nonce_count / workers / backend left as None come from this machine's
+        autotune profile (see autotune.py), else the DEFAULT_* values
+      - once a job's whole nonce space is scanned, roll ntime forward (up to
+        ntime_roll_sec past the job's; block1 only, the midstate is reused),
+        then the negotiated version bits, instead of needing a new
+        extranonce2 / merkle root
+      - submit share (with the rolled ntime / version bits) and keep scanning;
+        the reply is matched by id whenever the socket is next read
+      - on exit, wait up to timeout_s for replies still in flight
       - write metrics JSON on exit no matter what
     """
+    if session is not None:
+        host, port, username = session.host, session.port, session.username
     t0 = time.time()
     hashes = 0
-    submitted = 0
-    accepted = 0
-    rejected = 0
+    submits = SubmitTable()
+    submit_tpl = SubmitTemplate(username)
     jobs_seen = 0
     stale_jobs = 0
+    preemptions = 0
+    version_mask = 0
+    version_rolls = 0
+    ntime_rolls = 0
+    switch_hist = LatencyHistogram()
+    sched: Optional[SliceScheduler] = None
     last_backend = "python"
     last_diff: Optional[float] = None
     stop_reason = "unknown"
@@ -221,177 +193,253 @@ def run_live(
     cur_job: Optional[Tuple[str, str, str, str, List[str], str, str, str, bool]] = None
     job_rx_time: float = 0.0
 
-    submit_id = 10  # start ids above handshake ids
+    # scan machinery (multiprocessing, autotune) loads only when mining starts
+    from .autotune import load_profile
+    from .parallel_scan import ParallelScanner
+
+    profile = load_profile(autotune_path)
+    if profile is not None:
+        nonce_count = profile.batch_nonces if nonce_count is None else nonce_count
+        workers = profile.workers if workers is None else workers
+        backend = profile.backend if backend is None else backend
+    nonce_count = DEFAULT_NONCE_COUNT if nonce_count is None else int(nonce_count)
+
+    scanner = ParallelScanner(
+        workers=DEFAULT_WORKERS if workers is None else workers,
+        prefer=DEFAULT_BACKEND if backend is None else backend,  # type: ignore[arg-type]
+    )
+
+    # Kernel compile / cache load and pool spawn overlap the handshake instead
+    # of delaying the first job; the main loop joins before its first scan.
+    warmup: Dict[str, Any] = {}
+
+    def _warm() -> None:
+        w0 = time.time()
+        try:
+            scanner.start()  # on failure the first scan() retries start() and raises
+        finally:
+            warmup["sec"] = time.time() - w0
+
+    warm_th = threading.Thread(target=_warm, name="scan-warmup", daemon=True)
+    warm_th.start()
+    first_hash_at: Optional[float] = None
 
     try:
-        with socket.create_connection((host, port), timeout=timeout_s) as sock:
-            sock.settimeout(timeout_s)
-            r = JsonLineReader(sock)
-
-            # subscribe
-            _send_json_line(sock, {"id": 1, "method": "mining.subscribe", "params": [agent]})
-            sub_reply = None
-            early: List[Dict[str, Any]] = []
-            while sub_reply is None:
-                msg = r.read_one()
-                if msg.get("id") == 1:
-                    sub_reply = msg
-                else:
-                    early.append(msg)
-
-            sub_info = parse_subscribe_reply(sub_reply)
-            extranonce1 = sub_info.extranonce1
-            extranonce2_size = int(sub_info.extranonce2_size)
-
-            # authorize
-            _send_json_line(sock, {"id": 2, "method": "mining.authorize", "params": [username, password]})
-            auth_reply = None
-            while auth_reply is None:
-                msg = r.read_one()
-                if msg.get("id") == 2:
-                    auth_reply = msg
-                else:
-                    early.append(msg)
-            if auth_reply.get("error"):
-                raise ValueError(f"authorize error: {auth_reply['error']}")
-            if auth_reply.get("result") is not True:
+        if session is None:
+            session = StratumSession(
+                host, port, username, password, timeout_s=timeout_s, agent=agent,
+                # configure (BIP310); not awaited: a pool that ignores it just never answers
+                version_rolling_mask=DEFAULT_VERSION_ROLLING_MASK if version_rolling else None,
+            )
+        # handshakes unless the caller's session already did; closed on return
+        with session:
+            assert session.sock is not None and session.reader is not None and session.result is not None
+            sock, r = session.sock, session.reader
+            version_mask = session.result.version_mask
+            extranonce1 = session.extranonce1
+            extranonce2_size = session.extranonce2_size
+            if not session.result.authorized:
                 raise ValueError("authorize rejected")
-
-            # process any early notifications
-            for msg in early:
+            early = session.take_early_messages()
+
+            sched = SliceScheduler(scanner, target_latency_s=slice_latency_s)
+            gen = JobGeneration()
+            # Earliest time a not-yet-acted-on notify can have arrived (start of
+            # the poll that read it); None when the scan is on the latest job.
+            switch_since: Optional[float] = None
+            last_poll = time.time()
+
+            def handle(msg: Dict[str, Any], arrived_after: Optional[float]) -> None:
+                # arrived_after=None: received during the handshake, not a job switch
+                nonlocal last_diff, cur_job, job_rx_time, jobs_seen, switch_since, version_mask
+                if submits.resolve(msg):
+                    return
+                if msg.get("id") == CONFIGURE_ID and msg.get("method") is None:
+                    # the configure reply may come after authorize (not awaited)
+                    version_mask = parse_configure_reply(msg)
+                    return
                 d = parse_set_difficulty(msg)
                 if d is not None:
                     last_diff = d
+                vm = parse_set_version_mask(msg)
+                if vm is not None and version_mask:
+                    version_mask = vm
                 n = parse_notify_full(msg)
                 if n is not None:
                     cur_job = n
                     job_rx_time = time.time()
+                    if arrived_after is None:
+                        return
+                    jobs_seen += 1
+                    gen.bump()
+                    if switch_since is None:
+                        switch_since = arrived_after
+
+            def poll() -> None:
+                # between slices: apply whatever the pool sent, without blocking
+                nonlocal last_poll
+                since = last_poll
+                for m in r.read_available():
+                    handle(m, since)
+                last_poll = time.time()
+
+            # process any early notifications
+            for msg in early:
+                handle(msg, None)
+
+            scan_job: Optional[str] = None
+            tpl_src: Optional[tuple] = None
+            tpl: Optional[JobTemplate] = None
+            scan_cursor = int(nonce_start) & 0xFFFFFFFF
+            # rolling state for the current job: version counter, seconds past the
+            # job's ntime, and nonces left before the next roll
+            roll = 0
+            ntime_off = 0
+            space_left = NONCE_SPACE
 
             # main loop
             while True:
+                if submits.accepted >= int(max_shares):
+                    stop_reason = "max_shares"
+                    break
                 # stop after duration
                 if time.time() - t0 >= duration_sec:
                     stop_reason = "duration"
                     break
-
-                # Ensure we have fresh messages
-                msg = r.read_one()
-
-                d = parse_set_difficulty(msg)
-                if d is not None:
-                    last_diff = d
+                # every share still needed is already in flight: wait for the verdicts
+                if submits.accepted + len(submits) >= int(max_shares):
+                    try:
+                        handle(r.read_one(), time.time())
+                    except socket.timeout:
+                        submits.expire(timeout_s)  # the pool never answered those
+                    last_poll = time.time()
                     continue
 
-                n = parse_notify_full(msg)
-                if n is not None:
-                    cur_job = n
-                    job_rx_time = time.time()
-                    jobs_seen += 1
+                # Nothing to hash (no job/difficulty yet, or the job went stale):
+                # block for the next message.
+                if cur_job is None or last_diff is None or time.time() - job_rx_time > stale_seconds:
+                    if cur_job is not None and last_diff is not None:
+                        stale_jobs += 1
+                    handle(r.read_one(), time.time())
+                    last_poll = time.time()
                     continue
 
-                # ignore other messages
-
-                # Only scan when we have a job + difficulty
-                if cur_job is None or last_diff is None:
-                    continue
+                job_id, prevhash, coinb1, coinb2, merkle_branch, version_hex, nbits_hex, ntime_hex, _clean = cur_job
 
-                # stale protection
-                if time.time() - job_rx_time > stale_seconds:
-                    stale_jobs += 1
+                # new job: decode its notify fields once
+                if tpl_src is not cur_job:
+                    tpl_src = cur_job
+                    try:
+                        tpl = JobTemplate.from_hex(
+                            job_id=job_id,
+                            prevhash_hex=prevhash,
+                            coinb1_hex=coinb1,
+                            coinb2_hex=coinb2,
+                            merkle_branch_hex=merkle_branch,
+                            version_hex=version_hex,
+                            nbits_hex=nbits_hex,
+                            ntime_hex=ntime_hex,
+                            extranonce1_hex=extranonce1,
+                        )
+                    except ValueError:
+                        tpl = None
+                if tpl is None:
+                    handle(r.read_one(), time.time())
                     continue
 
-                job_id, prevhash, coinb1, coinb2, merkle_branch, version_hex, nbits_hex, ntime_hex, _clean = cur_job
-
-                # mode switch: deterministic nonce jump per job
-                local_nonce_start = int(nonce_start)
-                if mode == "vireon":
-                    h = hashlib.sha256(job_id.encode("utf-8")).digest()
-                    local_nonce_start = int.from_bytes(h[:4], "little", signed=False)
+                # new job: pick where its nonce walk starts
+                if job_id != scan_job:
+                    scan_job = job_id
+                    roll = 0
+                    ntime_off = 0
+                    space_left = NONCE_SPACE
+                    # mode switch: deterministic nonce jump per job
+                    if mode == "vireon":
+                        h = hashlib.sha256(job_id.encode("utf-8")).digest()
+                        scan_cursor = int.from_bytes(h[:4], "little", signed=False)
 
                 # Build coinbase: coinb1 + extranonce1 + extranonce2 + coinb2
                 extranonce2 = b"\x00" * extranonce2_size
                 extranonce2_hex = extranonce2.hex()
 
-                coinbase = bytes.fromhex(coinb1) + bytes.fromhex(extranonce1) + extranonce2 + bytes.fromhex(coinb2)
-                merkle_root = _merkle_root_from_coinbase(coinbase, merkle_branch)
-
-                # Build header76 (no nonce)
-                ver_le = struct.pack("<I", int(version_hex, 16))
-                prev_le = bytes.fromhex(prevhash)[::-1]
-                mrkl_le = merkle_root[::-1]
-                ntime_le = struct.pack("<I", int(ntime_hex, 16))
-                nbits_le = struct.pack("<I", int(nbits_hex, 16))
-                header76 = ver_le + prev_le + mrkl_le + ntime_le + nbits_le
-                if len(header76) != 76:
-                    continue
+                version = rolled_version(tpl.version, version_mask, roll) if version_mask else None
+                ntime = (tpl.ntime + ntime_off) & 0xFFFFFFFF if ntime_off else None
+                header76 = tpl.header76(extranonce2, version, ntime)
 
                 # Share target from difficulty
                 target_int = _target_from_difficulty(float(last_diff))
 
-                # Scan bounded
-                scan = find_share_bounded_auto(
-                    header76=header76,
-                    target_int=target_int,
-                    start_nonce=local_nonce_start,
-                    count=int(nonce_count),
+                # Scan in latency-bounded slices; a new job preempts between slices
+                if first_hash_at is None:
+                    warm_th.join()
+                    first_hash_at = time.time()
+                if switch_since is not None:
+                    switch_hist.observe(time.time() - switch_since)
+                    switch_since = None
+                scan_gen = gen.value
+                res = sched.scan(
+                    header76,
+                    target_int,
+                    start_nonce=scan_cursor,
+                    # never past this header's nonce space: the next roll takes over there
+                    count=min(int(nonce_count), space_left),
+                    generation=gen,
+                    poll=poll,
+                    deadline=t0 + duration_sec,
                 )
-                hashes += int(nonce_count)
+                hashes += res.hashes
+                if res.backend:
+                    last_backend = res.backend
+                # nonce positions, not hash counts: a cut-short slice is rescanned
+                scan_cursor = res.next_nonce
+                space_left -= res.scanned
+                if space_left <= 0:
+                    # nonce space done: next second, else next version; same merkle root
+                    space_left = NONCE_SPACE
+                    if ntime_off < ntime_roll_sec:
+                        ntime_off += 1
+                        ntime_rolls += 1
+                    elif version_mask:
+                        ntime_off = 0
+                        roll = (roll + 1) % version_roll_space(version_mask)
+                        version_rolls += 1
+                if res.preempted:
+                    if gen.value != scan_gen:
+                        preemptions += 1
+                    continue
 
+                scan = res.share
                 if scan is None:
-                    # advance baseline window next time
-                    nonce_start = (local_nonce_start + int(nonce_count)) & 0xFFFFFFFF
                     continue
 
-                last_backend = scan.backend
-
                 # Submit share (nonce little-endian hex)
                 nonce_le_hex = struct.pack("<I", int(scan.nonce) & 0xFFFFFFFF).hex()
 
-                submitted += 1
-                submit_id += 1
-                _send_json_line(
-                    sock,
-                    {
-                        "id": submit_id,
-                        "method": "mining.submit",
-                        "params": [username, job_id, extranonce2_hex, ntime_hex, nonce_le_hex],
-                    },
+                submit_ntime_hex = f"{ntime:08x}" if ntime is not None else ntime_hex
+                # BIP310: the rolled bits only; the pool merges them into the job version
+                version_bits_hex = f"{version & version_mask:08x}" if version is not None else None
+
+                # pipelined: the reply is resolved by handle() at a later poll
+                _, line = submits.add_line(
+                    submit_tpl, job_id, extranonce2_hex, submit_ntime_hex, nonce_le_hex, version_bits_hex
                 )
+                sock.sendall(line)
 
-                # Wait for submit reply with matching id (ignore interleaved notify/diff)
-                reply = None
-                while reply is None:
-                    m2 = r.read_one()
-                    if m2.get("id") == submit_id:
-                        reply = m2
-                    else:
-                        d2 = parse_set_difficulty(m2)
-                        if d2 is not None:
-                            last_diff = d2
-                        n2 = parse_notify_full(m2)
-                        if n2 is not None:
-                            cur_job = n2
-                            job_rx_time = time.time()
-                            jobs_seen += 1
-
-                if reply.get("error"):
-                    rejected += 1
-                else:
-                    ok = bool(reply.get("result") is True)
-                    if ok:
-                        accepted += 1
-                    else:
-                        rejected += 1
-
-                if accepted >= int(max_shares):
-                    stop_reason = "max_shares"
-                    break
+            # replies still in flight count toward the metrics (bounded wait)
+            drain_until = time.time() + timeout_s
+            try:
+                while len(submits) and time.time() < drain_until:
+                    handle(r.read_one(), time.time())
+            except (OSError, ConnectionError):
+                pass
 
     except Exception as e:
         stop_reason = f"exception:{type(e).__name__}"
         raise
     finally:
+        scanner.close()
         dt = max(1e-9, time.time() - t0)
+        submitted, accepted, rejected = submits.submitted, submits.accepted, submits.rejected
         metrics = {
             "mode": mode,
             "runtime_sec": dt,
@@ -404,6 +452,21 @@ def run_live(
             "share_yield": (accepted / hashes) if hashes else 0.0,
             "mhps": (hashes / dt) / 1e6,
             "backend": last_backend,
+            "workers": int(scanner.workers),
+            "nonce_count": int(nonce_count),
+            "autotune_profile": profile.fingerprint if profile is not None else None,
+            "warmup_sec": warmup.get("sec"),
+            "cold_start_to_first_hash_sec": (first_hash_at - t0) if first_hash_at is not None else None,
+            "slice_nonces": sched.slice_nonces if sched is not None else None,
+            "preemptions": int(preemptions),
+            # mining.submit -> reply, measured when the reply is read
+            "submit_rtt": submits.rtt.to_dict(),
+            "submits_unanswered": len(submits) + submits.expired,
+            "version_mask": f"{version_mask:08x}",
+            "version_rolls": int(version_rolls),
+            "ntime_rolls": int(ntime_rolls),
+            # notify seen -> first slice on the new job (upper bound: from the poll before it)
+            "job_switch_latency": switch_hist.to_dict(),
             "difficulty": last_diff,
             "jobs_seen": int(jobs_seen),
             "stale_jobs": int(stale_jobs),
@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import itertools
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .scan_auto import NONCE_SPACE, Backend, scan_bounded
+
+
+DEFAULT_CHUNK = 1 << 16
+
+
+@dataclass(frozen=True)
+class ParallelShare:
+    # Index into the header76 list passed to scan_headers() (0 for scan()).
+    header_index: int
+    nonce: int
+    backend: str
+
+
+@dataclass(frozen=True)
+class ParallelScanResult:
+    shares: Tuple[ParallelShare, ...]
+    hashes: int
+    cancelled: bool
+    # Backend(s) that searched, comma-joined if workers disagreed ("" if nothing ran).
+    backend: str = ""
+    # Nonces from start_nonce scanned without a gap, for every header: where a
+    # cancelled scan can resume without skipping any (hashes may count more).
+    scanned: int = 0
+
+    @property
+    def first(self) -> Optional[ParallelShare]:
+        return self.shares[0] if self.shares else None
+
+
+def _gapless(start_nonce: int, done: Sequence[Tuple[int, int, int, int, int]]) -> int:
+    """
+    Nonces from start_nonce scanned in every row, given per task
+    (first_row, rows, start, count, hashes_done); a task hashes its rows one
+    after another over the same range.
+    """
+    groups: Dict[Tuple[int, int], List[Tuple[int, int, int, int]]] = {}
+    for r, k, s, c, d in done:
+        groups.setdefault((r, k), []).append(((s - start_nonce) & 0xFFFFFFFF, c, k, d))
+    prefix = []
+    for parts in groups.values():
+        acc = 0
+        for _, c, k, d in sorted(parts):
+            covered = min(c, max(0, d - (k - 1) * c))  # of the task's last row
+            acc += covered
+            if covered < c:
+                break
+        prefix.append(acc)
+    return min(prefix) if prefix else 0
+
+
+def partition_range(start_nonce: int, count: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    Split [start_nonce, start_nonce+count) (mod 2^32) into at most `parts`
+    contiguous (start, count) slices of near-equal size, in scan order.
+    """
+    count = min(int(count), NONCE_SPACE)
+    if count <= 0:
+        return []
+    parts = max(1, min(int(parts), count))
+    base, extra = divmod(count, parts)
+
+    out: List[Tuple[int, int]] = []
+    n = int(start_nonce) & 0xFFFFFFFF
+    for i in range(parts):
+        c = base + (1 if i < extra else 0)
+        out.append((n, c))
+        n = (n + c) & 0xFFFFFFFF
+    return out
+
+
+# ---------- worker side (module-level so it pickles under spawn) ----------
+
+# cancel generation / id of the last scan a share ended (shared with the parent)
+_WORKER_GEN: Any = None
+_WORKER_ENDED: Any = None
+
+
+def _init_worker(gen: Any, ended: Any) -> None:
+    global _WORKER_GEN, _WORKER_ENDED
+    _WORKER_GEN, _WORKER_ENDED = gen, ended
+
+
+class _LocalValue:
+    """workers=1 stand-in for a shared mp.Value: same .value / get_lock()."""
+
+    def __init__(self, value: int = 0):
+        self.value = value
+        self._lock = threading.Lock()
+
+    def get_lock(self) -> threading.Lock:
+        return self._lock
+
+
+def _scan_slice(
+    first_index: int,
+    rows: Union[bytes, memoryview],
+    target_int: int,
+    start_nonce: int,
+    count: int,
+    chunk: int,
+    find_all: bool,
+    prefer: Backend,
+    token: int,
+    scan_id: int,
+    gen: Any = None,
+    ended: Any = None,
+) -> Tuple[List[Tuple[int, int, str]], int, str]:
+    """
+    Scan one slice: the same nonce range for every 76-byte row of `rows`
+    (header_index first_index, first_index+1, ...), in `chunk`-sized steps.
+    Between steps it stops once the cancel generation is past `token`, or
+    (first-share mode) another slice of scan `scan_id` found a share.
+    Returns ([(header_index, nonce, backend), ...], hashes_done, backend).
+    """
+    gen = gen if gen is not None else _WORKER_GEN
+    ended = ended if ended is not None else _WORKER_ENDED
+    shares: List[Tuple[int, int, str]] = []
+    done = 0
+    backend = ""
+
+    for row in range(len(rows) // 76):
+        header76 = bytes(rows[row * 76:(row + 1) * 76])
+        left = count
+        n = start_nonce & 0xFFFFFFFF
+        while left > 0:
+            if gen.value != token or ended.value == scan_id:
+                return shares, done, backend
+            step = min(chunk, left)
+            r = scan_bounded(header76, target_int, start_nonce=n, count=step, prefer=prefer)
+            backend = r.backend
+            if r.nonce is None:
+                done += step
+                left -= step
+                n = (n + step) & 0xFFFFFFFF
+                continue
+
+            # backends return the lowest matching nonce in the window
+            off = (r.nonce - n) & 0xFFFFFFFF
+            done += off + 1
+            left -= off + 1
+            n = (r.nonce + 1) & 0xFFFFFFFF
+            shares.append((first_index + row, int(r.nonce), r.backend))
+            if not find_all:
+                ended.value = scan_id
+                return shares, done, backend
+
+    return shares, done, backend
+
+
+# ---------- parent side ----------
+
+class ParallelScanner:
+    """
+    Process-pool scan engine.
+
+    Each scan partitions the nonce range (and, via scan_headers(), the
+    extranonce2 space represented by one header76 per extranonce2) across
+    `workers` processes: a task is a slice of the header buffer plus a nonce
+    range, never one object per header.
+
+    cancel() may be called from any thread, typically the network thread on
+    mining.notify: it bumps a cancel generation, and every scan holding an
+    older token stops. A scan takes its token when it starts, or earlier from
+    scan_token() (before handing it to an executor), so a cancel that lands
+    while the scan is still queued is not lost.
+
+    workers=1 scans inline in the calling process (no pool, no IPC).
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        chunk: int = DEFAULT_CHUNK,
+        prefer: Backend = "numba-midstate",
+    ):
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.chunk = max(1, int(chunk))
+        self.prefer = prefer
+
+        self._ctx = mp.get_context("spawn")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._started = False
+        # start() may run on a background thread (warm-up during the handshake)
+        self._start_lock = threading.Lock()
+        # cancel generation; id of the last scan a share ended (first-share mode)
+        self._gen: Any = self._ctx.Value("q", 0) if self.workers > 1 else _LocalValue()
+        self._ended: Any = self._ctx.Value("q", 0, lock=False) if self.workers > 1 else _LocalValue()
+        self._scan_ids = itertools.count(1)
+
+    def __enter__(self) -> "ParallelScanner":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """
+        Spawn the pool (workers > 1) and run one tiny scan per worker, or one
+        inline scan for workers=1, so imports/JIT happen up front. Safe to call
+        from a background thread; later calls return immediately.
+        """
+        with self._start_lock:
+            if self._started:
+                return
+            if self.workers == 1:
+                _scan_slice(0, b"\x00" * 76, 0, 0, 1, 1, False, self.prefer, 0, 0, _LocalValue(), _LocalValue())
+            else:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=self._ctx,
+                    initializer=_init_worker,
+                    initargs=(self._gen, self._ended),
+                )
+                # current token: a cancel() before start() must not skip the warm-up
+                token = self._gen.value
+                futs = [
+                    self._pool.submit(_scan_slice, 0, b"\x00" * 76, 0, 0, 1, 1, False, self.prefer, token, 0)
+                    for _ in range(self.workers)
+                ]
+                for f in futs:
+                    f.result()
+            self._started = True
+
+    def close(self) -> None:
+        self.cancel()
+        with self._start_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+            self._started = False
+
+    def cancel(self) -> None:
+        """Stop every scan started, or tokened by scan_token(), before this call."""
+        with self._gen.get_lock():
+            self._gen.value += 1
+
+    def scan_token(self) -> int:
+        """Token for a scan about to be queued: cancel() from now on stops it."""
+        return int(self._gen.value)
+
+    def scan(
+        self,
+        header76: bytes,
+        target_int: int,
+        start_nonce: int = 0,
+        count: int = NONCE_SPACE,
+        find_all: bool = False,
+        token: Optional[int] = None,
+    ) -> ParallelScanResult:
+        return self.scan_headers(
+            [header76], target_int, start_nonce=start_nonce, count=count, find_all=find_all, token=token
+        )
+
+    def scan_headers(
+        self,
+        headers76: Union[Sequence[bytes], bytes],
+        target_int: int,
+        start_nonce: int = 0,
+        count: int = NONCE_SPACE,
+        find_all: bool = False,
+        token: Optional[int] = None,
+    ) -> ParallelScanResult:
+        """
+        Scan [start_nonce, start_nonce+count) for every header76 in `headers76`:
+        a sequence of 76-byte headers, or one contiguous buffer of n*76 bytes
+        (JobTemplate.header76_batch).
+
+        - find_all=False: stop all workers at the first share found.
+        - find_all=True: return every share in the searched space.
+        - token (scan_token()): cancel() calls after it was taken stop this
+          scan, even before it starts; default: the current generation.
+
+        Shares are ordered by (header_index, nonce offset from start_nonce).
+        """
+        if isinstance(headers76, (bytes, bytearray, memoryview)):
+            buf = memoryview(headers76).cast("B")
+            if len(buf) % 76:
+                raise ValueError("header buffer must be a multiple of 76 bytes")
+        else:
+            for h in headers76:
+                if not isinstance(h, (bytes, bytearray, memoryview)) or len(h) != 76:
+                    raise ValueError("header76 must be 76 bytes")
+            buf = memoryview(b"".join(headers76))
+        n_rows = len(buf) // 76
+        count = min(int(count), NONCE_SPACE)
+
+        if token is None:
+            token = self.scan_token()
+        scan_id = next(self._scan_ids)
+
+        # At least one task per worker: contiguous row ranges over the whole
+        # nonce range, or (fewer headers than workers) each header's range split.
+        if count <= 0:
+            slices = []
+        elif n_rows >= self.workers:
+            slices = [(r, k, int(start_nonce), count) for r, k in partition_range(0, n_rows, self.workers)]
+        else:
+            per_header = -(-self.workers // max(1, n_rows))
+            slices = [(r, 1, s, c) for r in range(n_rows) for s, c in partition_range(start_nonce, count, per_header)]
+        # inline: views of the caller's buffer; pool: one bytes object per task
+        tasks = [
+            (r, buf[r * 76:(r + k) * 76] if self.workers == 1 else bytes(buf[r * 76:(r + k) * 76]),
+             int(target_int), s, c, self.chunk, bool(find_all), self.prefer, int(token), scan_id)
+            for r, k, s, c in slices
+        ]
+
+        # per task: (slice, (shares, hashes_done, backend)); tasks never run count as 0 done
+        outs: List[Tuple[Tuple[int, int, int, int], Tuple[List[Tuple[int, int, str]], int, str]]] = []
+        if self.workers == 1:
+            for sl, t in zip(slices, tasks):
+                if self._gen.value != token or self._ended.value == scan_id:
+                    break
+                outs.append((sl, _scan_slice(*t, gen=self._gen, ended=self._ended)))
+        else:
+            self.start()
+            assert self._pool is not None
+            pending: Dict[Future, Tuple[int, int, int, int]] = {
+                self._pool.submit(_scan_slice, *t): sl for sl, t in zip(slices, tasks)
+            }
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for f in finished:
+                    outs.append((pending.pop(f), f.result()))
+
+        found: List[Tuple[int, int, str]] = []
+        hashes = 0
+        backends = set()
+        done_by_slice = {sl: 0 for sl in slices}
+        for sl, (shares, done, backend) in outs:
+            found.extend(shares)
+            hashes += done
+            done_by_slice[sl] = done
+            if backend:
+                backends.add(backend)
+
+        cancelled = self._gen.value != token
+
+        base = int(start_nonce) & 0xFFFFFFFF
+        found.sort(key=lambda s: (s[0], (s[1] - base) & 0xFFFFFFFF))
+        return ParallelScanResult(
+            shares=tuple(ParallelShare(header_index=i, nonce=n, backend=b) for i, n, b in found),
+            hashes=int(hashes),
+            cancelled=bool(cancelled),
+            backend=",".join(sorted(backends)),
+            scanned=_gapless(int(start_nonce) & 0xFFFFFFFF, [(*sl, d) for sl, d in done_by_slice.items()]),
+        )
@@ -66,3 +66,73 @@ def parse_subscribe_reply(reply: Dict[str, Any]) -> SubscribeInfo:
             raise ValueError(f"unexpected subscription entry: {item!r}")
 
     return SubscribeInfo(subscriptions=subs, extranonce1=extranonce1, extranonce2_size=extranonce2_size)
+
+
+# ---------- BIP310 version rolling (mining.configure) ----------
+
+# BIP320 general-purpose version bits: what we ask for unless told otherwise.
+DEFAULT_VERSION_ROLLING_MASK = 0x1FFFE000
+# Request id of mining.configure: subscribe/authorize/suggest_difficulty use 1-3.
+CONFIGURE_ID = 4
+
+
+def configure_request(msg_id: int, mask: int = DEFAULT_VERSION_ROLLING_MASK, min_bit_count: int = 2) -> Dict[str, Any]:
+    """mining.configure asking for the version-rolling extension with `mask`."""
+    return {
+        "id": msg_id,
+        "method": "mining.configure",
+        "params": [
+            ["version-rolling"],
+            {"version-rolling.mask": f"{mask & 0xFFFFFFFF:08x}", "version-rolling.min-bit-count": int(min_bit_count)},
+        ],
+    }
+
+
+def parse_configure_reply(reply: Dict[str, Any]) -> int:
+    """
+    Negotiated version-rolling mask from a mining.configure reply; 0 when the
+    pool refused, errored, or does not know the method (rolling stays off).
+    """
+    if not isinstance(reply, dict) or reply.get("error"):
+        return 0
+    result = reply.get("result")
+    if not isinstance(result, dict) or result.get("version-rolling") is not True:
+        return 0
+    try:
+        return int(str(result.get("version-rolling.mask", "0")), 16) & 0xFFFFFFFF
+    except ValueError:
+        return 0
+
+
+def parse_set_version_mask(msg: Dict[str, Any]) -> Optional[int]:
+    """New mask from a mining.set_version_mask notification, else None."""
+    if not is_method(msg, "mining.set_version_mask"):
+        return None
+    params = msg.get("params")
+    if not isinstance(params, list) or not params:
+        return None
+    try:
+        return int(str(params[0]), 16) & 0xFFFFFFFF
+    except ValueError:
+        return None
+
+
+def rolled_version(version: int, mask: int, counter: int) -> int:
+    """
+    `version` with its `mask` bits replaced by `counter`, low counter bit into
+    the lowest mask bit (counter 0 leaves the masked bits cleared).
+    """
+    bits = 0
+    m = mask & 0xFFFFFFFF
+    while counter and m:
+        low = m & -m
+        if counter & 1:
+            bits |= low
+        counter >>= 1
+        m ^= low
+    return (version & ~mask & 0xFFFFFFFF) | bits
+
+
+def version_roll_space(mask: int) -> int:
+    """Number of distinct versions a mask allows (1 when rolling is off)."""
+    return 1 << bin(mask & 0xFFFFFFFF).count("1")
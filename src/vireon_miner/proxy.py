@@ -0,0 +1,501 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .aio_client import READ_LIMIT, AsyncJob, AsyncStratumClient
+from .codec import dumps_line, loads
+from .hashing import sha256d
+from .miner import _target_from_difficulty
+
+# Default local listener.
+DEFAULT_LISTEN = ("127.0.0.1", 3334)
+
+# Upstream extranonce2 bytes given to each downstream connection as part of
+# its extranonce1 (1 byte: up to 256 concurrent miners).
+DEFAULT_PREFIX_BYTES = 1
+
+# Accepted ntime: the job's up to this many seconds later (what pools allow).
+NTIME_WINDOW_SEC = 7200
+
+# Jobs kept for share validation (a clean notify drops all older ones).
+MAX_JOBS = 16
+
+# Stratum error codes the proxy answers with (as most pools use them).
+ERR_OTHER = 20
+ERR_STALE = 21
+ERR_DUPLICATE = 22
+ERR_LOW_DIFF = 23
+ERR_UNAUTHORIZED = 24
+ERR_NOT_SUBSCRIBED = 25
+
+
+@dataclass
+class ProxyJob:
+    job: AsyncJob
+    # notify line as received, re-sent verbatim to downstream miners
+    line: bytes
+    # (upstream extranonce2, ntime, nonce, version bits) already forwarded,
+    # decoded: a share re-sent in other hex casing is still a duplicate
+    seen: Set[Tuple[bytes, int, bytes, Optional[int]]] = field(default_factory=set)
+
+
+@dataclass
+class Downstream:
+    """One local miner connection."""
+    writer: asyncio.StreamWriter
+    peer: str
+    connected_at: float
+    prefix: Optional[int] = None
+    extranonce1: str = ""
+    worker: str = ""
+    authorized: bool = False
+    # version-rolling mask asked for in mining.configure (None: not asked);
+    # the miner may roll upstream mask & this
+    requested_mask: Optional[int] = None
+    # local verdicts / upstream verdicts
+    forwarded: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    local_rejects: Dict[str, int] = field(default_factory=dict)
+    # sum of share difficulty (x 2^32 = expected hashes) over accepted shares
+    work: float = 0.0
+
+    def send(self, obj: Dict[str, Any]) -> None:
+        self.send_line(dumps_line(obj))
+
+    def send_line(self, line: bytes) -> None:
+        if not self.writer.is_closing():
+            self.writer.write(line)
+
+    def version_mask(self, upstream_mask: int) -> int:
+        return upstream_mask if self.requested_mask is None else upstream_mask & self.requested_mask
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        dt = max(1e-9, now - self.connected_at)
+        return {
+            "peer": self.peer,
+            "worker": self.worker,
+            "extranonce1": self.extranonce1,
+            "forwarded": self.forwarded,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "local_rejects": dict(self.local_rejects),
+            "est_mhps": self.work * 2**32 / dt / 1e6,
+        }
+
+
+class ShareRejected(Exception):
+    def __init__(self, code: int, reason: str):
+        super().__init__(reason)
+        self.code = code
+        self.reason = reason
+
+
+class StratumProxy:
+    """
+    Local Stratum v1 proxy: one upstream session fanned out to many miners.
+
+    - the upstream AsyncStratumClient is handshaken once; every downstream
+      connection gets extranonce1 = upstream extranonce1 + a `prefix_bytes`
+      prefix unique among live connections, and extranonce2_size = upstream
+      size - prefix_bytes, so the downstream coinbases are exactly the upstream
+      ones with extranonce2 = prefix + downstream extranonce2
+    - upstream set_difficulty / notify / set_version_mask go to every miner
+      verbatim (serialized once); a newly authorized miner gets the current
+      difficulty and job right away
+    - mining.submit is validated locally (known job, extranonce2 size, ntime
+      window, version bits within the negotiated mask, duplicate, hash under
+      the share target) and only then forwarded upstream under the upstream
+      worker name; the pool's verdict is relayed back with the miner's id
+    - the upstream connection dropping closes every downstream one (their
+      extranonce1 no longer exists); run_proxy() reconnects
+    """
+
+    def __init__(
+        self,
+        upstream: AsyncStratumClient,
+        listen_host: str = DEFAULT_LISTEN[0],
+        listen_port: int = DEFAULT_LISTEN[1],
+        prefix_bytes: int = DEFAULT_PREFIX_BYTES,
+        ntime_window: int = NTIME_WINDOW_SEC,
+    ):
+        self.upstream = upstream
+        self.listen_host = listen_host
+        self.listen_port = int(listen_port)
+        self.prefix_bytes = int(prefix_bytes)
+        self.ntime_window = int(ntime_window)
+
+        self.clients: List[Downstream] = []
+        self.jobs: Dict[str, ProxyJob] = {}
+        self._difficulty_line: Optional[bytes] = None
+        self._version_mask_line: Optional[bytes] = None
+        self._free: List[int] = []
+        self._next_prefix = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.t0 = time.time()
+        # connections served over the proxy's lifetime
+        self.connections = 0
+        self.local_rejects: Dict[str, int] = {}
+
+    @property
+    def port(self) -> int:
+        """Bound listener port (useful with listen_port=0)."""
+        assert self._server is not None, "start() first"
+        return self._server.sockets[0].getsockname()[1]
+
+    @property
+    def extranonce2_size(self) -> int:
+        """extranonce2 bytes left to each downstream miner."""
+        assert self.upstream.extranonce2_size is not None
+        return self.upstream.extranonce2_size - self.prefix_bytes
+
+    async def start(self) -> None:
+        """Handshake upstream (unless done already), then open the listener."""
+        up = self.upstream
+        # set before the handshake: the first difficulty / job often precede its replies
+        up.on_notification = self._on_upstream
+        if not up.authorized:
+            res = await up.handshake()
+            if not res.authorized:
+                raise RuntimeError("upstream authorize rejected")
+        if self.prefix_bytes < 1 or self.extranonce2_size < 1:
+            raise ValueError(
+                f"upstream extranonce2_size {up.extranonce2_size} leaves no room for "
+                f"{self.prefix_bytes}-byte client prefixes"
+            )
+        self._server = await asyncio.start_server(
+            self._serve_client, self.listen_host, self.listen_port, limit=READ_LIMIT
+        )
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for c in list(self.clients):
+            c.writer.close()
+        self.clients.clear()
+
+    async def wait_upstream_closed(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Return once the upstream connection is gone (or `stop` is set)."""
+        stop = stop if stop is not None else asyncio.Event()
+        while not stop.is_set():
+            try:
+                job = await asyncio.wait_for(self.upstream.jobs.get(), 0.1)
+            except asyncio.TimeoutError:
+                self.upstream.submits.expire(self.upstream.timeout_s)
+                continue
+            if job is None:
+                return
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.time()
+        clients = [c.to_dict(now) for c in self.clients]
+        return {
+            "upstream": f"{self.upstream.host}:{self.upstream.port}",
+            "elapsed_sec": now - self.t0,
+            "connections": self.connections,
+            "clients": clients,
+            "est_mhps": sum(c["est_mhps"] for c in clients),
+            "local_rejects": dict(self.local_rejects),
+            "submits": self.upstream.submits.to_dict(),
+        }
+
+    # ---------- upstream -> downstream ----------
+
+    def _on_upstream(self, msg: Dict[str, Any]) -> None:
+        method = msg.get("method")
+        if method == "mining.notify":
+            job = self.upstream.job
+            if job is None or job.template.job_id != str(msg["params"][0]):
+                return  # not decodable: the miners could not use it either
+            if job.clean:
+                self.jobs.clear()
+            elif len(self.jobs) >= MAX_JOBS:
+                del self.jobs[next(iter(self.jobs))]
+            line = dumps_line(msg)
+            self.jobs[job.template.job_id] = ProxyJob(job, line)
+        elif method == "mining.set_difficulty":
+            line = self._difficulty_line = dumps_line(msg)
+        elif method == "mining.set_version_mask":
+            self._version_mask_line = dumps_line(msg)
+            for c in self.clients:
+                if c.authorized:
+                    self._send_version_mask(c)
+            return
+        else:
+            return
+        for c in self.clients:
+            if c.authorized:
+                c.send_line(line)
+
+    def _send_version_mask(self, c: Downstream) -> None:
+        # verbatim, unless the miner asked for fewer bits than the pool grants;
+        # nothing if the pool granted no version rolling
+        if self._version_mask_line is None or not self.upstream.version_mask:
+            return
+        if c.requested_mask is None:
+            c.send_line(self._version_mask_line)
+        else:
+            mask = c.version_mask(self.upstream.version_mask)
+            c.send({"id": None, "method": "mining.set_version_mask", "params": [f"{mask:08x}"]})
+
+    def _on_submit_reply(self, c: Downstream, req_id: Any, diff: float, ok: bool, msg: Dict[str, Any]) -> None:
+        if ok:
+            c.accepted += 1
+            c.work += diff
+        else:
+            c.rejected += 1
+        c.send({"id": req_id, "result": msg.get("result"), "error": msg.get("error")})
+
+    # ---------- downstream ----------
+
+    def _alloc_prefix(self) -> Optional[int]:
+        if self._free:
+            return self._free.pop()
+        if self._next_prefix >= 256 ** self.prefix_bytes:
+            return None
+        self._next_prefix += 1
+        return self._next_prefix - 1
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        c = Downstream(writer=writer, peer=f"{peer[0]}:{peer[1]}" if peer else "?", connected_at=time.time())
+        self.clients.append(c)
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    msg = loads(line)
+                except ValueError:
+                    break  # not Stratum
+                if not isinstance(msg, dict):
+                    break
+                await self._handle_client(c, msg)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            if c in self.clients:
+                self.clients.remove(c)
+            if c.prefix is not None:
+                self._free.append(c.prefix)
+            writer.close()
+
+    async def _handle_client(self, c: Downstream, msg: Dict[str, Any]) -> None:
+        req_id = msg.get("id")
+        method = msg.get("method")
+        params = msg.get("params")
+        if not isinstance(params, list):
+            params = []  # e.g. a dict: a submit is then rejected as malformed
+
+        if method == "mining.submit":
+            await self._submit(c, req_id, params)
+
+        elif method == "mining.subscribe":
+            if c.prefix is None:
+                c.prefix = self._alloc_prefix()
+            if c.prefix is None:
+                c.send({"id": req_id, "result": None, "error": [ERR_OTHER, "Proxy full", None]})
+                return
+            c.extranonce1 = self.upstream.extranonce1 + c.prefix.to_bytes(self.prefix_bytes, "big").hex()
+            sid = f"{c.prefix:x}"
+            c.send({"id": req_id, "result": [[["mining.set_difficulty", sid], ["mining.notify", sid]],
+                                             c.extranonce1, self.extranonce2_size], "error": None})
+
+        elif method == "mining.authorize":
+            # the proxy mines under its own upstream account; the name is kept for stats
+            c.worker = str(params[0]) if params else ""
+            c.authorized = True
+            c.send({"id": req_id, "result": True, "error": None})
+            self._send_version_mask(c)
+            if self._difficulty_line is not None:
+                c.send_line(self._difficulty_line)
+            if self.jobs:
+                c.send_line(next(reversed(self.jobs.values())).line)
+
+        elif method == "mining.configure":
+            # BIP310: grant what both the pool and the miner allow
+            c.requested_mask = _requested_version_mask(params)
+            mask = c.version_mask(self.upstream.version_mask)
+            result: Dict[str, Any] = {"version-rolling": bool(mask)}
+            if mask:
+                result["version-rolling.mask"] = f"{mask:08x}"
+            c.send({"id": req_id, "result": result, "error": None})
+
+        elif method == "mining.ping":
+            c.send({"id": req_id, "result": "pong", "error": None})
+
+        elif method == "mining.suggest_difficulty":
+            # every miner shares the upstream difficulty
+            c.send({"id": req_id, "result": False, "error": None})
+
+        elif req_id is not None and method is not None:
+            c.send({"id": req_id, "result": None, "error": [ERR_OTHER, f"Unsupported method {method}", None]})
+
+    async def _submit(self, c: Downstream, req_id: Any, params: List[Any]) -> None:
+        try:
+            pj, en2_hex, ntime_hex, nonce_hex, bits_hex = self._validate(c, params)
+        except ShareRejected as e:
+            c.local_rejects[e.reason] = c.local_rejects.get(e.reason, 0) + 1
+            self.local_rejects[e.reason] = self.local_rejects.get(e.reason, 0) + 1
+            c.send({"id": req_id, "result": None, "error": [e.code, e.reason, None]})
+            return
+
+        up = self.upstream
+        c.forwarded += 1
+        # credited when the pool accepts it, at the difficulty it was checked against
+        diff = float(up.difficulty or 0.0)
+        _, line = up.submits.add_line(
+            up.submit_template, pj.job.template.job_id, en2_hex, ntime_hex, nonce_hex, bits_hex,
+            on_reply=lambda ok, msg: self._on_submit_reply(c, req_id, diff, ok, msg),
+        )
+        await up.send_line(line)
+
+    def _validate(self, c: Downstream, params: List[Any]) -> Tuple[ProxyJob, str, str, str, Optional[str]]:
+        """Checks one downstream share; returns (job, upstream extranonce2, ntime, nonce, version bits)."""
+        if c.prefix is None:
+            raise ShareRejected(ERR_NOT_SUBSCRIBED, "Not subscribed")
+        if not c.authorized:
+            raise ShareRejected(ERR_UNAUTHORIZED, "Unauthorized worker")
+        if len(params) not in (5, 6) or not all(type(p) is str for p in params):
+            raise ShareRejected(ERR_OTHER, "Malformed submit")
+        _, job_id, en2_hex, ntime_hex, nonce_hex = params[:5]
+        bits_hex = params[5] if len(params) == 6 else None
+
+        pj = self.jobs.get(job_id)
+        if pj is None:
+            raise ShareRejected(ERR_STALE, "Job not found")
+        tpl = pj.job.template
+        try:
+            en2 = bytes.fromhex(en2_hex)
+            ntime = int(ntime_hex, 16)
+            nonce = bytes.fromhex(nonce_hex)
+            bits = int(bits_hex, 16) if bits_hex is not None else None
+        except ValueError:
+            raise ShareRejected(ERR_OTHER, "Malformed submit") from None
+        if len(en2) != self.extranonce2_size:
+            raise ShareRejected(ERR_OTHER, "Invalid extranonce2 size")
+        if len(nonce) != 4 or len(ntime_hex) != 8:
+            raise ShareRejected(ERR_OTHER, "Malformed submit")
+        if not tpl.ntime <= ntime <= tpl.ntime + self.ntime_window:
+            raise ShareRejected(ERR_OTHER, "Time out of range")
+
+        mask = c.version_mask(self.upstream.version_mask)
+        if bits is not None and bits & ~mask & 0xFFFFFFFF:
+            raise ShareRejected(ERR_OTHER, "Invalid version bits")
+        if not self.upstream.version_mask:
+            bits = None  # no version rolling upstream: the pool takes 5 params
+        version = (tpl.version & ~mask) | bits if bits is not None else None
+
+        up_en2 = c.prefix.to_bytes(self.prefix_bytes, "big") + en2
+        key = (up_en2, ntime, nonce, bits)
+        if key in pj.seen:
+            raise ShareRejected(ERR_DUPLICATE, "Duplicate share")
+
+        diff = self.upstream.difficulty
+        header = tpl.header76(up_en2, version=version, ntime=ntime) + nonce
+        if diff is None or int.from_bytes(sha256d(header)[::-1], "big") > _target_from_difficulty(float(diff)):
+            raise ShareRejected(ERR_LOW_DIFF, "Low difficulty share")
+
+        pj.seen.add(key)
+        return pj, up_en2.hex(), f"{ntime:08x}", nonce.hex(), f"{bits:08x}" if bits is not None else None
+
+
+def _requested_version_mask(params: List[Any]) -> Optional[int]:
+    """
+    Mask a miner asks for in mining.configure params ([extensions, {options}]):
+    None if it does not ask for version-rolling, all bits if it gives no
+    mask, 0 for a malformed one.
+    """
+    if not params or not isinstance(params[0], list) or "version-rolling" not in params[0]:
+        return None
+    opts = params[1] if len(params) > 1 and isinstance(params[1], dict) else {}
+    try:
+        return int(str(opts.get("version-rolling.mask", "ffffffff")), 16) & 0xFFFFFFFF
+    except ValueError:
+        return 0
+
+
+def write_metrics(path: str, payload: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+
+async def run_proxy(
+    host: str,
+    port: int,
+    username: str,
+    password: str = "x",
+    listen_host: str = DEFAULT_LISTEN[0],
+    listen_port: int = DEFAULT_LISTEN[1],
+    prefix_bytes: int = DEFAULT_PREFIX_BYTES,
+    timeout_s: float = 10.0,
+    agent: str = "vireon-proxy/0.1",
+    version_rolling_mask: Optional[int] = None,
+    log_every_seconds: float = 10.0,
+    out_path: Optional[str] = None,
+    stop: Optional[asyncio.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Serve downstream miners until `stop` is set: one upstream session at a
+    time, reconnected with backoff (1 s doubling to 30 s) when it drops.
+    Returns (and writes to out_path) the last session's proxy metrics.
+    """
+    stop = stop if stop is not None else asyncio.Event()
+    backoff = 1.0
+    metrics: Dict[str, Any] = {}
+    while not stop.is_set():
+        up = AsyncStratumClient(host, port, username, password, timeout_s=timeout_s, agent=agent,
+                                version_rolling_mask=version_rolling_mask)
+        proxy = StratumProxy(up, listen_host, listen_port, prefix_bytes)
+        try:
+            await up.connect()
+            await proxy.start()
+            print(f"[PROXY] upstream {host}:{port} en1={up.extranonce1} -> listening "
+                  f"{listen_host}:{proxy.port} (en2 {up.extranonce2_size} = {prefix_bytes} prefix + "
+                  f"{proxy.extranonce2_size} per miner)")
+            backoff = 1.0
+
+            async def log_loop() -> None:
+                while True:
+                    await asyncio.sleep(log_every_seconds)
+                    m = proxy.to_dict()
+                    print(f"[PROXY] miners={len(m['clients'])} est_mh/s={m['est_mhps']:.3f} "
+                          f"fwd={m['submits']['submitted']} acc={m['submits']['accepted']} "
+                          f"rej={m['submits']['rejected']} local_rej={sum(m['local_rejects'].values())}")
+
+            log_task = asyncio.get_running_loop().create_task(log_loop())
+            try:
+                await proxy.wait_upstream_closed(stop)
+            finally:
+                log_task.cancel()
+            if not stop.is_set():
+                print("[ERR] upstream connection lost")
+        except (OSError, ConnectionError, ValueError, RuntimeError, asyncio.TimeoutError) as e:
+            print(f"[ERR] {type(e).__name__}: {e}")
+        finally:
+            metrics = proxy.to_dict()
+            await proxy.close()
+            await up.close()
+            if out_path:
+                write_metrics(out_path, metrics)
+        if not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(30.0, backoff * 2.0)
+    return metrics
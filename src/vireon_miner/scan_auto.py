@@ -1,20 +1,57 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
-from typing import Optional, Literal
+from typing import Any, Callable, Dict, List, Optional, Literal
 
 from .scan import find_share_bounded as find_share_bounded_py
+from .scan import find_share_bounded_midstate as find_share_bounded_py_midstate
 
-try:
-    from .fastscan_numba import available as numba_available, find_share_bounded_numba
-except Exception:
-    def numba_available() -> bool:  # type: ignore
+# The accelerated backends are imported on first use, not at import time:
+# NumPy + Numba cost hundreds of milliseconds and a lot of RSS, and CLI paths
+# that never scan (--echo, --selftest, --handshake) should not pay for them.
+
+def _numba() -> Any:
+    from . import fastscan_numba
+
+    return fastscan_numba
+
+
+def _numpy() -> Any:
+    from . import fastscan_numpy
+
+    return fastscan_numpy
+
+
+def _numba_available() -> bool:
+    try:
+        return bool(_numba().available())
+    except Exception:
         return False
-    def find_share_bounded_numba(*args, **kwargs):  # type: ignore
-        return None
 
 
-Backend = Literal["python", "numba-midstate"]
+def _numpy_available() -> bool:
+    try:
+        return bool(_numpy().available())
+    except Exception:
+        return False
+
+
+Backend = Literal["python", "python-midstate", "numpy", "numba-midstate", "numba-parallel"]
+
+# Nonces per header (32-bit nonce field).
+NONCE_SPACE = 1 << 32
+
+# (header76, target_int, start_nonce, count) -> lowest matching nonce, or None.
+# None is authoritative: the backend searched the whole window and found no share.
+ScanFn = Callable[[bytes, int, int, int], Optional[int]]
+
+
+@dataclass(frozen=True)
+class BackendSpec:
+    name: str
+    scan: ScanFn
+    available: Callable[[], bool]
 
 
 @dataclass(frozen=True)
@@ -23,6 +60,125 @@ class ScanResult:
     backend: Backend
 
 
+@dataclass(frozen=True)
+class ScanOutcome:
+    """Result of one bounded scan: the share nonce (or None) and the backend that searched."""
+    nonce: Optional[int]
+    backend: Backend
+
+    @property
+    def found(self) -> bool:
+        return self.nonce is not None
+
+
+# Registration order is the fallback order: a preferred backend that is
+# unavailable or raises hands the window to the next one registered after it.
+_REGISTRY: Dict[str, BackendSpec] = {}
+
+
+def register_backend(name: str, scan: ScanFn, available: Callable[[], bool] = lambda: True) -> None:
+    _REGISTRY[name] = BackendSpec(name=name, scan=scan, available=available)
+
+
+def backend_names() -> List[str]:
+    """Every registered backend, available here or not (e.g. for CLI choices)."""
+    return list(_REGISTRY)
+
+
+def available_backends() -> List[str]:
+    return [name for name, spec in _REGISTRY.items() if spec.available()]
+
+
+def _scan_python(header76: bytes, target_int: int, start_nonce: int, count: int) -> Optional[int]:
+    r = find_share_bounded_py(header76, target_int, start_nonce=start_nonce, count=count)
+    return None if r is None else int(r.nonce)
+
+
+def _scan_python_midstate(header76: bytes, target_int: int, start_nonce: int, count: int) -> Optional[int]:
+    r = find_share_bounded_py_midstate(header76, target_int, start_nonce=start_nonce, count=count)
+    return None if r is None else int(r.nonce)
+
+
+register_backend(
+    "numba-parallel",
+    lambda h, t, s, c: _numba().find_share_bounded_numba_parallel(h, t, start_nonce=s, count=c),
+    _numba_available,
+)
+register_backend(
+    "numba-midstate",
+    lambda h, t, s, c: _numba().find_share_bounded_numba(h, t, start_nonce=s, count=c),
+    _numba_available,
+)
+register_backend(
+    "numpy",
+    lambda h, t, s, c: _numpy().find_share_bounded_numpy(h, t, start_nonce=s, count=c),
+    _numpy_available,
+)
+register_backend("python-midstate", _scan_python_midstate)
+register_backend("python", _scan_python)
+
+
+def _fallback_chain(prefer: str) -> List[str]:
+    names = list(_REGISTRY)
+    if prefer not in _REGISTRY:
+        raise ValueError(f"unknown scan backend: {prefer!r} (known: {names})")
+    return names[names.index(prefer):]
+
+
+def scan_bounded(
+    header76: bytes,
+    target_int: int,
+    start_nonce: int,
+    count: int,
+    prefer: Backend = "numba-midstate",
+) -> ScanOutcome:
+    """
+    Scan [start_nonce, start_nonce+count) with the preferred backend.
+
+    - the first available backend that completes owns the result, hit or miss
+    - fallback happens only when a backend is unavailable or raises
+    - ValueError (bad header/arguments) is re-raised, not treated as a backend fault
+    - target_int outside [0, 2^256) is a ValueError up front: a backend that
+      overflows on it must not look like a backend fault either
+    """
+    target_int = int(target_int)
+    if not 0 <= target_int < 1 << 256:
+        raise ValueError("target_int must be in [0, 2^256)")
+    last_err: Optional[BaseException] = None
+    for name in _fallback_chain(prefer):
+        spec = _REGISTRY[name]
+        if not spec.available():
+            continue
+        try:
+            n = spec.scan(header76, target_int, int(start_nonce), int(count))
+        except ValueError:
+            raise
+        except Exception as e:
+            last_err = e
+            continue
+        return ScanOutcome(nonce=None if n is None else int(n), backend=name)  # type: ignore[arg-type]
+
+    raise RuntimeError(f"no scan backend could handle prefer={prefer!r}") from last_err
+
+
+def warmup_backends(names: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    Run a one-nonce scan on each backend so JIT compilation (and Numba's
+    on-disk cache fill) happens now rather than on the first job.
+
+    Returns {backend: seconds}; unavailable backends are skipped.
+    """
+    out: Dict[str, float] = {}
+    for name in (available_backends() if names is None else names):
+        spec = _REGISTRY[name]
+        if not spec.available():
+            continue
+        t0 = time.perf_counter()
+        spec.scan(b"\x00" * 76, 0, 0, 1)
+        out[name] = time.perf_counter() - t0
+    return out
+
+
 def find_share_bounded_auto(
     header76: bytes,
     target_int: int,
@@ -33,14 +189,14 @@ def find_share_bounded_auto(
     """
     Unified API:
       - tries Numba (if available) when prefer="numba-midstate"
-      - otherwise falls back to pure python scan.py
-    """
-    if prefer == "numba-midstate" and numba_available():
-        n = find_share_bounded_numba(header76, target_int, start_nonce=start_nonce, count=count)
-        if n is not None:
-            return ScanResult(nonce=int(n), backend="numba-midstate")
+      - tries the multi-threaded Numba kernel when prefer="numba-parallel"
+      - falls back to the NumPy lane-vectorized scan when Numba is missing
+      - falls back to pure python scan.py (hashlib midstate, then the plain
+        reference scan) only if those are unavailable or fail
 
-    r = find_share_bounded_py(header76, target_int, start_nonce=start_nonce, count=count)
-    if r is None:
+    Use scan_bounded() when the backend of a miss matters.
+    """
+    out = scan_bounded(header76, target_int, start_nonce=start_nonce, count=count, prefer=prefer)
+    if out.nonce is None:
         return None
-    return ScanResult(nonce=int(r.nonce), backend="python")
+    return ScanResult(nonce=out.nonce, backend=out.backend)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional
+
+from .scan_auto import NONCE_SPACE
+
+if TYPE_CHECKING:  # annotations only: keeps multiprocessing off the CLI import path
+    from .parallel_scan import ParallelScanner, ParallelShare
+
+
+DEFAULT_TARGET_LATENCY_S = 0.05
+MIN_SLICE = 1 << 12
+MAX_SLICE = 1 << 26
+
+
+class JobGeneration:
+    """
+    Monotonic job counter. Whoever receives a new job calls bump(); a scan
+    that started under an older value is stale and should be abandoned.
+    """
+
+    def __init__(self) -> None:
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+@dataclass(frozen=True)
+class SliceScanResult:
+    share: Optional[ParallelShare]
+    hashes: int
+    slices: int
+    # True if the window was abandoned: a newer job generation, or the deadline passed
+    preempted: bool
+    # first nonce not scanned (mod 2^32): where to resume on the same job
+    next_nonce: int
+    backend: str = ""
+    # nonces from start_nonce up to next_nonce (unambiguous for a full 2^32 window)
+    scanned: int = 0
+
+
+class SliceScheduler:
+    """
+    Scans a nonce window in slices sized so that one slice takes about
+    `target_latency_s`, so the caller gets control back (poll) that often.
+
+    The slice size follows an EWMA of the measured hashrate, clamped to
+    [min_slice, max_slice]. Between slices the scheduler calls poll() (e.g.
+    drain the socket) and abandons the window as soon as the job generation
+    differs from the one the scan started under.
+    """
+
+    def __init__(
+        self,
+        scanner: ParallelScanner,
+        target_latency_s: float = DEFAULT_TARGET_LATENCY_S,
+        min_slice: int = MIN_SLICE,
+        max_slice: int = MAX_SLICE,
+        ewma_alpha: float = 0.3,
+    ):
+        self.scanner = scanner
+        self.target_latency_s = float(target_latency_s)
+        self.min_slice = max(1, int(min_slice))
+        self.max_slice = max(self.min_slice, int(max_slice))
+        self.ewma_alpha = float(ewma_alpha)
+        self._rate: Optional[float] = None  # hashes / second
+
+    @property
+    def hashrate(self) -> Optional[float]:
+        return self._rate
+
+    @property
+    def slice_nonces(self) -> int:
+        if self._rate is None:
+            return self.min_slice
+        n = int(self._rate * self.target_latency_s)
+        return max(self.min_slice, min(self.max_slice, n))
+
+    def _observe(self, hashes: int, seconds: float) -> None:
+        if hashes <= 0 or seconds <= 0:
+            return
+        rate = hashes / seconds
+        if self._rate is None:
+            self._rate = rate
+        else:
+            self._rate += self.ewma_alpha * (rate - self._rate)
+
+    def scan(
+        self,
+        header76: bytes,
+        target_int: int,
+        start_nonce: int,
+        count: int,
+        generation: JobGeneration,
+        poll: Optional[Callable[[], None]] = None,
+        deadline: Optional[float] = None,
+    ) -> SliceScanResult:
+        """
+        Scan [start_nonce, start_nonce+count) slice by slice; stops at the
+        first share, at the end of the window, on a new job generation, or
+        once time.time() passes `deadline`.
+        """
+        gen0 = generation.value
+        count = min(int(count), NONCE_SPACE)
+        n = int(start_nonce) & 0xFFFFFFFF
+        done = 0
+        hashes = 0
+        slices = 0
+        backend = ""
+
+        while done < count:
+            step = min(self.slice_nonces, count - done)
+            t0 = time.perf_counter()
+            res = self.scanner.scan(header76, target_int, start_nonce=n, count=step)
+            self._observe(res.hashes, time.perf_counter() - t0)
+            hashes += res.hashes
+            slices += 1
+            backend = res.backend or backend
+
+            share = res.first
+            if share is not None:
+                off = ((share.nonce - n) & 0xFFFFFFFF) + 1
+                return SliceScanResult(share, hashes, slices, False, (share.nonce + 1) & 0xFFFFFFFF, backend, done + off)
+
+            if res.cancelled:
+                # only what was scanned without a gap: the rest is rescanned on resume
+                step = res.scanned
+            done += step
+            n = (n + step) & 0xFFFFFFFF
+
+            if poll is not None:
+                poll()
+            if generation.value != gen0 or res.cancelled or (deadline is not None and time.time() >= deadline):
+                return SliceScanResult(None, hashes, slices, True, n, backend, done)
+
+        return SliceScanResult(None, hashes, slices, False, n, backend, done)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import socket
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .codec import dumps_line
+from .framing import JsonLineReader
+from .protocol import CONFIGURE_ID, SubscribeInfo, configure_request, parse_configure_reply, parse_subscribe_reply
+
+
+@dataclass(frozen=True)
+class HandshakeResult:
+    subscribe: SubscribeInfo
+    authorized: bool
+    # Any notifications received during handshake, useful for debugging / warm-start.
+    early_messages: Tuple[Dict[str, Any], ...] = ()
+    # BIP310 version bits the pool lets us roll (0: not negotiated)
+    version_mask: int = 0
+
+
+class StratumSession:
+    """
+    One Stratum v1 connection that stays open after the handshake.
+
+    - open() connects; handshake() runs configure / subscribe / authorize once
+      (connect() does both)
+    - the socket and reader stay usable afterwards: whoever mines on this
+      session reads and sends on the same connection, no reconnect and no
+      second subscribe / authorize
+    - notifications that arrived during the handshake (usually the first
+      set_difficulty / notify) are handed out once by take_early_messages(),
+      so the first job needs no extra round trip
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str = "x",
+        timeout_s: float = 5.0,
+        agent: str = "vireon/0.1",
+        version_rolling_mask: Optional[int] = None,
+    ):
+        self.host = host
+        self.port = int(port)
+        self.username = username
+        self.password = password
+        self.timeout_s = float(timeout_s)
+        self.agent = agent
+        self.version_rolling_mask = version_rolling_mask
+
+        self.sock: Optional[socket.socket] = None
+        self.reader: Optional[JsonLineReader] = None
+        self.result: Optional[HandshakeResult] = None
+        self._early: List[Dict[str, Any]] = []
+
+    def __enter__(self) -> "StratumSession":
+        if self.sock is None:
+            self.connect()
+        elif self.result is None:
+            self.handshake()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @property
+    def extranonce1(self) -> str:
+        assert self.result is not None, "handshake first"
+        return self.result.subscribe.extranonce1
+
+    @property
+    def extranonce2_size(self) -> int:
+        assert self.result is not None, "handshake first"
+        return int(self.result.subscribe.extranonce2_size)
+
+    def open(self) -> None:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout_s)
+        sock.settimeout(self.timeout_s)
+        self.sock = sock
+        self.reader = JsonLineReader(sock)
+
+    def connect(self) -> HandshakeResult:
+        """open() + handshake(); closes the socket again if the handshake fails."""
+        self.open()
+        try:
+            return self.handshake()
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self.sock is not None:
+            self.sock.close()
+        self.sock = None
+        self.reader = None
+
+    def send(self, obj: Dict[str, Any]) -> None:
+        self.send_line(dumps_line(obj))
+
+    def send_line(self, line: bytes) -> None:
+        if self.sock is None:
+            raise ConnectionError("session is closed")
+        self.sock.sendall(line)
+
+    def read_one(self) -> Dict[str, Any]:
+        if self.reader is None:
+            raise ConnectionError("session is closed")
+        return self.reader.read_one()
+
+    def take_early_messages(self) -> List[Dict[str, Any]]:
+        """Notifications received during the handshake; each is handed out once."""
+        early, self._early = self._early, []
+        return early
+
+    def handshake(self) -> HandshakeResult:
+        """
+        Robust Stratum v1 handshake:
+          - with version_rolling_mask: send mining.configure (BIP310) first, without
+            waiting for its reply; pools that ignore or reject it leave rolling off
+          - send mining.subscribe, read messages until reply with id==1
+          - send mining.authorize, read messages until reply with id==2
+          - tolerate notifications interleaved anywhere
+        """
+        version_mask = 0
+
+        def wait_for(want_id: int) -> Dict[str, Any]:
+            nonlocal version_mask
+            while True:
+                msg = self.read_one()
+                if msg.get("id") == want_id:
+                    return msg
+                if msg.get("id") == CONFIGURE_ID:
+                    version_mask = parse_configure_reply(msg)
+                else:
+                    self._early.append(msg)
+
+        # 0) configure
+        if self.version_rolling_mask is not None:
+            self.send(configure_request(CONFIGURE_ID, self.version_rolling_mask))
+
+        # 1) subscribe
+        self.send({"id": 1, "method": "mining.subscribe", "params": [self.agent]})
+        sub_info = parse_subscribe_reply(wait_for(1))
+
+        # 2) authorize
+        self.send({"id": 2, "method": "mining.authorize", "params": [self.username, self.password]})
+        auth_reply = wait_for(2)
+        if auth_reply.get("error"):
+            raise ValueError(f"authorize error: {auth_reply['error']}")
+
+        self.result = HandshakeResult(
+            subscribe=sub_info,
+            authorized=bool(auth_reply.get("result") is True),
+            early_messages=tuple(self._early),
+            version_mask=version_mask,
+        )
+        return self.result
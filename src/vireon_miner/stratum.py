@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
 from typing import Any
 
+from .codec import dumps_line, loads
+
 
 @dataclass(frozen=True)
 class StratumMsg:
@@ -12,9 +13,8 @@ class StratumMsg:
     msg_id: int | None = None
 
     def to_json_line(self) -> bytes:
-        obj = {"id": self.msg_id, "method": self.method, "params": self.params}
-        return (json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
+        return dumps_line({"id": self.msg_id, "method": self.method, "params": self.params})
 
 
 def parse_json_line(line: bytes) -> dict[str, Any]:
-    return json.loads(line.decode("utf-8").strip())
+    return loads(line.strip())
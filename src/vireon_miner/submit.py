@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .codec import SubmitTemplate
+from .metrics import LatencyHistogram
+
+
+# Submit ids start above the handshake / configure / suggest_difficulty ids (1-4).
+FIRST_SUBMIT_ID = 10
+
+# EWMA weight of the newest reply in recent_rtt_ms
+_RECENT_ALPHA = 0.25
+
+OnReply = Callable[[bool, Dict[str, Any]], None]
+
+
+@dataclass(frozen=True)
+class PendingSubmit:
+    msg_id: int
+    params: List[Any]
+    sent_at: float
+    on_reply: Optional[OnReply] = None
+
+
+class SubmitTable:
+    """
+    Pending-request table for pipelined mining.submit.
+
+    - add() assigns the next id (monotonic, never reused) and registers the
+      submit before it goes on the wire; the caller sends the returned message
+      and goes back to hashing
+    - resolve() is fed every inbound message by whoever reads the socket; a
+      reply to a pending submit is consumed there: accepted / rejected counters
+      and the RTT histogram update, then the submit's on_reply callback runs
+    - expire() gives up on submits the pool never answered
+
+    add() and resolve() may run on different threads (mining loop vs network
+    reader).
+    """
+
+    def __init__(self, first_id: int = FIRST_SUBMIT_ID, ids: Optional[Iterator[int]] = None):
+        # `ids`: share a client's request-id counter so submits never collide
+        # with its other requests
+        self._ids = ids if ids is not None else itertools.count(int(first_id))
+        self._pending: Dict[int, PendingSubmit] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.accepted = 0
+        self.rejected = 0
+        # no reply within expire()'s timeout
+        self.expired = 0
+        self.rtt = LatencyHistogram()
+        # smoothed RTT of the latest replies (ms, 0 until the first one)
+        self.recent_rtt_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _register(self, params: List[Any], on_reply: Optional[OnReply]) -> int:
+        with self._lock:
+            msg_id = next(self._ids)
+            self._pending[msg_id] = PendingSubmit(msg_id, params, time.monotonic(), on_reply)
+            self.submitted += 1
+        return msg_id
+
+    def add(self, params: List[Any], on_reply: Optional[OnReply] = None) -> Dict[str, Any]:
+        """Register a submit; returns the JSON-RPC message to send."""
+        msg_id = self._register(list(params), on_reply)
+        return {"id": msg_id, "method": "mining.submit", "params": params}
+
+    def add_line(
+        self,
+        template: SubmitTemplate,
+        job_id: str,
+        extranonce2_hex: str,
+        ntime_hex: str,
+        nonce_hex: str,
+        version_bits_hex: Optional[str] = None,
+        on_reply: Optional[OnReply] = None,
+    ) -> Tuple[int, bytes]:
+        """add() for the hot path: returns (id, wire line filled from `template`)."""
+        params = [template.username, job_id, extranonce2_hex, ntime_hex, nonce_hex]
+        if version_bits_hex is not None:
+            params.append(version_bits_hex)
+        msg_id = self._register(params, on_reply)
+        return msg_id, template.line(msg_id, job_id, extranonce2_hex, ntime_hex, nonce_hex, version_bits_hex)
+
+    def resolve(self, msg: Dict[str, Any]) -> bool:
+        """True when `msg` was the reply to a pending submit (and is now accounted for)."""
+        msg_id = msg.get("id")
+        if msg_id is None or msg.get("method") is not None:
+            return False
+        with self._lock:
+            sub = self._pending.pop(msg_id, None) if isinstance(msg_id, int) else None
+            if sub is None:
+                return False
+            ok = not msg.get("error") and msg.get("result") is True
+            if ok:
+                self.accepted += 1
+            else:
+                self.rejected += 1
+        rtt = time.monotonic() - sub.sent_at
+        self.rtt.observe(rtt)
+        ms = rtt * 1000.0
+        self.recent_rtt_ms = ms if not self.recent_rtt_ms else self.recent_rtt_ms + _RECENT_ALPHA * (ms - self.recent_rtt_ms)
+        if sub.on_reply is not None:
+            sub.on_reply(ok, msg)
+        return True
+
+    def expire(self, timeout_s: float) -> int:
+        """Drop submits older than `timeout_s`; returns how many were dropped."""
+        cutoff = time.monotonic() - float(timeout_s)
+        with self._lock:
+            old = [i for i, s in self._pending.items() if s.sent_at < cutoff]
+            for i in old:
+                del self._pending[i]
+            self.expired += len(old)
+        return len(old)
+
+    def oldest_age(self) -> float:
+        """Seconds the oldest unanswered submit has been waiting (0 if none)."""
+        with self._lock:
+            if not self._pending:
+                return 0.0
+            return time.monotonic() - min(s.sent_at for s in self._pending.values())
+
+    def forget(self) -> int:
+        """
+        Connection switched: drop every pending submit (counted as expired,
+        their replies can no longer arrive) and the recent-RTT estimate.
+        """
+        with self._lock:
+            n = len(self._pending)
+            self._pending.clear()
+            self.expired += n
+            self.recent_rtt_ms = 0.0
+        return n
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "submitted": self.submitted,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "pending": len(self._pending),
+            "rtt": self.rtt.to_dict(),
+        }
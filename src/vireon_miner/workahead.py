@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Generic, List, Optional, Tuple, TypeVar
+
+
+J = TypeVar("J")
+
+DEFAULT_DEPTH = 8
+
+
+@dataclass(frozen=True)
+class WorkUnit(Generic[J]):
+    job: J
+    # pipeline generation the unit was built under (bumped by every set_job)
+    generation: int
+    extranonce2: str
+    header76: bytes
+
+
+@dataclass(frozen=True)
+class PipelineStats:
+    depth: int
+    max_depth: int
+    produced: int
+    consumed: int
+    # ready units dropped because their job was replaced
+    flushed: int
+    # get() calls that found nothing ready while a job was set
+    starvations: int
+    starved_sec: float
+    # jobs dropped because building a header for them raised
+    build_errors: int = 0
+
+
+class HeaderPipeline(Generic[J]):
+    """
+    Producer thread that keeps up to `depth` ready header76 work units for the
+    current job, so the scan loop never waits on extranonce2 / coinbase /
+    merkle / header construction.
+
+    - set_job() atomically swaps the job and drops every queued unit; a unit
+      the producer was building for the old job is discarded, never queued
+    - get() returns the next unit for the current job, or None on timeout
+    - a job whose header build raises (malformed notify) is logged and
+      dropped; the producer idles until the next set_job()
+    - with build_batch, every free slot is filled by one call that returns
+      (extranonce2s, one contiguous n*76-byte buffer), e.g. via
+      JobTemplate.header76_batch, instead of one build_header76 per unit
+
+    A thread is enough: the Numba kernels release the GIL and pool workers
+    are separate processes, so header building overlaps hashing either way.
+    """
+
+    def __init__(
+        self,
+        build_header76: Callable[[J, str], bytes],
+        next_extranonce2: Callable[[], str],
+        depth: int = DEFAULT_DEPTH,
+        build_batch: Optional[Callable[[J, int], Tuple[List[str], bytes]]] = None,
+    ):
+        self._build = build_header76
+        self._next_en2 = next_extranonce2
+        self._build_batch = build_batch
+        self.depth = max(1, int(depth))
+
+        self._cond = threading.Condition()
+        self._queue: Deque[WorkUnit[J]] = deque()
+        self._job: Optional[J] = None
+        self._gen = 0
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._max_depth = 0
+        self._produced = 0
+        self._consumed = 0
+        self._flushed = 0
+        self._starvations = 0
+        self._starved_sec = 0.0
+        self._build_errors = 0
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="header-pipeline", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+            th, self._thread = self._thread, None
+        if th is not None:
+            th.join()
+
+    def set_job(self, job: J) -> None:
+        with self._cond:
+            self._flushed += len(self._queue)
+            self._queue.clear()
+            self._job = job
+            self._gen += 1
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[WorkUnit[J]]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if not self._queue and self._job is not None:
+                self._starvations += 1
+            t0 = time.monotonic()
+            while not self._queue and not self._stop:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    break
+                self._cond.wait(left)
+            if self._job is not None:
+                self._starved_sec += time.monotonic() - t0
+            if not self._queue:
+                return None
+            unit = self._queue.popleft()
+            self._consumed += 1
+            self._cond.notify_all()  # room for the producer
+            return unit
+
+    def stats(self) -> PipelineStats:
+        with self._cond:
+            return PipelineStats(
+                depth=len(self._queue),
+                max_depth=self._max_depth,
+                produced=self._produced,
+                consumed=self._consumed,
+                flushed=self._flushed,
+                starvations=self._starvations,
+                starved_sec=self._starved_sec,
+                build_errors=self._build_errors,
+            )
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stop and (self._job is None or len(self._queue) >= self.depth):
+                    self._cond.wait()
+                if self._stop:
+                    return
+                job, gen = self._job, self._gen
+                room = self.depth - len(self._queue)
+
+            # built outside the lock: this is the slow part (hex decode + merkle)
+            try:
+                if self._build_batch is not None:
+                    en2s, buf = self._build_batch(job, room)  # type: ignore[arg-type]
+                    built = [(en2, buf[i * 76:(i + 1) * 76]) for i, en2 in enumerate(en2s)]
+                else:
+                    en2 = self._next_en2()
+                    built = [(en2, self._build(job, en2))]  # type: ignore[arg-type]
+            except Exception as e:
+                print(f"[ERR] header build failed, dropping job: {type(e).__name__}: {e}")
+                with self._cond:
+                    self._build_errors += 1
+                    if gen == self._gen:
+                        self._job = None  # wait for the next set_job()
+                continue
+
+            with self._cond:
+                if gen != self._gen:
+                    continue  # job replaced while building: drop, never queue stale work
+                for en2, header76 in built:
+                    self._queue.append(WorkUnit(job=job, generation=gen, extranonce2=en2, header76=header76))  # type: ignore[arg-type]
+                self._produced += len(built)
+                self._max_depth = max(self._max_depth, len(self._queue))
+                self._cond.notify_all()
@@ -0,0 +1,200 @@
+import json
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import pytest
+
+from vireon_miner.hashing import sha256d
+from vireon_miner.job import JobTemplate
+from vireon_miner.live_client import diff_to_target_int
+
+
+EXTRANONCE1 = "01020304"
+JOB = ["job1", "00" * 32, "aa", "bb", [], "20000000", "1d00ffff", "5e9a2b5a", True]
+
+
+class FakePool:
+    """A scripted Stratum pool on 127.0.0.1, served from a daemon thread.
+
+    Default script, per connection:
+      - mining.configure: grants `grant` (None: "Unknown method"); with
+        `late_configure` the reply only goes out after the authorize reply
+      - mining.subscribe: extranonce1 01020304, `en2_size` bytes of extranonce2
+      - mining.authorize: True, then set_difficulty(`diff`) (skipped if None)
+        and notify(`job`); with `early` both go out before the reply
+      - mining.submit: `check_share(params)` (default: rehash the share
+        against the job, the difficulty, the granted mask and `ntime_window`),
+        logged to `submits` as (params, ok) and answered with ok
+      - anything else is left unanswered
+
+    `on_request(pool, msg)` sees every request first; it returns True when it
+    answered the request itself, False to fall through to the script.
+    """
+
+    def __init__(self, *, job: list = JOB, diff: Optional[float] = 1.0, grant: Optional[int] = None,
+                 late_configure: bool = False, early: bool = False, en2_size: int = 4, ntime_window: int = 0,
+                 check_share: Optional[Callable[[list], bool]] = None,
+                 on_request: Optional[Callable[["FakePool", dict], bool]] = None, conns: int = 1):
+        self.job = job
+        self.diff = diff
+        self.grant = grant
+        self.late_configure = late_configure
+        self.early = early
+        self.en2_size = en2_size
+        self.ntime_window = ntime_window
+        self.check_share = check_share or self.valid_share
+        self.on_request = on_request
+        self.conns = conns
+
+        self.connections: List[List[dict]] = []  # requests, per accepted connection
+        self.submits: List[tuple] = []
+        self.jobs: Dict[str, JobTemplate] = {}
+        self._conn: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._pending_configure: Optional[int] = None
+
+        self._srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._srv.bind(("127.0.0.1", 0))
+        self._srv.listen(conns)
+        self.port = self._srv.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    @property
+    def requests(self) -> List[dict]:
+        return [msg for reqs in self.connections for msg in reqs]
+
+    @property
+    def methods(self) -> List[Optional[str]]:
+        return [msg.get("method") for msg in self.requests]
+
+    def join(self, timeout: float = 5.0) -> None:
+        self._thread.join(timeout)
+
+    def close(self) -> None:
+        self._srv.close()
+        conn = self._conn
+        if conn is not None:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.join()
+
+    # ---- sending ----
+    def send(self, obj: dict) -> None:
+        with self._send_lock:
+            self._conn.sendall((json.dumps(obj) + "\n").encode())
+
+    def reply(self, msg: dict, result, error=None) -> None:
+        self.send({"id": msg["id"], "result": result, "error": error})
+
+    def set_difficulty(self, diff: float) -> None:
+        self.diff = diff
+        self.send({"id": None, "method": "mining.set_difficulty", "params": [diff]})
+
+    def notify(self, params: list) -> None:
+        self.jobs[params[0]] = JobTemplate.from_hex(
+            job_id=params[0], prevhash_hex=params[1], coinb1_hex=params[2], coinb2_hex=params[3],
+            merkle_branch_hex=params[4], version_hex=params[5], nbits_hex=params[6], ntime_hex=params[7],
+            extranonce1_hex=EXTRANONCE1)
+        self.send({"id": None, "method": "mining.notify", "params": params})
+
+    def send_work(self) -> None:
+        if self.diff is not None:
+            self.set_difficulty(self.diff)
+        self.notify(self.job)
+
+    # ---- shares ----
+    def valid_share(self, params: list) -> bool:
+        _, job_id, en2_hex, ntime_hex, nonce_hex, *rest = params
+        tpl = self.jobs.get(job_id)
+        if tpl is None:
+            return False
+        mask = self.grant or 0
+        bits = int(rest[0], 16) if rest else 0
+        ntime = int(ntime_hex, 16)
+        version = (tpl.version & ~mask) | (bits & mask)
+        header = tpl.header76(bytes.fromhex(en2_hex), version, ntime) + bytes.fromhex(nonce_hex)
+        return (bits & ~mask == 0 and tpl.ntime <= ntime <= tpl.ntime + self.ntime_window
+                and int.from_bytes(sha256d(header)[::-1], "big") <= diff_to_target_int(self.diff))
+
+    def answer_submit(self, msg: dict) -> bool:
+        ok = bool(self.check_share(msg["params"]))
+        self.submits.append((msg["params"], ok))
+        self.reply(msg, ok)
+        return ok
+
+    # ---- script ----
+    def _configure_reply(self, req_id: int) -> None:
+        if self.grant is not None:
+            result = {"version-rolling": True, "version-rolling.mask": f"{self.grant:08x}"}
+            self.send({"id": req_id, "result": result, "error": None})
+        else:
+            self.send({"id": req_id, "result": None, "error": [20, "Unknown method", None]})
+
+    def _handle(self, msg: dict) -> None:
+        method = msg.get("method")
+        if method == "mining.configure":
+            if self.late_configure:
+                self._pending_configure = msg["id"]
+            else:
+                self._configure_reply(msg["id"])
+        elif method == "mining.subscribe":
+            self.reply(msg, [[], EXTRANONCE1, self.en2_size])
+        elif method == "mining.authorize":
+            if self.early:
+                self.send_work()
+            self.reply(msg, True)
+            if self._pending_configure is not None:
+                time.sleep(0.2)  # the miner is past its handshake
+                self._configure_reply(self._pending_configure)
+                self._pending_configure = None
+            if not self.early:
+                self.send_work()
+        elif method == "mining.submit":
+            self.answer_submit(msg)
+
+    def _serve(self) -> None:
+        try:
+            for i in range(self.conns):
+                conn, _ = self._srv.accept()
+                if i == self.conns - 1:
+                    self._srv.close()  # a further connect is refused
+                conn.settimeout(10)
+                self._conn = conn
+                reqs: List[dict] = []
+                self.connections.append(reqs)
+                f = conn.makefile("rb")
+                try:
+                    for line in f:  # until the client hangs up
+                        msg = json.loads(line)
+                        reqs.append(msg)
+                        if self.on_request is None or not self.on_request(self, msg):
+                            self._handle(msg)
+                except OSError:
+                    pass  # the client hung up first
+                finally:
+                    f.close()
+                    conn.close()
+        except OSError:
+            pass  # closed before a client connected
+        finally:
+            self._srv.close()
+
+
+@pytest.fixture
+def fake_pool():
+    """Factory for FakePool servers; every one is shut down after the test."""
+    pools: List[FakePool] = []
+
+    def start(**kw) -> FakePool:
+        pool = FakePool(**kw)
+        pools.append(pool)
+        return pool
+
+    yield start
+    for pool in pools:
+        pool.close()
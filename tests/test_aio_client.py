@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+from vireon_miner.aio_client import AsyncStratumClient, connect_and_handshake_async
+from vireon_miner.cli import main
+from vireon_miner.miner import connect_and_handshake
+from vireon_miner.parallel_scan import ParallelScanner
+
+
+def _difficulty_before_subscribe_reply(pool, msg):
+    if msg.get("method") == "mining.subscribe":
+        pool.send({"id": None, "method": "mining.set_difficulty", "params": [2.0]})
+    return False
+
+
+def test_handshake_matches_blocking_client_on_the_wire(fake_pool):
+    # configure, then a notification before the subscribe reply, then authorize
+    pool = fake_pool(grant=0x1FFFE000, en2_size=8, diff=None, early=True, conns=2,
+                     on_request=_difficulty_before_subscribe_reply)
+    sync = connect_and_handshake("127.0.0.1", pool.port, "user", "x", timeout=5.0, version_rolling_mask=0x1FFFE000)
+    res = asyncio.run(connect_and_handshake_async("127.0.0.1", pool.port, "user", "x", timeout_s=5.0,
+                                                  version_rolling_mask=0x1FFFE000))
+    pool.join()
+
+    assert pool.connections[0] == pool.connections[1]  # same requests, same ids, same order
+    assert res == sync
+    assert res.authorized and res.version_mask == 0x1FFFE000 and res.subscribe.extranonce2_size == 8
+    assert [m["method"] for m in res.early_messages] == ["mining.set_difficulty", "mining.notify"]
+
+
+def _reverse_order_replies(held: list):
+    # answers x.second, then a notification, then x.first
+    def on_request(pool, msg):
+        if msg.get("method") == "x.first":
+            held.append(msg)
+        elif msg.get("method") == "x.second":
+            pool.reply(msg, "second")
+            pool.set_difficulty(4.0)
+            pool.reply(held.pop(), "first")
+        else:
+            return False
+        return True
+    return on_request
+
+
+def test_replies_are_matched_by_id_from_one_reader_task(fake_pool):
+    pool = fake_pool(diff=None, on_request=_reverse_order_replies([]))
+
+    async def main():
+        async with AsyncStratumClient("127.0.0.1", pool.port, "user", timeout_s=5.0) as c:
+            await c.handshake()
+            r1, r2 = await asyncio.gather(c.request("x.first", []), c.request("x.second", []))
+            return r1["result"], r2["result"], c.difficulty
+
+    assert asyncio.run(main()) == ("first", "second", 4.0)
+    pool.join()
+
+
+def _second_job_after_first_share(pool, msg):
+    if msg.get("method") != "mining.submit":
+        return False
+    pool.answer_submit(msg)
+    if len(pool.submits) == 1:
+        pool.notify(["job2"] + pool.job[1:])
+    return True
+
+
+def test_mining_loop_scans_in_executor_and_follows_new_jobs(fake_pool):
+    pool = fake_pool(diff=1e-6, on_request=_second_job_after_first_share)
+
+    async def main():
+        # fixed pure-Python backend: no JIT compile inside the timed run on a cold Numba cache
+        scanner = ParallelScanner(workers=1, prefer="python-midstate")
+        async with AsyncStratumClient("127.0.0.1", pool.port, "user", timeout_s=5.0, scanner=scanner) as c:
+            await c.handshake()
+            await asyncio.wait_for(c.run_mining_loop(batch_nonces=1 << 16, max_shares=3), 60)
+        scanner.close()
+        return c.accepted, c.rejected, c.hashes
+
+    accepted, rejected, hashes = asyncio.run(main())
+    pool.join()
+
+    assert accepted >= 3 and rejected == 0 and hashes > 0
+    assert all(ok for _, ok in pool.submits)
+    assert pool.submits[0][0][1] == "job1" and pool.submits[-1][0][1] == "job2"
+
+
+def test_cli_live_async_mines_through_the_asyncio_client(fake_pool, tmp_path):
+    pool = fake_pool(diff=1e-6)
+    out = tmp_path / "live_metrics.json"
+    rc = main(["--live", "--async", "--port", str(pool.port), "--user", "user", "--timeout", "5",
+               "--backend", "python-midstate", "--nonce-count", "65536", "--max-shares", "2",
+               "--duration-sec", "60", "--autotune-profile", str(tmp_path / "autotune.json"), "--out", str(out)])
+    pool.join()
+
+    assert rc == 0
+    assert pool.methods.count("mining.subscribe") == 1  # one connection: the asyncio client's
+    assert len(pool.submits) >= 2 and all(ok for _, ok in pool.submits)
+    m = json.loads(out.read_text())
+    assert (m["client"], m["stop_reason"], m["accepted"], m["rejected"]) == ("asyncio", "max_shares", 2, 0)
+    assert m["backend"] == "python-midstate" and m["hashes"] > 0 and m["submit_rtt"]["count"] >= 2
+
+
+def test_cli_live_async_stops_at_duration(fake_pool, tmp_path):
+    pool = fake_pool(diff=1e12)  # no shares
+    out = tmp_path / "live_metrics.json"
+    rc = main(["--live", "--async", "--port", str(pool.port), "--user", "user", "--timeout", "5",
+               "--backend", "python-midstate", "--nonce-count", str(1 << 24), "--duration-sec", "0.5",
+               "--autotune-profile", str(tmp_path / "autotune.json"), "--out", str(out)])
+    pool.join()
+
+    m = json.loads(out.read_text())
+    assert rc == 0 and (m["stop_reason"], m["accepted"]) == ("duration", 0)
+    assert m["hashes"] > 0 and m["runtime_sec"] < 5  # the 2^24-nonce scan was cancelled
@@ -0,0 +1,52 @@
+from vireon_miner.autotune import (
+    MAX_SWITCH_LATENCY_S,
+    TuneProfile,
+    autotune,
+    load_profile,
+    save_profile,
+    score,
+)
+from vireon_miner.machine import machine_fingerprint
+
+
+def test_score_charges_switch_latency():
+    assert score(10.0, 0.0) == 10.0
+    # same raw MH/s, slower job switch -> lower score
+    assert score(10.0, 1.0, job_interval_s=10.0) < score(10.0, 0.1, job_interval_s=10.0)
+    assert score(100.0, MAX_SWITCH_LATENCY_S + 0.1) == 0.0
+
+
+def test_autotune_picks_best_trial_for_this_machine():
+    profile, trials = autotune(
+        backends=["python-midstate"], batch_sizes=[1000, 2000], worker_counts=[1], min_seconds=0.01
+    )
+    assert {(t.backend, t.batch_nonces, t.workers) for t in trials} == {
+        ("python-midstate", 1000, 1),
+        ("python-midstate", 2000, 1),
+    }
+    best = max(trials, key=lambda t: t.score)
+    assert (profile.backend, profile.batch_nonces, profile.workers) == (best.backend, best.batch_nonces, best.workers)
+    assert profile.fingerprint == machine_fingerprint()
+    assert all(t.mhps > 0 and t.switch_latency_s > 0 for t in trials)
+
+
+def test_profiles_keyed_by_fingerprint(tmp_path):
+    path = str(tmp_path / "autotune.json")
+    assert load_profile(path) is None
+
+    mine = TuneProfile(machine_fingerprint(), "numpy", 1 << 18, 2, 1.5, 0.2, 0.0)
+    other = TuneProfile("0123456789abcdef", "numba-parallel", 1 << 20, 8, 40.0, 0.1, 0.0)
+    save_profile(mine, path)
+    save_profile(other, path)
+
+    assert load_profile(path) == mine
+    assert load_profile(path, fingerprint="0123456789abcdef") == other
+
+
+def test_switch_latency_is_per_slice_not_per_batch():
+    # 40x the batch, about the same slice: large batches are not penalized
+    _, trials = autotune(backends=["python-midstate"], batch_sizes=[1 << 12, 40 << 12], worker_counts=[1],
+                         min_seconds=0.2, slice_latency_s=0.01)
+    small, large = sorted(trials, key=lambda t: t.batch_nonces)
+    assert large.switch_latency_s < 4 * small.switch_latency_s
+    assert large.score > 0
@@ -0,0 +1,206 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from vireon_miner.config import PoolSpec
+from vireon_miner.failover import FailoverManager
+from vireon_miner.live_client import LiveConfig, LiveStratumClient, load_live_config
+
+
+class FakePool:
+    """Stratum server for any number of connections; kill() drops them all and stops listening."""
+
+    def __init__(self, extranonce1: str, job_id: str, submit_delay: float = 0.0, diff: float = 64 / 2**32):
+        self.extranonce1 = extranonce1
+        self.job_id = job_id
+        self.submit_delay = submit_delay
+        self.diff = diff
+        self.submits: list = []
+        self.methods: list = []
+        self._conns: list = []
+        self.srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.srv.bind(("127.0.0.1", 0))
+        self.srv.listen(4)
+        self.port = self.srv.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def kill(self):
+        self.srv.close()
+        for c in self._conns:
+            try:
+                c.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            c.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.srv.accept()
+            except OSError:
+                return
+            self._conns.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        lock = threading.Lock()
+
+        def send(obj):
+            with lock:
+                try:
+                    conn.sendall((json.dumps(obj) + "\n").encode())
+                except OSError:
+                    pass  # killed, or a delayed reply after the miner left
+
+        try:
+            for line in conn.makefile("rb"):
+                msg = json.loads(line)
+                method = msg.get("method")
+                self.methods.append(method)
+                if method == "mining.subscribe":
+                    send({"id": msg["id"], "result": [[], self.extranonce1, 4], "error": None})
+                elif method == "mining.authorize":
+                    send({"id": msg["id"], "result": True, "error": None})
+                    send({"id": None, "method": "mining.set_difficulty", "params": [self.diff]})
+                    send({"id": None, "method": "mining.notify", "params": [
+                        self.job_id, "00" * 32, "aa", "bb", [], "20000000", "1d00ffff", "5e9a2b5a", True]})
+                elif method == "mining.ping":
+                    send({"id": msg["id"], "result": "pong", "error": None})
+                elif method == "mining.submit":
+                    self.submits.append(msg["params"][1])
+                    reply = {"id": msg["id"], "result": True, "error": None}
+                    if self.submit_delay:
+                        threading.Timer(self.submit_delay, send, args=(reply,)).start()
+                    else:
+                        send(reply)
+        except (OSError, ValueError):
+            pass
+
+
+def _wait(cond, timeout=20.0):
+    deadline = time.time() + timeout
+    while not cond() and time.time() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def _mine(pools, **cfg_kw):
+    cfg = LiveConfig(host="", port=0, username="u", batch_nonces=256, timeout=5.0,
+                     suggest_difficulty=None, log_every_seconds=60, **cfg_kw)
+    c = LiveStratumClient(cfg)
+    c.scanner.prefer = "python-midstate"
+    specs = [PoolSpec("127.0.0.1", p.port, "u", name=p.job_id) for p in pools]
+    mgr = FailoverManager(c, specs, min_dwell_sec=0.0)
+    mgr.start()
+    th = threading.Thread(target=c.run_mining_loop, daemon=True)
+    th.start()
+    return c, mgr, th
+
+
+def _stop(c, mgr, th):
+    c.stop_evt.set()
+    th.join(10)
+    mgr.close()
+    c.close()
+
+
+def test_load_live_config_reads_pool_set(tmp_path):
+    p = tmp_path / "vireon.toml"
+    p.write_text(
+        '[pool]\nhost = "a.example"\nport = 3333\n\n'
+        '[account]\nusername = "me"\n\n'
+        '[[standby]]\nhost = "b.example"\nport = 3334\nname = "b"\n\n'
+        '[[standby]]\nhost = "c.example"\nport = 3335\nusername = "other"\npassword = "pw"\n\n'
+        '[runtime]\nbatch_nonces = 1000\ntimeout = 3.0\n\n'
+        '[failover]\nprobe_interval = 0.5\nmax_submit_rtt_ms = 250\n'
+    )
+    cfg = load_live_config(p, workers=2)
+    assert (cfg.host, cfg.port, cfg.username, cfg.password) == ("a.example", 3333, "me", "x")
+    assert cfg.standby == (PoolSpec("b.example", 3334, "me", "x", "b"), PoolSpec("c.example", 3335, "other", "pw"))
+    assert (cfg.batch_nonces, cfg.timeout, cfg.probe_interval, cfg.max_submit_rtt_ms, cfg.workers) == (1000, 3.0, 0.5, 250, 2)
+
+    p.write_text('[pool]\nhost = "a"\nport = 1\n[runtime]\nbogus = 1\n')
+    with pytest.raises(ValueError, match="bogus"):
+        load_live_config(p)
+
+
+def test_primary_drop_switches_to_hot_standby():
+    a, b = FakePool("aaaaaaaa", "jobA"), FakePool("bbbbbbbb", "jobB")
+    c, mgr, th = _mine([a, b], probe_interval=0.1)
+    try:
+        assert mgr.active is mgr.links[0]
+        assert _wait(lambda: c.accepted >= 2)
+        assert _wait(lambda: mgr.links[1].rtt_ms is not None)  # standby is probed while idle
+
+        a.kill()
+        assert _wait(lambda: len(b.submits) >= 2)
+        m = mgr.metrics()
+    finally:
+        _stop(c, mgr, th)
+        b.kill()
+
+    fo = m["failover"]
+    assert fo["active"] == "jobB" and fo["failovers"] == 1
+    ev = fo["events"][-1]
+    assert (ev["from_pool"], ev["to_pool"], ev["reason"]) == ("jobA", "jobB", "down")
+    assert ev["switch_ms"] < 1000 and m["hash_downtime_sec"] < 1.0
+    assert set(b.submits) == {"jobB"}  # nothing found on A's job leaks to B
+    assert fo["pools"][0]["drops"] == 1 and not fo["pools"][0]["alive"]
+
+
+@pytest.mark.parametrize("probe_method", ["mining.authorize", "mining.ping"])  # default, opt-in
+def test_only_standbys_are_probed(probe_method):
+    a, b = FakePool("aaaaaaaa", "jobA"), FakePool("bbbbbbbb", "jobB")
+    c, mgr, th = _mine([a, b], probe_interval=0.05, probe_method=probe_method)
+    try:
+        assert _wait(lambda: b.methods.count(probe_method) >= 3 and mgr.links[1].rtt_ms is not None)
+        assert _wait(lambda: c.accepted >= 1)
+        # the active pool is timed by its submits; only the handshake authorized it
+        assert a.methods.count(probe_method) == (1 if probe_method == "mining.authorize" else 0)
+        assert mgr.links[1].probe_timeouts == 0
+        assert c.job.job_id == "jobA"  # a standby's re-sent job stays with the standby
+    finally:
+        _stop(c, mgr, th)
+        a.kill()
+        b.kill()
+
+
+def test_slow_submits_move_to_faster_standby():
+    a, b = FakePool("aaaaaaaa", "jobA", submit_delay=0.5), FakePool("bbbbbbbb", "jobB")
+    c, mgr, th = _mine([a, b], probe_interval=0.05, max_submit_rtt_ms=200.0)
+    try:
+        assert _wait(lambda: mgr.active is mgr.links[1])
+        assert _wait(lambda: c.accepted >= 1)
+    finally:
+        _stop(c, mgr, th)
+        a.kill()
+        b.kill()
+
+    assert [e.reason for e in mgr.events] == ["start", "slow"]
+    assert a.submits and set(b.submits) == {"jobB"}
+
+
+def test_switching_back_replays_the_pools_difficulty_and_job():
+    a = FakePool("aaaaaaaa", "jobA", diff=64 / 2**32)
+    b = FakePool("bbbbbbbb", "jobB", diff=128 / 2**32)
+    c, mgr, th = _mine([a, b], probe_interval=60.0)
+    try:
+        assert _wait(lambda: c.accepted >= 1 and mgr.links[1].alive)
+        with mgr._lock:
+            mgr._switch(mgr.links[1], "slow")
+        assert (c.job.job_id, c.current_diff) == ("jobB", b.diff)
+        with mgr._lock:
+            mgr._switch(mgr.links[0], "slow")
+        # A's kept difficulty and job were replayed: nothing left over from B
+        assert (c.job.job_id, c.current_diff) == ("jobA", a.diff)
+        seen = len(a.submits)
+        assert _wait(lambda: len(a.submits) > seen)
+    finally:
+        _stop(c, mgr, th)
+        a.kill()
+        b.kill()
+
+    assert [e.to_pool for e in mgr.events] == ["jobA", "jobB", "jobA"]
@@ -27,3 +27,70 @@ def test_numba_matches_python_on_easy_target():
     else:
         assert nb is not None
         assert int(nb) == int(py.nonce)
+
+
+def test_numba_parallel_matches_serial_lowest_nonce():
+    if not numba_available():
+        pytest.skip("numba backend not available")
+
+    from vireon_miner.fastscan_numba import find_share_bounded_numba_parallel
+
+    header76 = bytes(range(76))
+    target_int = int("00ffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff", 16)
+
+    # includes a window that wraps past 2^32-1 and one with no share (target 0)
+    for start, count, tgt in [(0, 5000, target_int), (0xFFFFFF00, 4000, target_int), (123, 3000, 0)]:
+        serial = find_share_bounded_numba(header76, tgt, start_nonce=start, count=count)
+        par = find_share_bounded_numba_parallel(header76, tgt, start_nonce=start, count=count)
+        assert par == serial
+
+
+def test_numba_full_compare_at_exact_target_boundary():
+    if not numba_available():
+        pytest.skip("numba backend not available")
+
+    from vireon_miner.hashing import sha256d
+
+    header76 = bytes(range(76))
+    nonce = 1000
+    h = sha256d(header76 + nonce.to_bytes(4, "little"))
+    hash_int = int.from_bytes(h[::-1], "big")
+
+    # target == hash must hit, target == hash-1 must miss; exercises every word of the compare
+    assert find_share_bounded_numba(header76, hash_int, start_nonce=nonce, count=1) == nonce
+    assert find_share_bounded_numba(header76, hash_int - 1, start_nonce=nonce, count=1) is None
+    assert find_py(header76, hash_int, start_nonce=nonce, count=1).nonce == nonce
+    assert find_py(header76, hash_int - 1, start_nonce=nonce, count=1) is None
+
+
+def test_numba_candidate_counters():
+    if not numba_available():
+        pytest.skip("numba backend not available")
+
+    from vireon_miner.fastscan_numba import (
+        candidate_stats,
+        find_share_bounded_numba_parallel,
+        reset_candidate_stats,
+    )
+
+    header76 = bytes(range(76))
+    count = 20000
+
+    # Top word 0x00000000 with the rest all ones: only a hash whose top 32 bits
+    # are zero is even a candidate, so a miss window sees (almost surely) none.
+    tgt = (1 << 224) - 1
+    for scan in (find_share_bounded_numba, find_share_bounded_numba_parallel):
+        reset_candidate_stats()
+        assert scan(header76, tgt, start_nonce=0, count=count) is None
+        st = candidate_stats()
+        assert (st.hashes, st.candidates, st.shares) == (count, 0, 0)
+
+    # Top word 0x00ffffff with the rest all ones: every candidate is a share,
+    # so the scan stops at its first candidate.
+    reset_candidate_stats()
+    easy = int("00ffffff" + "f" * 56, 16)
+    nonce = find_share_bounded_numba(header76, easy, start_nonce=0, count=count)
+    st = candidate_stats()
+    assert nonce is not None
+    assert st.hashes == nonce + 1
+    assert st.shares == 1 and st.candidates == 1
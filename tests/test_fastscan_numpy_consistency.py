@@ -0,0 +1,57 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from vireon_miner.scan import find_share_bounded as find_py
+
+np = pytest.importorskip("numpy")  # skip test if numpy not installed
+
+from vireon_miner.fastscan_numpy import find_share_bounded_numpy
+from vireon_miner.scan_auto import scan_bounded
+
+
+EASY_TARGET = int("00ffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff", 16)
+
+
+def test_numpy_matches_python_lowest_nonce():
+    header76 = bytes(range(76))
+
+    # includes a window that wraps past 2^32-1, a miss (target 0), an over-wide
+    # target, and a lane count that splits the window into uneven chunks
+    cases = [
+        (0, 5000, EASY_TARGET, 4096),
+        (0xFFFFFF00, 4000, EASY_TARGET, 1000),
+        (123, 3000, 0, 1024),
+        (5, 3, 1 << 300, 2),
+    ]
+    for start, count, tgt, lanes in cases:
+        py = find_py(header76, tgt, start_nonce=start, count=count)
+        nv = find_share_bounded_numpy(header76, tgt, start_nonce=start, count=count, lanes=lanes)
+        assert nv == (None if py is None else py.nonce)
+
+
+def test_numpy_full_compare_at_exact_target_boundary():
+    from vireon_miner.hashing import sha256d
+
+    header76 = b"\x01" * 76
+    nonce = 1000
+    hash_int = int.from_bytes(sha256d(header76 + nonce.to_bytes(4, "little"))[::-1], "big")
+
+    assert find_share_bounded_numpy(header76, hash_int, start_nonce=nonce, count=1) == nonce
+    assert find_share_bounded_numpy(header76, hash_int - 1, start_nonce=nonce, count=1) is None
+
+
+def test_numpy_backend_selectable_in_scan_auto():
+    out = scan_bounded(b"\x01" * 76, EASY_TARGET, start_nonce=0, count=5000, prefer="numpy")
+    assert out.backend == "numpy"
+    assert out.nonce == find_py(b"\x01" * 76, EASY_TARGET, start_nonce=0, count=5000).nonce
+
+
+def test_numpy_backend_does_not_import_numba():
+    # a NumPy-only host must not pay for (or need) the Numba import
+    code = "import sys, vireon_miner.fastscan_numpy; print('numba' in sys.modules)"
+    src = str(Path(__file__).resolve().parents[1] / "src")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=src, check=True)
+    assert out.stdout.strip() == "False"
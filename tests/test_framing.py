@@ -0,0 +1,76 @@
+import json
+import socket
+
+import pytest
+
+from vireon_miner.framing import JsonLineReader
+
+
+class _ChunkSocket:
+    # recv_into() hands out the given chunks one per call, then EOF
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.calls = 0
+
+    def recv_into(self, buf):
+        self.calls += 1
+        if not self.chunks:
+            return 0
+        c = self.chunks.pop(0)
+        n = min(len(c), len(buf))
+        buf[:n] = c[:n]
+        if n < len(c):
+            self.chunks.insert(0, c[n:])
+        return n
+
+
+def _lines(msgs):
+    return b"".join(json.dumps(m).encode() + b"\n" for m in msgs)
+
+
+MSGS = [{"id": i, "method": "mining.notify", "params": ["job%d" % i, "ab" * 40]} for i in range(50)]
+
+
+def test_fragmented_stream_reassembles_in_order():
+    data = _lines(MSGS)
+    r = JsonLineReader(_ChunkSocket([data[i:i + 7] for i in range(0, len(data), 7)]), bufsize=64)
+    assert [r.read_one() for _ in MSGS] == MSGS
+    assert r.buffered == 0
+    with pytest.raises(ConnectionError):
+        r.read_one()
+
+
+def test_read_many_returns_a_whole_burst_from_one_recv():
+    data = _lines(MSGS[:10])
+    half = _lines(MSGS[10:11])
+    sock = _ChunkSocket([data + half[:5], half[5:]])
+    r = JsonLineReader(sock)
+    assert r.read_many() == MSGS[:10] and sock.calls == 1
+    assert r.buffered == 5  # the partial 11th message is kept
+    assert r.read_many() == MSGS[10:11]
+
+
+def test_blank_lines_crlf_and_lines_longer_than_the_buffer():
+    big = {"id": None, "method": "mining.notify", "params": ["x" * 5000]}
+    data = b"\n\r\n" + json.dumps(MSGS[0]).encode() + b"\r\n\n\n" + _lines([big, MSGS[1]])
+    r = JsonLineReader(_ChunkSocket([data[i:i + 100] for i in range(0, len(data), 100)]), bufsize=256)
+    assert r.read_one() == MSGS[0]
+    assert r.read_one() == big
+    assert r.read_one() == MSGS[1]
+
+
+def test_read_available_never_blocks_on_a_real_socket():
+    a, b = socket.socketpair()
+    try:
+        r = JsonLineReader(a)
+        assert r.read_available() == []
+        b.sendall(_lines(MSGS[:3]) + b'{"id": 9')
+        got = []
+        while len(got) < 3:
+            got += r.read_available()
+        assert got == MSGS[:3]
+        b.sendall(b"}\n")
+        assert r.read_one() == {"id": 9}
+    finally:
+        a.close()
+        b.close()
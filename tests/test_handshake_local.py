@@ -1,92 +1,16 @@
 import json
-import socket
-import threading
 import time
 
 from vireon_miner.miner import connect_and_handshake, parse_set_difficulty, parse_notify
 
 
-def _fake_stratum_server(host: str, port: int, ready_evt: threading.Event):
-    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    srv.bind((host, port))
-    srv.listen(1)
-    ready_evt.set()
-
-    conn, _ = srv.accept()
-    conn.settimeout(5)
-
-    def recv_line():
-        buf = b""
-        while b"\n" not in buf:
-            buf += conn.recv(4096)
-        line, _ = buf.split(b"\n", 1)
-        return json.loads(line.decode())
-
-    def send(obj):
-        conn.sendall((json.dumps(obj) + "\n").encode())
-
-    # subscribe
-    sub = recv_line()
-    assert sub["method"] == "mining.subscribe"
-    send(
-        {
-            "id": sub["id"],
-            "result": [
-                [["mining.set_difficulty", "deadbeef"], ["mining.notify", "cafebabe"]],
-                "01020304",
-                8,
-            ],
-            "error": None,
-        }
-    )
-
-    # authorize
-    auth = recv_line()
-    assert auth["method"] == "mining.authorize"
-    send({"id": auth["id"], "result": True, "error": None})
-
-    # notifications (for parser tests)
-    send({"id": None, "method": "mining.set_difficulty", "params": [1.0]})
-    send(
-        {
-            "id": None,
-            "method": "mining.notify",
-            "params": [
-                "job1",
-                "00" * 32,
-                "aa",
-                "bb",
-                [],
-                "20000000",
-                "1d00ffff",
-                "5e9a2b5a",
-                True,
-            ],
-        }
-    )
-
-    time.sleep(0.1)
-    conn.close()
-    srv.close()
-
-
-def test_handshake_local():
-    host = "127.0.0.1"
-    tmp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    tmp.bind((host, 0))
-    port = tmp.getsockname()[1]
-    tmp.close()
-
-    ready = threading.Event()
-    th = threading.Thread(target=_fake_stratum_server, args=(host, port, ready), daemon=True)
-    th.start()
-    assert ready.wait(2)
-
-    res = connect_and_handshake(host, port, "user", "x", timeout=2.0)
+def test_handshake_local(fake_pool):
+    pool = fake_pool(en2_size=8)
+    res = connect_and_handshake("127.0.0.1", pool.port, "user", "x", timeout=2.0)
     assert res.authorized is True
     assert res.subscribe.extranonce1 == "01020304"
     assert res.subscribe.extranonce2_size == 8
+    assert pool.methods[:2] == ["mining.subscribe", "mining.authorize"]
 
 
 def test_parse_notifications():
@@ -111,3 +35,60 @@ def test_parse_notifications():
     assert tup is not None
     assert tup[0] == "jobX"
     assert tup[-1] is False
+
+
+def _stray_reply_after_job(pool, msg):
+    # a non-job message after the job (the live loop scans on those)
+    if msg.get("method") != "mining.authorize":
+        return False
+    pool.reply(msg, True)
+    pool.send_work()
+    pool.send({"id": 99, "result": True, "error": None})
+    return True
+
+
+def test_run_live_reports_cold_start(fake_pool, tmp_path):
+    from vireon_miner.miner import run_live
+
+    pool = fake_pool(diff=1e-9, on_request=_stray_reply_after_job)
+
+    out = tmp_path / "live_metrics.json"
+    run_live("127.0.0.1", pool.port, "user", "x", timeout_s=10.0, agent="test", nonce_start=0,
+             nonce_count=10_000, max_shares=1, duration_sec=30.0, out_path=str(out),
+             autotune_path=str(tmp_path / "autotune.json"))
+    pool.join()
+
+    m = json.loads(out.read_text())
+    assert m["accepted"] == 1 and m["stop_reason"] == "max_shares"
+    assert m["warmup_sec"] >= 0.0
+    assert 0.0 <= m["cold_start_to_first_hash_sec"] <= m["runtime_sec"]
+
+
+def _replacement_job_mid_scan(pool, msg):
+    if msg.get("method") != "mining.authorize":
+        return False
+    pool.reply(msg, True)
+    pool.set_difficulty(1e12)  # no shares
+    for job_id in ("job1", "job2"):
+        pool.notify([job_id] + pool.job[1:])
+        time.sleep(0.3)
+    return True
+
+
+def test_run_live_preempts_scan_on_new_job(fake_pool, tmp_path):
+    from vireon_miner.miner import run_live
+
+    pool = fake_pool(on_request=_replacement_job_mid_scan)
+    out = tmp_path / "live_metrics.json"
+    # one huge window: only preemption can move the scan to job2
+    run_live("127.0.0.1", pool.port, "user", "x", timeout_s=10.0, agent="test", nonce_start=0,
+             nonce_count=1 << 32, max_shares=1, duration_sec=0.8, out_path=str(out),
+             backend="python-midstate", autotune_path=str(tmp_path / "autotune.json"),
+             slice_latency_s=0.02)
+    pool.join()
+
+    m = json.loads(out.read_text())
+    assert m["jobs_seen"] == 2 and m["preemptions"] == 1
+    sw = m["job_switch_latency"]
+    assert sw["count"] == 2  # notify -> first slice, for job1 and for job2
+    assert sw["max_ms"] < 250  # a slice is ~20 ms; the old loop finished the whole window first
@@ -32,3 +32,35 @@ def test_merkle_root_le_and_header_hash_known():
 
     assert len(header) == 80
     assert sha256d(header).hex() == "d3cf04a015986aa2f9bf4514a2472deebf3a3e324fbe7877552cb39d7a407c1a"
+
+
+def test_job_template_matches_live_header_build():
+    from vireon_miner.job import StratumJob
+    from vireon_miner.live_client import build_header76, merkle_root_from_coinbase
+
+    params = ["j1", "aa" * 32, "02000000" + "01" * 60, "ff" * 90, ["11" * 32, "22" * 32, "33" * 32],
+              "20000000", "1d00ffff", "5f5e1000", True]
+    tpl = StratumJob.from_notify_params(params).template("01020304")
+
+    for en2 in (b"\x00" * 4, b"\x00\x00\x00\x01", b"\xde\xad\xbe\xef"):
+        merkle = merkle_root_from_coinbase(params[2], params[3], "01020304", en2.hex(), params[4])
+        assert tpl.merkle_root(en2) == merkle
+        assert tpl.header76(en2) == build_header76(params[5], params[1], merkle, params[7], params[6])
+
+
+def test_header76_batch_matches_per_header_build():
+    from vireon_miner import fastscan_numba
+    from vireon_miner.job import JobTemplate
+
+    if fastscan_numba.available():
+        fastscan_numba.warm_header76_rows()  # the kernel path, not the per-header fallback
+
+    for coinb1_hex, branch in (("02000000" + "01" * 56, []), ("02000000" + "01" * 60, ["11" * 32]),
+                               ("02000000" + "ab" * 123, ["22" * 32, "33" * 32, "44" * 32])):
+        tpl = JobTemplate.from_hex(job_id="j", prevhash_hex="aa" * 32, coinb1_hex=coinb1_hex, coinb2_hex="ff" * 145,
+                                   merkle_branch_hex=branch, version_hex="20000000", nbits_hex="1d00ffff",
+                                   ntime_hex="5f5e1000", extranonce1_hex="01020304")
+        # the counter wraps at 2^16 for a 2-byte extranonce2
+        buf = tpl.header76_batch(0xFFFE, 5, 2)
+        want = b"".join(tpl.header76(((0xFFFE + i) & 0xFFFF).to_bytes(2, "big")) for i in range(5))
+        assert buf == want
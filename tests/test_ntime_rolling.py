@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+
+from vireon_miner.job import JobTemplate, header76_variants
+from vireon_miner.live_client import LiveConfig, LiveStratumClient
+
+
+WINDOW = 7
+JOB = ["job1", "11" * 32, "02000000" + "ab" * 60, "cd" * 80, ["22" * 32],
+       "20000000", "1d00ffff", "5e9a2b5a", True]
+TPL = JobTemplate.from_hex(job_id=JOB[0], prevhash_hex=JOB[1], coinb1_hex=JOB[2], coinb2_hex=JOB[3],
+                           merkle_branch_hex=JOB[4], version_hex=JOB[5], nbits_hex=JOB[6], ntime_hex=JOB[7],
+                           extranonce1_hex="01020304")
+
+
+def test_header76_variants_order_and_fields():
+    h = TPL.header76(b"\x00" * 4)
+    buf = header76_variants(h, versions=[1, 2], ntimes=[TPL.ntime, TPL.ntime + 1, TPL.ntime + 2])
+    rows = [buf[i:i + 76] for i in range(0, len(buf), 76)]
+    assert len(rows) == 6
+    for idx, row in enumerate(rows):
+        vi, ti = divmod(idx, 3)
+        assert row == TPL.header76(b"\x00" * 4, version=[1, 2][vi], ntime=TPL.ntime + ti)
+    assert header76_variants(h, ntimes=[TPL.ntime]) == h
+
+
+def test_live_client_submits_rolled_ntime(fake_pool, monkeypatch):
+    import vireon_miner.live_client as live_client
+
+    # ~1 share per 2000 hashes; a 256-nonce space per header, so every
+    # extranonce2 is rolled over 8 ntimes before the next one is taken
+    monkeypatch.setattr(live_client, "NONCE_SPACE", 256)
+    pool = fake_pool(job=JOB, diff=2000 / 2**32, ntime_window=WINDOW)
+    c = LiveStratumClient(LiveConfig(host="127.0.0.1", port=pool.port, username="u", batch_nonces=256,
+                                     ntime_roll=WINDOW, log_every_seconds=60))
+    c.scanner.prefer = "python-midstate"
+    c.connect()
+    try:
+        c.subscribe_and_authorize()
+        net = threading.Thread(target=c.run_network_loop, daemon=True)
+        net.start()
+        deadline = time.time() + 60
+        while c.job is None and time.time() < deadline:  # set_difficulty, then notify
+            time.sleep(0.01)
+        miner = threading.Thread(target=c.run_mining_loop, daemon=True)
+        miner.start()
+        while c.accepted < 3 and time.time() < deadline:  # counted as the replies land
+            time.sleep(0.01)
+        c.stop_evt.set()
+        miner.join(10)
+    finally:
+        c.stop_evt.set()
+        c.close()
+    pool.join()
+
+    assert len(pool.submits) >= 3
+    assert all(ok for _, ok in pool.submits)
+    assert any(params[3] != JOB[7] for params, _ in pool.submits)
+    # rolled ntime reuses the extranonce2 (and merkle root) of the job's ntime
+    en2s = [params[2] for params, _ in pool.submits]
+    assert len(set(en2s)) < len(en2s)
+
+
+def test_run_live_rolls_ntime_after_nonce_space(fake_pool, tmp_path, monkeypatch):
+    import vireon_miner.miner as miner
+
+    # shrink the per-ntime nonce space so the test exhausts it in a few slices;
+    # at this difficulty the first share for extranonce2 00000000 is at ntime + 3
+    monkeypatch.setattr(miner, "NONCE_SPACE", 4096)
+    pool = fake_pool(job=JOB, diff=8000 / 2**32, ntime_window=WINDOW)
+    out = tmp_path / "live_metrics.json"
+    miner.run_live("127.0.0.1", pool.port, "user", "x", timeout_s=10.0, agent="test", nonce_start=0,
+                   nonce_count=1 << 20, max_shares=1, duration_sec=30.0, out_path=str(out),
+                   backend="python-midstate", autotune_path=str(tmp_path / "autotune.json"),
+                   ntime_roll_sec=WINDOW)
+    pool.join()
+
+    (params, ok), = pool.submits
+    assert ok and params[3] == f"{TPL.ntime + 3:08x}"
+    m = json.loads(out.read_text())
+    assert m["accepted"] == 1 and m["ntime_rolls"] == 3
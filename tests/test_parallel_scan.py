@@ -0,0 +1,104 @@
+import threading
+
+from vireon_miner.parallel_scan import ParallelScanner, _gapless, partition_range
+from vireon_miner.scan import find_share_bounded as find_py
+
+
+HEADER76 = b"\x01" * 76
+EASY_TARGET = int("00ffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff", 16)
+
+
+def test_partition_range_covers_window_with_wrap():
+    parts = partition_range(0xFFFFFFF0, 100, 3)
+    assert [c for _, c in parts] == [34, 33, 33]
+    assert parts[0][0] == 0xFFFFFFF0
+    assert parts[1][0] == (0xFFFFFFF0 + 34) & 0xFFFFFFFF
+    assert sum(c for _, c in parts) == 100
+    assert partition_range(0, 2, 8) == [(0, 1), (1, 1)]
+
+
+def test_inline_scanner_matches_python_first_share():
+    py = find_py(HEADER76, EASY_TARGET, start_nonce=0, count=5000)
+    assert py is not None
+
+    with ParallelScanner(workers=1, chunk=777) as s:
+        res = s.scan(HEADER76, EASY_TARGET, start_nonce=0, count=5000)
+    assert res.first is not None
+    assert res.first.nonce == py.nonce
+    assert res.hashes == py.nonce + 1
+    assert res.cancelled is False
+
+
+def test_process_pool_find_all_matches_python():
+    expected = []
+    n, left = 0, 3000
+    while left > 0:
+        r = find_py(HEADER76, EASY_TARGET, start_nonce=n, count=left)
+        if r is None:
+            break
+        expected.append(r.nonce)
+        left -= r.nonce - n + 1
+        n = r.nonce + 1
+
+    with ParallelScanner(workers=2, chunk=500) as s:
+        res = s.scan(HEADER76, EASY_TARGET, start_nonce=0, count=3000, find_all=True)
+    assert [sh.nonce for sh in res.shares] == expected
+    assert res.hashes == 3000
+
+
+def test_cancel_from_another_thread_stops_scan():
+    s = ParallelScanner(workers=1, chunk=1000, prefer="python")
+    threading.Timer(0.2, s.cancel).start()
+    res = s.scan(HEADER76, 0, start_nonce=0, count=50_000_000)
+    assert res.cancelled is True
+    assert res.first is None
+    assert 0 < res.hashes < 50_000_000
+
+
+def test_scan_headers_accepts_contiguous_buffer():
+    headers = [bytes([i]) * 76 for i in range(1, 4)]
+    with ParallelScanner(workers=1) as s:
+        from_list = s.scan_headers(headers, EASY_TARGET, start_nonce=0, count=3000, find_all=True)
+        from_buf = s.scan_headers(b"".join(headers), EASY_TARGET, start_nonce=0, count=3000, find_all=True)
+    assert from_buf.shares == from_list.shares
+    assert from_buf.hashes == from_list.hashes == 3 * 3000
+
+
+def test_pool_splits_header_buffer_into_row_ranges():
+    headers = [bytes([i]) * 76 for i in range(1, 6)]
+    with ParallelScanner(workers=1) as s:
+        one = [s.scan(h, EASY_TARGET, start_nonce=0, count=2000, find_all=True) for h in headers]
+    with ParallelScanner(workers=2, chunk=700) as s:
+        res = s.scan_headers(b"".join(headers), EASY_TARGET, start_nonce=0, count=2000, find_all=True)
+    assert [(sh.header_index, sh.nonce) for sh in res.shares] == [
+        (i, sh.nonce) for i, r in enumerate(one) for sh in r.shares
+    ]
+    assert res.hashes == 5 * 2000
+
+
+def test_cancel_before_queued_scan_starts_is_not_lost():
+    s = ParallelScanner(workers=1, chunk=1000, prefer="python")
+    token = s.scan_token()  # scan handed to an executor, not started yet
+    s.cancel()
+    res = s.scan(HEADER76, EASY_TARGET, start_nonce=0, count=50_000, token=token)
+    assert res.cancelled is True and res.hashes == 0
+    # the next scan runs normally: nothing to clear
+    assert s.scan(HEADER76, EASY_TARGET, start_nonce=0, count=5000).first is not None
+
+
+def test_cancel_reaches_pool_workers_of_queued_scan():
+    with ParallelScanner(workers=2, chunk=1000, prefer="python") as s:
+        token = s.scan_token()
+        s.cancel()
+        res = s.scan(HEADER76, 0, start_nonce=0, count=1_000_000, token=token)
+        assert res.cancelled is True and res.hashes == 0
+        res = s.scan(HEADER76, EASY_TARGET, start_nonce=0, count=3000, find_all=True)
+        assert res.cancelled is False and res.hashes == 3000
+
+
+def test_gapless_prefix_of_cut_short_tasks():
+    # one header split 3 ways from 10: the middle slice was cut short
+    assert _gapless(10, [(0, 1, 10, 100, 100), (0, 1, 110, 100, 40), (0, 1, 210, 100, 100)]) == 140
+    # two rows per task hashed one after the other: the second row is the limit
+    assert _gapless(0, [(0, 2, 0, 100, 130), (2, 2, 0, 100, 200)]) == 30
+    assert _gapless(0, [(0, 2, 0, 100, 60)]) == 0
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+from vireon_miner.aio_client import AsyncStratumClient
+from vireon_miner.hashing import sha256d
+from vireon_miner.job import JobTemplate
+from vireon_miner.live_client import LiveConfig, LiveStratumClient, diff_to_target_int
+from vireon_miner.proxy import Downstream, StratumProxy
+
+EN1 = "01020304"
+DIFF = 64 / 2**32
+JOB = ["job1", "00" * 32, "aa", "bb", [], "20000000", "1d00ffff", "5e9a2b5a", True]
+TPL = JobTemplate.from_hex(job_id=JOB[0], prevhash_hex=JOB[1], coinb1_hex=JOB[2], coinb2_hex=JOB[3],
+                           merkle_branch_hex=JOB[4], version_hex=JOB[5], nbits_hex=JOB[6], ntime_hex=JOB[7],
+                           extranonce1_hex=EN1)
+
+
+def _upstream():
+    # One connection; re-hashes every share against its own extranonce1 (4-byte extranonce2).
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(1)
+    log = {"methods": [], "shares": []}
+
+    def run():
+        conn, _ = srv.accept()
+        srv.close()
+        conn.settimeout(20)
+
+        def send(obj):
+            conn.sendall((json.dumps(obj) + "\n").encode())
+
+        try:
+            for line in conn.makefile("rb"):
+                msg = json.loads(line)
+                log["methods"].append(msg.get("method"))
+                if msg.get("method") == "mining.subscribe":
+                    send({"id": msg["id"], "result": [[], EN1, 4], "error": None})
+                elif msg.get("method") == "mining.authorize":
+                    send({"id": msg["id"], "result": True, "error": None})
+                    send({"id": None, "method": "mining.set_difficulty", "params": [DIFF]})
+                    send({"id": None, "method": "mining.notify", "params": JOB})
+                elif msg.get("method") == "mining.submit":
+                    user, job_id, en2_hex, ntime_hex, nonce_hex = msg["params"]
+                    header = TPL.header76(bytes.fromhex(en2_hex), ntime=int(ntime_hex, 16)) + bytes.fromhex(nonce_hex)
+                    ok = job_id == JOB[0] and int.from_bytes(sha256d(header)[::-1], "big") <= diff_to_target_int(DIFF)
+                    log["shares"].append((user, en2_hex, ok))
+                    send({"id": msg["id"], "result": ok, "error": None})
+        except OSError:
+            pass  # the proxy hung up first
+        finally:
+            conn.close()
+
+    th = threading.Thread(target=run, daemon=True)
+    th.start()
+    return srv.getsockname()[1], th, log
+
+
+def _start_proxy(up_port):
+    # proxy on its own event loop thread, like a separate process would run it
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    box = {}
+
+    async def main():
+        up = AsyncStratumClient("127.0.0.1", up_port, "proxy.worker", timeout_s=10.0)
+        await up.connect()
+        proxy = StratumProxy(up, listen_port=0)
+        await proxy.start()
+        box["proxy"], box["stop"] = proxy, asyncio.Event()
+        ready.set()
+        await box["stop"].wait()
+        box["metrics"] = proxy.to_dict()
+        await proxy.close()
+        await up.close()
+
+    th = threading.Thread(target=loop.run_until_complete, args=(main(),), daemon=True)
+    th.start()
+    assert ready.wait(10)
+
+    def stop():
+        loop.call_soon_threadsafe(box["stop"].set)
+        th.join(10)
+        return box["metrics"]
+
+    return box["proxy"], stop
+
+
+def test_proxy_fans_one_session_out_to_several_miners():
+    up_port, up_th, log = _upstream()
+    proxy, stop = _start_proxy(up_port)
+
+    miners = []
+    try:
+        for i in range(2):
+            c = LiveStratumClient(LiveConfig(host="127.0.0.1", port=proxy.port, username=f"rig{i}",
+                                             batch_nonces=256, suggest_difficulty=None, log_every_seconds=60))
+            c.scanner.prefer = "python-midstate"
+            c.connect()
+            c.subscribe_and_authorize()
+            threading.Thread(target=c.run_network_loop, daemon=True).start()
+            miners.append((c, threading.Thread(target=c.run_mining_loop, daemon=True)))
+        assert [c.extranonce1 for c, _ in miners] == [EN1 + "00", EN1 + "01"]
+        assert {c.extranonce2_size for c, _ in miners} == {3}
+
+        for _, th in miners:
+            th.start()
+        deadline = time.time() + 30
+        while any(c.accepted < 2 for c, _ in miners) and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        for c, th in miners:
+            c.stop_evt.set()
+            if th.is_alive():
+                th.join(10)
+            c.close()
+        m = stop()
+    up_th.join(5)
+
+    assert all(c.accepted >= 2 and c.rejected == 0 for c, _ in miners)
+    # one upstream handshake; every share valid upstream, under the proxy's worker name
+    assert log["methods"].count("mining.subscribe") == 1 and log["methods"].count("mining.authorize") == 1
+    assert log["shares"] and all(ok and user == "proxy.worker" for user, _, ok in log["shares"])
+    assert {en2[:2] for _, en2, _ in log["shares"]} == {"00", "01"}
+    # (the last replies may still be in flight when the proxy stops)
+    assert m["connections"] == 2
+    assert sum(c.accepted for c, _ in miners) <= m["submits"]["accepted"] <= len(log["shares"])
+
+
+def _find_nonce(en2: bytes, want_valid: bool) -> str:
+    target = diff_to_target_int(DIFF)
+    h76 = TPL.header76(en2)
+    for n in range(1 << 20):
+        nonce = n.to_bytes(4, "little")
+        if (int.from_bytes(sha256d(h76 + nonce)[::-1], "big") <= target) == want_valid:
+            return nonce.hex()
+    raise AssertionError("no nonce")
+
+
+def test_proxy_validates_shares_before_forwarding():
+    up_port, up_th, log = _upstream()
+    proxy, stop = _start_proxy(up_port)
+
+    def rpc(f, sock, obj):
+        sock.sendall((json.dumps(obj) + "\n").encode())
+        while True:
+            msg = json.loads(f.readline())
+            if msg.get("id") == obj["id"]:
+                return msg
+
+    try:
+        sock = socket.create_connection(("127.0.0.1", proxy.port), timeout=10)
+        f = sock.makefile("rb")
+        en2_d = "000001"
+        good = _find_nonce(bytes.fromhex("00" + en2_d), True)
+        bad = _find_nonce(bytes.fromhex("00" + en2_d), False)
+
+        def submit(i, *params):
+            return rpc(f, sock, {"id": i, "method": "mining.submit", "params": ["rig", *params]})
+
+        sub = rpc(f, sock, {"id": 1, "method": "mining.subscribe", "params": ["test"]})
+        assert sub["result"][1:] == [EN1 + "00", 3]
+        assert submit(2, "job1", en2_d, JOB[7], good)["error"][0] == 24  # not authorized yet
+        assert rpc(f, sock, {"id": 3, "method": "mining.authorize", "params": ["rig", "x"]})["result"] is True
+        while json.loads(f.readline()).get("method") != "mining.notify":  # mine only once a job is in
+            pass
+
+        assert submit(4, "job1", en2_d, JOB[7], good) == {"id": 4, "result": True, "error": None}
+        assert submit(5, "job1", en2_d, JOB[7], good)["error"][:2] == [22, "Duplicate share"]
+        assert submit(11, "job1", en2_d, JOB[7].upper(), good.upper())["error"][:2] == [22, "Duplicate share"]
+        # no version rolling upstream: zero bits are the same share, any set bit is refused
+        assert submit(13, "job1", en2_d, JOB[7], good, "00000000")["error"][:2] == [22, "Duplicate share"]
+        assert submit(14, "job1", en2_d, JOB[7], good, "00002000")["error"][1] == "Invalid version bits"
+        good2 = _find_nonce(bytes.fromhex("00000002"), True)
+        assert submit(15, "job1", "000002", JOB[7], good2, "00000000")["result"] is True
+        assert submit(6, "job1", en2_d, JOB[7], bad)["error"][:2] == [23, "Low difficulty share"]
+        assert submit(7, "nope", en2_d, JOB[7], good)["error"][:2] == [21, "Job not found"]
+        assert submit(8, "job1", "00" + en2_d, JOB[7], good)["error"][1] == "Invalid extranonce2 size"
+        assert submit(9, "job1", en2_d, "00000000", good)["error"][1] == "Time out of range"
+        assert rpc(f, sock, {"id": 10, "method": "mining.ping", "params": []})["result"] == "pong"
+        bad_params = rpc(f, sock, {"id": 12, "method": "mining.submit", "params": {"job_id": "job1"}})
+        assert bad_params["error"][1] == "Malformed submit"
+        f.close()
+        sock.close()
+    finally:
+        m = stop()
+    up_th.join(5)
+
+    # only the one valid share reached the pool
+    assert [(en2, ok) for _, en2, ok in log["shares"]] == [("00" + en2_d, True), ("00000002", True)]
+    assert m["local_rejects"] == {"Unauthorized worker": 1, "Duplicate share": 3, "Low difficulty share": 1,
+                                  "Job not found": 1, "Invalid extranonce2 size": 1, "Time out of range": 1,
+                                  "Malformed submit": 1, "Invalid version bits": 1}
+
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+
+    def is_closing(self):
+        return False
+
+    def write(self, data):
+        self.lines.append(json.loads(data))
+
+
+def test_configure_grants_upstream_and_requested_mask_intersection():
+    up = AsyncStratumClient("127.0.0.1", 0, "proxy.worker")
+    up.version_mask = 0x1FFFE000
+    proxy = StratumProxy(up, listen_port=0)
+    c = Downstream(writer=_Writer(), peer="test", connected_at=time.time())
+
+    def configure(params):
+        asyncio.run(proxy._handle_client(c, {"id": 7, "method": "mining.configure", "params": params}))
+        return c.writer.lines[-1]["result"]
+
+    assert configure([["version-rolling"], {"version-rolling.mask": "00fff000"}]) == {
+        "version-rolling": True, "version-rolling.mask": "00ffe000"}
+    assert c.version_mask(up.version_mask) == 0x00FFE000
+    assert configure([["version-rolling"], {"version-rolling.mask": "00001fff"}]) == {"version-rolling": False}
+
+
+def test_no_upstream_mask_relays_no_version_mask():
+    up = AsyncStratumClient("127.0.0.1", 0, "proxy.worker")
+    proxy = StratumProxy(up, listen_port=0)
+    c = Downstream(writer=_Writer(), peer="test", connected_at=time.time(), authorized=True)
+    proxy.clients.append(c)
+
+    proxy._on_upstream({"id": None, "method": "mining.set_version_mask", "params": ["1fffe000"]})
+    assert c.writer.lines == []
+    up.version_mask = 0x1FFFE000
+    proxy._send_version_mask(c)
+    assert c.writer.lines[-1]["params"] == ["1fffe000"]
@@ -0,0 +1,90 @@
+import pytest
+
+from vireon_miner import scan_auto
+from vireon_miner.scan_auto import find_share_bounded_auto, register_backend, scan_bounded
+
+
+HEADER76 = b"\x01" * 76
+EASY_TARGET = int("00ffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff", 16)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Empty registry; tests register their own chain, then the real ones as fallback."""
+    real = dict(scan_auto._REGISTRY)
+    monkeypatch.setattr(scan_auto, "_REGISTRY", {})
+    return real
+
+
+def _register_real(real):
+    for name, spec in real.items():
+        register_backend(name, spec.scan, spec.available)
+
+
+def test_miss_is_authoritative_and_records_backend(registry):
+    calls = []
+
+    def fake_scan(h, t, s, c):
+        calls.append((s, c))
+        return None
+
+    register_backend("fake", fake_scan)
+    _register_real(registry)
+
+    out = scan_bounded(HEADER76, EASY_TARGET, start_nonce=0, count=5000, prefer="fake")
+    assert out.nonce is None
+    assert out.backend == "fake"
+    assert calls == [(0, 5000)]  # python did not rescan the window
+
+
+def test_fallback_only_on_unavailable_or_error(registry):
+    def broken(h, t, s, c):
+        raise RuntimeError("kernel failed")
+
+    register_backend("off", broken, available=lambda: False)
+    register_backend("broken", broken)
+    _register_real(registry)
+
+    out = scan_bounded(HEADER76, EASY_TARGET, start_nonce=0, count=5000, prefer="off")
+    assert out.found
+    assert out.backend not in ("off", "broken")
+
+    r = find_share_bounded_auto(HEADER76, EASY_TARGET, start_nonce=0, count=5000, prefer="python")
+    assert r is not None and r.nonce == out.nonce
+
+
+def test_unknown_backend_and_bad_header():
+    with pytest.raises(ValueError):
+        scan_bounded(HEADER76, 0, start_nonce=0, count=1, prefer="gpu")  # type: ignore[arg-type]
+    with pytest.raises(ValueError):
+        scan_bounded(b"\x00" * 10, 0, start_nonce=0, count=1, prefer="python")
+
+
+def test_python_midstate_matches_reference_scan():
+    from vireon_miner.scan import find_share_bounded, find_share_bounded_midstate
+
+    header76 = bytes(range(76))
+    # includes a window that wraps past 2^32-1, a miss (target 0) and an over-wide target
+    for start, count, tgt in [(0, 3000, EASY_TARGET), (0xFFFFFF00, 3000, EASY_TARGET), (7, 500, 0), (5, 3, 1 << 300)]:
+        ref = find_share_bounded(header76, tgt, start_nonce=start, count=count)
+        fast = find_share_bounded_midstate(header76, tgt, start_nonce=start, count=count)
+        assert fast == ref
+
+    out = scan_bounded(header76, EASY_TARGET, start_nonce=0, count=3000, prefer="python-midstate")
+    assert out.backend == "python-midstate"
+    assert out.nonce == find_share_bounded(header76, EASY_TARGET, start_nonce=0, count=3000).nonce
+
+
+def test_out_of_range_target_is_rejected_before_any_backend(registry):
+    calls = []
+
+    def fake_scan(h, t, s, c):
+        calls.append(t)
+        return None
+
+    register_backend("fake", fake_scan)
+    _register_real(registry)
+    for target in (1 << 256, -1):
+        with pytest.raises(ValueError, match="target_int"):
+            scan_bounded(HEADER76, target, start_nonce=0, count=1, prefer="fake")
+    assert calls == []
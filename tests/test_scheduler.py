@@ -0,0 +1,67 @@
+import threading
+
+from vireon_miner.metrics import LatencyHistogram
+from vireon_miner.parallel_scan import ParallelScanner
+from vireon_miner.scan import find_share_bounded
+from vireon_miner.scheduler import JobGeneration, SliceScheduler
+
+
+HEADER76 = bytes(range(76))
+EASY_TARGET = int("00ffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff", 16)
+
+
+def _scheduler(**kw):
+    return SliceScheduler(ParallelScanner(workers=1, prefer="python-midstate"), **kw)
+
+
+def test_slice_size_follows_measured_hashrate():
+    sched = _scheduler(target_latency_s=0.02, min_slice=256)
+    assert sched.slice_nonces == 256  # nothing measured yet
+
+    res = sched.scan(HEADER76, 0, start_nonce=0, count=20_000, generation=JobGeneration())
+    assert not res.preempted and res.share is None
+    assert res.hashes == 20_000 and res.next_nonce == 20_000
+    assert res.slices > 1
+    # slices now target ~20 ms at the measured rate
+    assert sched.slice_nonces == max(256, int(sched.hashrate * 0.02))
+
+
+def test_new_generation_preempts_at_next_slice():
+    sched = _scheduler(min_slice=500, max_slice=500)
+    gen = JobGeneration()
+
+    res = sched.scan(HEADER76, 0, start_nonce=100, count=50_000, generation=gen, poll=gen.bump)
+    assert res.preempted
+    assert (res.slices, res.hashes, res.next_nonce) == (1, 500, 600)
+
+
+def test_cancelled_slice_resumes_at_first_unscanned_nonce():
+    scanner = ParallelScanner(workers=1, chunk=100, prefer="python")
+    sched = SliceScheduler(scanner, min_slice=1 << 20, max_slice=1 << 20)
+    threading.Timer(0.1, scanner.cancel).start()
+
+    res = sched.scan(HEADER76, 0, start_nonce=100, count=1 << 20, generation=JobGeneration())
+    assert res.preempted
+    # not the whole slice: only the nonces actually hashed (inline: one run from start)
+    assert 0 < res.scanned == res.hashes < 1 << 20
+    assert res.next_nonce == 100 + res.scanned
+
+
+def test_share_across_slice_boundaries_is_lowest_nonce():
+    sched = _scheduler(min_slice=97, max_slice=97)
+    ref = find_share_bounded(HEADER76, EASY_TARGET, start_nonce=0, count=5000)
+
+    res = sched.scan(HEADER76, EASY_TARGET, start_nonce=0, count=5000, generation=JobGeneration())
+    assert res.share is not None and res.share.nonce == ref.nonce
+    assert res.hashes == ref.nonce + 1 and res.next_nonce == ref.nonce + 1
+
+
+def test_latency_histogram_buckets():
+    h = LatencyHistogram(buckets_ms=(1, 10, 100))
+    for s in (0.0005, 0.005, 0.006, 0.05, 3.0):
+        h.observe(s)
+    d = h.to_dict()
+    assert d["count"] == 5
+    assert d["buckets"] == {"<=1ms": 1, "<=10ms": 2, "<=100ms": 1, "+inf": 1}
+    assert d["p50_ms"] == 10 and d["p99_ms"] is None
+    assert d["max_ms"] == 3000.0
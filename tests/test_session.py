@@ -0,0 +1,49 @@
+import json
+
+from vireon_miner.cli import main
+from vireon_miner.session import StratumSession
+
+
+def _pong(pool, msg):
+    if msg.get("method") != "ping":
+        return False
+    pool.reply(msg, "pong")
+    return True
+
+
+def test_session_stays_open_and_hands_out_early_messages_once(fake_pool):
+    # diff + job arrive before the authorize reply
+    pool = fake_pool(diff=1e-9, early=True, on_request=_pong)
+    with StratumSession("127.0.0.1", pool.port, "user", timeout_s=5.0) as s:
+        assert s.result.authorized and (s.extranonce1, s.extranonce2_size) == ("01020304", 4)
+        early = s.take_early_messages()
+        assert [m["method"] for m in early] == ["mining.set_difficulty", "mining.notify"]
+        assert s.take_early_messages() == []
+
+        s.send({"id": 7, "method": "ping", "params": []})  # same connection, no second handshake
+        assert s.read_one() == {"id": 7, "result": "pong", "error": None}
+    pool.join()
+    assert pool.methods == ["mining.subscribe", "mining.authorize", "ping"]
+
+
+def test_cli_handshake_prints_result(fake_pool, capsys):
+    pool = fake_pool(diff=1e-9, early=True)
+    assert main(["--handshake", "--port", str(pool.port), "--user", "user", "--timeout", "5"]) == 0
+    pool.join()
+    out = capsys.readouterr().out
+    assert "'authorized': True" in out and "'extranonce1': '01020304'" in out
+
+
+def test_cli_handshake_then_live_reuses_the_connection(fake_pool, tmp_path, capsys):
+    pool = fake_pool(diff=1e-9, early=True)  # refuses a second connection
+    out = tmp_path / "live_metrics.json"
+    rc = main(["--handshake", "--live", "--port", str(pool.port), "--user", "user", "--timeout", "5",
+               "--backend", "python-midstate", "--nonce-count", "10000", "--duration-sec", "30",
+               "--autotune-profile", str(tmp_path / "autotune.json"), "--out", str(out)])
+    pool.join()
+
+    assert rc == 0
+    assert pool.methods[:2] == ["mining.subscribe", "mining.authorize"]
+    assert pool.methods.count("mining.subscribe") == 1
+    m = json.loads(out.read_text())
+    assert m["accepted"] == 1 and m["stop_reason"] == "max_shares"
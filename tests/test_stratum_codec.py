@@ -1,3 +1,9 @@
+import json
+
+import pytest
+
+from vireon_miner import codec
+from vireon_miner.codec import CODECS, SubmitTemplate
 from vireon_miner.stratum import StratumMsg, parse_json_line
 
 
@@ -7,3 +13,27 @@ def test_stratum_msg_roundtrip_shape():
     assert obj["id"] == 1
     assert obj["method"] == "mining.subscribe"
     assert obj["params"] == ["vireon/0.1"]
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_codecs_roundtrip_stratum_lines(name):
+    prev = codec.set_codec(name)
+    try:
+        line = StratumMsg("mining.notify", ["j", ["ab", "cd"], 2**70, 1.5, True, None], msg_id=None).to_json_line()
+        assert line.endswith(b"\n") and b"\n" not in line[:-1]
+        assert parse_json_line(line) == json.loads(line)
+        assert parse_json_line(line)["params"][2] == 2**70  # beyond orjson's 64-bit ints: stdlib fallback
+        with pytest.raises(ValueError):
+            codec.loads(b'{"id": 1,')
+    finally:
+        codec.set_codec(prev.name)
+
+
+def test_submit_template_matches_generic_encoding():
+    tpl = SubmitTemplate('tb1q.worker"1')
+    for job_id, bits in (("4f2a", None), ('we\\ird"job', "1fffe000")):
+        line = tpl.line(12, job_id, "00000001", "5e9a2b5a", "deadbeef", bits)
+        params = ['tb1q.worker"1', job_id, "00000001", "5e9a2b5a", "deadbeef"] + ([bits] if bits else [])
+        assert line.endswith(b"\n")
+        assert json.loads(line) == {"id": 12, "method": "mining.submit", "params": params}
+        assert line == codec.STDLIB.dumps({"id": 12, "method": "mining.submit", "params": params}) + b"\n"
@@ -0,0 +1,73 @@
+import json
+import threading
+import time
+
+from vireon_miner.submit import FIRST_SUBMIT_ID, SubmitTable
+
+
+def test_submit_table_matches_replies_out_of_order():
+    t = SubmitTable()
+    seen = []
+    a = t.add(["u", "job", "00", "5e9a2b5a", "00000000"], on_reply=lambda ok, msg: seen.append(("a", ok)))
+    b = t.add(["u", "job", "00", "5e9a2b5a", "01000000"], on_reply=lambda ok, msg: seen.append(("b", ok)))
+    assert (a["id"], b["id"]) == (FIRST_SUBMIT_ID, FIRST_SUBMIT_ID + 1)
+    assert a["method"] == "mining.submit" and len(t) == 2
+
+    assert not t.resolve({"id": None, "method": "mining.notify", "params": []})
+    assert not t.resolve({"id": 2, "result": True, "error": None})  # not a submit
+    assert t.resolve({"id": b["id"], "result": None, "error": [23, "Low difficulty share", None]})
+    assert t.resolve({"id": a["id"], "result": True, "error": None})
+    assert not t.resolve({"id": a["id"], "result": True, "error": None})  # already answered
+
+    assert seen == [("b", False), ("a", True)]
+    assert (t.submitted, t.accepted, t.rejected, len(t)) == (2, 1, 1, 0)
+    assert t.rtt.count == 2
+
+    c = t.add([])
+    assert c["id"] == FIRST_SUBMIT_ID + 2  # ids are never reused
+    assert t.expire(60.0) == 0
+    assert t.expire(0.0) == 1 and t.expired == 1 and len(t) == 0
+
+
+def _hold_first_reply(log: list):
+    # Holds the reply to the first submit for 0.5 s; answers the rest at once.
+    def on_request(pool, msg):
+        if msg.get("method") != "mining.submit":
+            return False
+        log.append(("submit", msg["id"], time.monotonic()))
+
+        def answer(delay: float = 0.0):
+            time.sleep(delay)
+            log.append(("reply", msg["id"], time.monotonic()))
+            pool.answer_submit(msg)
+
+        if len(log) == 1:
+            threading.Thread(target=answer, args=(0.5,), daemon=True).start()
+        else:
+            answer()
+        return True
+    return on_request
+
+
+def test_run_live_keeps_hashing_while_a_submit_is_in_flight(fake_pool, tmp_path):
+    from vireon_miner.miner import run_live
+
+    max_shares = 3
+    log: list = []
+    pool = fake_pool(diff=1e-6, on_request=_hold_first_reply(log))
+
+    out = tmp_path / "live_metrics.json"
+    run_live("127.0.0.1", pool.port, "user", "x", timeout_s=10.0, agent="test", nonce_start=0,
+             nonce_count=1 << 20, max_shares=max_shares, duration_sec=30.0, out_path=str(out),
+             backend="python-midstate", autotune_path=str(tmp_path / "autotune.json"))
+    pool.join()
+
+    submits = [(i, t) for kind, i, t in log if kind == "submit"]
+    first_reply = next(t for kind, i, t in log if kind == "reply" and i == submits[0][0])
+    # later shares went out while the first one was still waiting on the pool
+    assert len(submits) == max_shares and submits[1][1] < first_reply
+    assert [i for i, _ in submits] == sorted({i for i, _ in submits})  # increasing, no reuse
+
+    m = json.loads(out.read_text())
+    assert m["accepted"] == max_shares and m["submits_unanswered"] == 0
+    assert m["submit_rtt"]["count"] == max_shares and m["submit_rtt"]["max_ms"] >= 400
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+
+import pytest
+
+from vireon_miner.live_client import LiveConfig, LiveStratumClient
+from vireon_miner.miner import connect_and_handshake
+from vireon_miner.protocol import parse_configure_reply, rolled_version, version_roll_space
+
+
+MASK = 0x1FFFE000
+JOB = ["job1", "11" * 32, "02000000" + "ab" * 60, "cd" * 80, ["22" * 32, "33" * 32],
+       "20000000", "1d00ffff", "5e9a2b5a", True]
+
+
+def test_rolled_version_fills_mask_bits_only():
+    assert rolled_version(0x20000000, MASK, 0) == 0x20000000
+    assert rolled_version(0x20000000, MASK, 1) == 0x20002000
+    assert rolled_version(0x20000000, MASK, 0xFFFF) == 0x20000000 | MASK
+    # non-contiguous mask: counter bits go to the mask bits low to high
+    assert rolled_version(0, 0x00F0000F, 0b10011) == 0x00100003
+    assert version_roll_space(MASK) == 1 << 16 and version_roll_space(0) == 1
+
+    assert parse_configure_reply({"id": 4, "result": {"version-rolling": True, "version-rolling.mask": "1fffe000"}}) == MASK
+    assert parse_configure_reply({"id": 4, "result": {"version-rolling": False}}) == 0
+    assert parse_configure_reply({"id": 4, "result": None, "error": [20, "Unknown method", None]}) == 0
+
+
+def test_handshake_negotiates_version_mask(fake_pool):
+    pool = fake_pool(grant=MASK)
+    res = connect_and_handshake("127.0.0.1", pool.port, "user", "x", timeout=5.0, version_rolling_mask=MASK)
+    pool.join()
+    assert res.authorized and res.version_mask == MASK
+    assert pool.requests[0]["params"][0] == ["version-rolling"]
+
+    pool = fake_pool(grant=None)
+    res = connect_and_handshake("127.0.0.1", pool.port, "user", "x", timeout=5.0, version_rolling_mask=MASK)
+    pool.join()
+    assert res.authorized and res.version_mask == 0
+
+
+@pytest.mark.parametrize("version_hex", ["20000000", "3fffe000"])  # the latter: every mask bit already set
+def test_live_client_submits_valid_rolled_shares(fake_pool, monkeypatch, version_hex):
+    import vireon_miner.live_client as live_client
+
+    # ~1 share per 2000 hashes; a 256-nonce space per header, so every
+    # extranonce2 is rolled over 16 versions before the next one is taken
+    monkeypatch.setattr(live_client, "NONCE_SPACE", 256)
+    job = JOB[:5] + [version_hex] + JOB[6:]
+    pool = fake_pool(grant=MASK, diff=2000 / 2**32, job=job)
+    c = LiveStratumClient(LiveConfig(host="127.0.0.1", port=pool.port, username="u", batch_nonces=256,
+                                     version_rolling=True, version_roll_headers=16, log_every_seconds=60))
+    c.scanner.prefer = "python-midstate"
+    c.connect()
+    try:
+        c.subscribe_and_authorize()
+        assert c.version_mask == MASK
+        net = threading.Thread(target=c.run_network_loop, daemon=True)
+        net.start()
+        deadline = time.time() + 60
+        while c.job is None and time.time() < deadline:  # set_difficulty, then notify
+            time.sleep(0.01)
+        miner = threading.Thread(target=c.run_mining_loop, daemon=True)
+        miner.start()
+        while c.accepted < 3 and time.time() < deadline:  # counted as the replies land
+            time.sleep(0.01)
+        c.stop_evt.set()
+        miner.join(10)
+    finally:
+        c.stop_evt.set()
+        c.close()
+    pool.join()
+
+    assert len(pool.submits) >= 3
+    assert all(len(params) == 6 and ok for params, ok in pool.submits)
+    assert any(int(params[5], 16) != 0 for params, _ in pool.submits)
+    en2s = [params[2] for params, _ in pool.submits]
+    assert len(set(en2s)) < len(en2s)
+
+
+def test_run_live_submits_version_bits(fake_pool, tmp_path):
+    from vireon_miner.miner import run_live
+
+    pool = fake_pool(grant=MASK, diff=1e-9)
+    out = tmp_path / "live_metrics.json"
+    run_live("127.0.0.1", pool.port, "user", "x", timeout_s=10.0, agent="test", nonce_start=0,
+             nonce_count=10_000, max_shares=1, duration_sec=30.0, out_path=str(out),
+             backend="python-midstate", autotune_path=str(tmp_path / "autotune.json"), version_rolling=True)
+    pool.join()
+
+    (params, ok), = pool.submits
+    assert ok and len(params) == 6
+    m = json.loads(out.read_text())
+    assert m["accepted"] == 1 and m["version_mask"] == f"{MASK:08x}"
+
+
+def test_run_live_applies_configure_reply_after_authorize(fake_pool, tmp_path):
+    from vireon_miner.miner import run_live
+
+    pool = fake_pool(grant=MASK, diff=1e-9, late_configure=True)
+    out = tmp_path / "live_metrics.json"
+    run_live("127.0.0.1", pool.port, "user", "x", timeout_s=10.0, agent="test", nonce_start=0,
+             nonce_count=10_000, max_shares=1, duration_sec=30.0, out_path=str(out),
+             backend="python-midstate", autotune_path=str(tmp_path / "autotune.json"), version_rolling=True)
+    pool.join()
+
+    assert pool.submits and all(ok for _, ok in pool.submits)
+    assert json.loads(out.read_text())["version_mask"] == f"{MASK:08x}"
@@ -0,0 +1,162 @@
+import threading
+import time
+
+from vireon_miner.live_client import (
+    Job,
+    LiveConfig,
+    LiveStratumClient,
+    build_header76,
+    extranonce2_from_counter,
+    merkle_root_from_coinbase,
+)
+from vireon_miner.workahead import HeaderPipeline
+
+
+def _job(job_id: str) -> Job:
+    return Job(
+        job_id=job_id,
+        prevhash="11" * 32,
+        coinb1="01000000" + "ab" * 40,
+        coinb2="cd" * 60,
+        merkle_branch=["22" * 32, "33" * 32],
+        version="20000000",
+        nbits="1d00ffff",
+        ntime="5f5e1000",
+        clean_jobs=True,
+        received_at=time.time(),
+    )
+
+
+def _counter():
+    n = [0]
+
+    def nxt() -> str:
+        n[0] += 1
+        return extranonce2_from_counter(n[0], 4)
+
+    return nxt
+
+
+def test_units_match_inline_header_build():
+    c = LiveStratumClient(LiveConfig(host="127.0.0.1", port=0, username="u", workahead_depth=4))
+    c.extranonce1, c.extranonce2_size = "f000000f", 4
+    job = _job("a")
+    c.pipeline.set_job(job)
+    c.pipeline.start()
+    try:
+        for _ in range(6):
+            unit = c.pipeline.get(timeout=5)
+            assert unit is not None and unit.job is job
+            merkle = merkle_root_from_coinbase(job.coinb1, job.coinb2, "f000000f", unit.extranonce2, job.merkle_branch)
+            assert unit.header76 == build_header76(job.version, job.prevhash, merkle, job.ntime, job.nbits)
+    finally:
+        c.close()
+
+
+def test_queue_is_bounded_and_refills():
+    p = HeaderPipeline(lambda job, en2: bytes(76), _counter(), depth=3)
+    p.set_job("a")
+    p.start()
+    try:
+        deadline = time.time() + 5
+        while p.stats().depth < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        st = p.stats()
+        assert (st.depth, st.max_depth, st.produced) == (3, 3, 3)
+
+        en2 = [p.get(timeout=5).extranonce2 for _ in range(5)]
+        assert en2 == [extranonce2_from_counter(i, 4) for i in range(1, 6)]
+    finally:
+        p.close()
+
+
+def test_batch_build_fills_free_slots_in_one_call():
+    calls = []
+
+    def batch(job, n):
+        calls.append(n)
+        return [f"{len(calls)}.{i}" for i in range(n)], b"".join(bytes([i]) * 76 for i in range(n))
+
+    p = HeaderPipeline(None, None, depth=3, build_batch=batch)  # type: ignore[arg-type]
+    p.set_job("a")
+    p.start()
+    try:
+        units = [p.get(timeout=5) for _ in range(3)]
+        assert [(u.extranonce2, u.header76) for u in units] == [(f"1.{i}", bytes([i]) * 76) for i in range(3)]
+        assert calls[0] == 3 and p.get(timeout=5) is not None
+    finally:
+        p.close()
+
+
+def test_job_change_flushes_ready_and_in_flight_units():
+    gate = threading.Event()
+    building = threading.Event()
+
+    def build(job, en2):
+        if job == "old" and gate.is_set():
+            building.set()
+            time.sleep(0.1)  # new job arrives mid-build
+        return job.encode().ljust(76, b"\0")
+
+    p = HeaderPipeline(build, _counter(), depth=2)
+    p.set_job("old")
+    p.start()
+    try:
+        while p.stats().depth < 2:
+            time.sleep(0.01)
+        gate.set()
+        assert p.get(timeout=5).job == "old"  # frees a slot: the producer starts a slow build
+        assert building.wait(5)
+        p.set_job("new")
+
+        for _ in range(4):
+            unit = p.get(timeout=5)
+            assert unit is not None and unit.job == "new"
+        assert p.stats().flushed == 1
+    finally:
+        p.close()
+
+
+def test_starvation_counted_when_producer_is_slow():
+    def slow(job, en2):
+        time.sleep(0.05)
+        return bytes(76)
+
+    p = HeaderPipeline(slow, _counter(), depth=1)
+    assert p.get(timeout=0.01) is None
+    assert p.stats().starvations == 0  # no job yet: idle, not starved
+
+    p.set_job("a")
+    p.start()
+    try:
+        assert p.get(timeout=5) is not None
+        st = p.stats()
+        assert st.starvations == 1 and st.starved_sec > 0
+    finally:
+        p.close()
+
+
+def test_job_that_fails_to_build_is_dropped_and_next_job_is_mined():
+    c = LiveStratumClient(LiveConfig(host="127.0.0.1", port=0, username="u", batch_nonces=256,
+                                     log_every_seconds=60))
+    c.scanner.prefer = "python-midstate"
+    c.extranonce1, c.extranonce2_size = "f000000f", 4
+    notify = ["bad", "zz" * 32, "aa", "bb", [], "20000000", "1d00ffff", "5e9a2b5a", True]
+    c._handle_message({"id": None, "method": "mining.notify", "params": notify})
+    th = threading.Thread(target=c.run_mining_loop, daemon=True)
+    th.start()
+    try:
+        deadline = time.time() + 10
+        while c.pipeline.stats().build_errors < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        assert c.pipeline.stats().build_errors == 1 and c.hashes == 0
+
+        c._handle_message({"id": None, "method": "mining.notify", "params": ["good", "00" * 32, *notify[2:]]})
+        while c.hashes == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        assert c.hashes > 0  # the producer survived and built the good job
+    finally:
+        c.stop_evt.set()
+        th.join(10)
+        c.close()